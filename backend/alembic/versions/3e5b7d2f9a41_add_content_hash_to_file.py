@@ -0,0 +1,30 @@
+"""add content hash to file
+
+Revision ID: 3e5b7d2f9a41
+Revises: 8a9d88102a98
+Create Date: 2025-09-08 19:42:51.318204
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3e5b7d2f9a41"
+down_revision: Union[str, Sequence[str], None] = "8a9d88102a98"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # existing files have no hash, so they will be treated as changed the next time they're touched
+    op.add_column("files", sa.Column("content_hash", sa.String, nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("files", "content_hash")
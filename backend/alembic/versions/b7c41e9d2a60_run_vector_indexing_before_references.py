@@ -0,0 +1,41 @@
+"""run vector indexing before references
+
+Revision ID: b7c41e9d2a60
+Revises: 3e5b7d2f9a41
+Create Date: 2025-09-10 14:05:37.812946
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7c41e9d2a60"
+down_revision: Union[str, Sequence[str], None] = "3e5b7d2f9a41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # the step order changed from definitions -> references -> vector to definitions -> vector ->
+    # references. Files waiting for vector indexing have their references extracted again
+    # afterwards, which keeps the existing ones since references are inserted without duplicates
+    op.execute(
+        sa.text("UPDATE files SET indexing_step = 'vector' WHERE indexing_step = 'references'")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # parsed files (i.e., those with nodes) waiting for vector indexing haven't had their references
+    # extracted yet. Files waiting for references will be vector indexed again, which is harmless
+    op.execute(
+        sa.text(
+            "UPDATE files SET indexing_step = 'references' WHERE indexing_step = 'vector' "
+            "AND EXISTS (SELECT 1 FROM nodes WHERE nodes.file_id = files.id)"
+        )
+    )
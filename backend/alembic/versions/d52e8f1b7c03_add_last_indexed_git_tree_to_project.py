@@ -0,0 +1,30 @@
+"""add last indexed git tree to project
+
+Revision ID: d52e8f1b7c03
+Revises: b7c41e9d2a60
+Create Date: 2025-09-12 10:21:44.503117
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d52e8f1b7c03"
+down_revision: Union[str, Sequence[str], None] = "b7c41e9d2a60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # existing projects have no git tree, so they will be walked once the next time they're indexed
+    op.add_column("projects", sa.Column("last_indexed_git_tree", sa.String, nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("projects", "last_indexed_git_tree")
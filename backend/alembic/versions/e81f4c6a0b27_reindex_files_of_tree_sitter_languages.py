@@ -0,0 +1,59 @@
+"""reindex files of tree-sitter languages
+
+Revision ID: e81f4c6a0b27
+Revises: d52e8f1b7c03
+Create Date: 2025-09-15 09:42:18.306251
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e81f4c6a0b27"
+down_revision: Union[str, Sequence[str], None] = "d52e8f1b7c03"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# languages which gained a codegraph parser, whose files were previously only vector indexed
+TREE_SITTER_LANGUAGES = (
+    "c",
+    "cpp",
+    "csharp",
+    "go",
+    "java",
+    "javascript",
+    "php",
+    "ruby",
+    "rust",
+    "typescript",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # files of these languages which were only vector indexed (i.e., those without nodes, as every
+    # parsed file has a module node) have their definitions extracted. Vector indexing them again
+    # reuses the embeddings of their unchanged chunks
+    op.execute(
+        sa.text(
+            "UPDATE files SET indexing_step = 'definitions' "
+            "WHERE language IN :languages AND indexing_step IN ('vector', 'complete') "
+            "AND NOT EXISTS (SELECT 1 FROM nodes WHERE nodes.file_id = files.id)"
+        ).bindparams(sa.bindparam("languages", TREE_SITTER_LANGUAGES, expanding=True))
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # files of these languages waiting for codegraph indexing are only vector indexed, as they no
+    # longer have a parser. Files already vector indexed are vector indexed again, which is harmless
+    op.execute(
+        sa.text(
+            "UPDATE files SET indexing_step = 'vector' "
+            "WHERE language IN :languages AND indexing_step IN ('definitions', 'references')"
+        ).bindparams(sa.bindparam("languages", TREE_SITTER_LANGUAGES, expanding=True))
+    )
@@ -8,6 +8,11 @@ CELERY_BEAT_EXPIRES_DEFAULT = 15 * 60
 
 # Redis lock timeouts
 REDIS_INDEXING_LOCK_TIMEOUT = 120
+# partial indexing of a locked project is retried with exponential backoff, for ~15 minutes
+REDIS_INDEXING_LOCK_RETRY_DELAY = 5
+REDIS_INDEXING_LOCK_MAX_RETRY_DELAY = 5 * 60
+REDIS_INDEXING_LOCK_MAX_RETRIES = 8
+REDIS_INDEXING_GROUP_LOCK_TIMEOUT = 30 * 60  # subtasks may wait in the queue before extending it
 
 
 class CeleryPriority(int, Enum):
@@ -29,6 +34,9 @@ class CeleryQueue(str, Enum):
 class CeleryTask(str, Enum):
     QUEUE_INDEXING = "queue_indexing"
     RUN_INDEXING = "run_indexing"
+    INDEX_FILE_BATCH = "index_file_batch"
+    QUEUE_REFERENCE_EXTRACTION = "queue_reference_extraction"
+    RELEASE_INDEXING_LOCK = "release_indexing_lock"
 
 
 class RedisLock(str, Enum):
@@ -1,18 +1,30 @@
-from celery import shared_task
+from pathlib import Path
+from typing import Sequence
+from uuid import UUID
+
+from celery import Signature, chord, group, shared_task
 from celery.app.task import Task
 from redis.lock import Lock
 from sqlalchemy import select
 
 from codegraph.celery.constants import (
+    REDIS_INDEXING_GROUP_LOCK_TIMEOUT,
+    REDIS_INDEXING_LOCK_MAX_RETRIES,
+    REDIS_INDEXING_LOCK_MAX_RETRY_DELAY,
+    REDIS_INDEXING_LOCK_RETRY_DELAY,
     REDIS_INDEXING_LOCK_TIMEOUT,
     CeleryPriority,
     CeleryQueue,
     CeleryTask,
     RedisLock,
 )
+from codegraph.configs.indexing import INDEXING_DISTRIBUTED, INDEXING_DISTRIBUTED_BATCH_SIZE
 from codegraph.db.engine import get_session
-from codegraph.db.models import Project
+from codegraph.db.models import File, Project
+from codegraph.graph.indexing.metrics import IndexingMetrics, log_stage_metrics
+from codegraph.graph.indexing.pipeline import discover_files, index_files
 from codegraph.graph.indexing.pipeline import run_indexing as run_indexing_pipeline
+from codegraph.graph.models import IndexingStep
 from codegraph.redis.client import get_redis_client
 from codegraph.utils.logging import get_logger
 
@@ -48,29 +60,207 @@ def queue_indexing(self: Task) -> None:  # type: ignore[type-arg]
         )
 
 
-@shared_task(name=CeleryTask.RUN_INDEXING)
-def run_indexing(project_id: int) -> None:
-    """Run indexing for a single project. Ensures indexing on a project won't overlap."""
+@shared_task(name=CeleryTask.RUN_INDEXING, bind=True, max_retries=REDIS_INDEXING_LOCK_MAX_RETRIES)
+def run_indexing(
+    self: Task, project_id: int, paths: list[str] | None = None  # type: ignore[type-arg]
+) -> None:
+    """Run indexing for a single project, or only for the given paths of it. Ensures indexing on a
+    project won't overlap. If distributed, the files are indexed by subtasks instead.
+    """
     logger.info(f"run_indexing ({project_id}): starting")
 
-    # acquire lock to prevent overlap
+    # acquire lock to prevent overlap. Full indexing is skipped as it's already running, but the
+    # changes of partial indexing may have been missed so it's retried with backoff. Once out of
+    # retries it's dropped, as the next full indexing picks the changes up
     redis_client = get_redis_client()
     lock: Lock = redis_client.lock(
         _get_indexing_lock_name(project_id),
         timeout=REDIS_INDEXING_LOCK_TIMEOUT,
     )
     if not lock.acquire(blocking=False):
-        return
+        if paths is None:
+            return
+        if self.request.retries >= REDIS_INDEXING_LOCK_MAX_RETRIES:
+            logger.warning(f"run_indexing ({project_id}): still locked, skipped {len(paths)} paths")
+            return
+        raise self.retry(
+            countdown=min(
+                REDIS_INDEXING_LOCK_RETRY_DELAY * 2**self.request.retries,
+                REDIS_INDEXING_LOCK_MAX_RETRY_DELAY,
+            )
+        )
 
     # run indexing
+    is_fanned_out = False
     try:
-        run_indexing_pipeline(project_id, lock)
+        if INDEXING_DISTRIBUTED:
+            is_fanned_out = _fan_out_indexing(
+                project_id, lock, None if paths is None else [Path(path) for path in paths]
+            )
+        else:
+            status = run_indexing_pipeline(
+                project_id, lock, paths=None if paths is None else [Path(path) for path in paths]
+            )
+            logger.info(
+                f"run_indexing ({project_id}): took {status.duration.total_seconds():.2f}s, "
+                f"{len(status.codegraph_indexed_paths)} codegraph and "
+                f"{len(status.vector_indexed_paths)} vector indexed files"
+            )
+            log_stage_metrics(f"run_indexing ({project_id})", status.stages)
     except Exception as e:
         logger.error(f"run_indexing ({project_id}): {e}")
     finally:
-        # release lock
-        if lock.owned():
+        # release lock, unless it was handed over to the subtasks
+        if is_fanned_out:
+            logger.info(f"run_indexing ({project_id}): fanned out")
+        elif lock.owned():
             lock.release()
             logger.info(f"run_indexing ({project_id}): completed")
         else:
             logger.error(f"run_indexing ({project_id}): lock not owned")
+
+
+@shared_task(name=CeleryTask.INDEX_FILE_BATCH)
+def index_file_batch(
+    project_id: int, file_ids: list[str], lock_token: str, extract_references: bool
+) -> None:
+    """Run the remaining indexing steps of a batch of files, as a subtask of distributed indexing.
+    Fails if the project's indexing lock was lost while the subtask was queued or running (e.g.,
+    released once another subtask failed), so that indexing of the project never overlaps.
+    """
+    lock = _get_group_lock(project_id, lock_token)
+    lock.extend(REDIS_INDEXING_GROUP_LOCK_TIMEOUT, replace_ttl=True)
+
+    metrics = IndexingMetrics()
+    index_files(
+        project_id,
+        lock,
+        file_ids=[UUID(file_id) for file_id in file_ids],
+        extract_references=extract_references,
+        metrics=metrics,
+    )
+    log_stage_metrics(f"index_file_batch ({project_id})", metrics.get_stages())
+
+
+@shared_task(name=CeleryTask.QUEUE_REFERENCE_EXTRACTION)
+def queue_reference_extraction(project_id: int, lock_token: str) -> None:
+    """Enqueue reference extraction subtasks for all files waiting for it, once the definitions of
+    every file are extracted. The indexing lock is released once they complete.
+    """
+    with get_session() as session:
+        file_ids = (
+            session.execute(
+                select(File.id).filter(
+                    File.project_id == project_id,
+                    File.indexing_step == IndexingStep.REFERENCES,
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+    logger.info(f"queue_reference_extraction ({project_id}): queued {len(file_ids)} files")
+    _queue_file_batches(
+        project_id, file_ids, lock_token, True, _release_lock_signature(project_id, lock_token)
+    )
+
+
+@shared_task(name=CeleryTask.RELEASE_INDEXING_LOCK)
+def release_indexing_lock(project_id: int, lock_token: str) -> None:
+    """Release the indexing lock held by the subtasks of distributed indexing."""
+    lock = _get_group_lock(project_id, lock_token)
+    if lock.owned():
+        lock.release()
+        logger.info(f"run_indexing ({project_id}): completed")
+    else:
+        logger.error(f"run_indexing ({project_id}): lock not owned")
+
+
+def _fan_out_indexing(project_id: int, lock: Lock, paths: list[Path] | None) -> bool:
+    """Discovers the files to index, and enqueues subtasks indexing them in batches up to their
+    references, followed by the extraction of their references. Returns whether the subtasks were
+    queued, in which case the lock is handed over to them.
+    """
+    metrics = IndexingMetrics()
+    is_discovered = discover_files(project_id, lock, paths=paths, metrics=metrics)
+    log_stage_metrics(f"run_indexing ({project_id})", metrics.get_stages())
+    if not is_discovered:
+        return False
+
+    with get_session() as session:
+        unindexed_files = session.execute(
+            select(File.id, File.indexing_step).filter(
+                File.project_id == project_id, File.indexing_step != IndexingStep.COMPLETE
+            )
+        ).all()
+    if not unindexed_files:
+        return False
+
+    # give the subtasks enough time to be picked up, each of them extends the lock again
+    lock_token = lock.local.token.decode()
+    lock.extend(REDIS_INDEXING_GROUP_LOCK_TIMEOUT, replace_ttl=True)
+
+    file_ids = [
+        file_id
+        for file_id, indexing_step in unindexed_files
+        if indexing_step != IndexingStep.REFERENCES
+    ]
+    logger.info(f"run_indexing ({project_id}): queued {len(file_ids)} files")
+    _queue_file_batches(
+        project_id,
+        file_ids,
+        lock_token,
+        False,
+        queue_reference_extraction.si(project_id, lock_token).set(
+            queue=CeleryQueue.INDEXING, priority=CeleryPriority.MEDIUM
+        ),
+    )
+    return True
+
+
+def _queue_file_batches(
+    project_id: int,
+    file_ids: Sequence[UUID],
+    lock_token: str,
+    extract_references: bool,
+    callback: Signature,  # type: ignore[type-arg]
+) -> None:
+    """Enqueues subtasks indexing the files in batches, and the callback once all of them
+    complete. The indexing lock is released if any of them fail.
+    """
+    if not file_ids:
+        callback.apply_async()
+        return
+
+    batch_size = INDEXING_DISTRIBUTED_BATCH_SIZE
+    batches = group(
+        index_file_batch.si(
+            project_id,
+            [str(file_id) for file_id in file_ids[i : i + batch_size]],
+            lock_token,
+            extract_references,
+        ).set(queue=CeleryQueue.INDEXING, priority=CeleryPriority.MEDIUM)
+        for i in range(0, len(file_ids), batch_size)
+    )
+    chord(batches)(callback.on_error(_release_lock_signature(project_id, lock_token)))
+
+
+def _release_lock_signature(
+    project_id: int, lock_token: str
+) -> Signature:  # type: ignore[type-arg]
+    return release_indexing_lock.si(project_id, lock_token).set(
+        queue=CeleryQueue.INDEXING, priority=CeleryPriority.HIGH
+    )
+
+
+def _get_group_lock(project_id: int, lock_token: str) -> Lock:
+    """Returns the indexing lock held by the subtasks of distributed indexing, which may be used
+    from any thread.
+    """
+    lock: Lock = get_redis_client().lock(
+        _get_indexing_lock_name(project_id),
+        timeout=REDIS_INDEXING_GROUP_LOCK_TIMEOUT,
+        thread_local=False,
+    )
+    lock.local.token = lock_token.encode()
+    return lock
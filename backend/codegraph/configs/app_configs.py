@@ -39,9 +39,37 @@ REDIS_DB_NUMBER_CELERY_RESULTS = int(os.getenv("REDIS_DB_NUMBER_CELERY_RESULTS",
 MODEL_SERVER_HOST = "localhost"
 MODEL_SERVER_PORT = 9000
 
+MODEL_SERVER_CLIENT_POOL_SIZE = int(
+    os.getenv("MODEL_SERVER_CLIENT_POOL_SIZE", "16")
+)  # max connections kept alive to the model server, per process
+MODEL_SERVER_CLIENT_CONNECT_TIMEOUT = float(os.getenv("MODEL_SERVER_CLIENT_CONNECT_TIMEOUT", "5"))
+MODEL_SERVER_CLIENT_READ_TIMEOUT = float(
+    os.getenv("MODEL_SERVER_CLIENT_READ_TIMEOUT", "120")
+)  # seconds, embedding a large batch on the CPU can take a while
+MODEL_SERVER_CLIENT_MAX_RETRIES = int(
+    os.getenv("MODEL_SERVER_CLIENT_MAX_RETRIES", "3")
+)  # retries on connection errors and 502/503/504 responses
+MODEL_SERVER_CLIENT_RETRY_BACKOFF = float(
+    os.getenv("MODEL_SERVER_CLIENT_RETRY_BACKOFF", "0.25")
+)  # seconds to wait before the first retry, doubled after each retry
+
 MODEL_SERVER_MAX_RETRIES = 3
 MODEL_SERVER_RETRY_WAIT_MS = 100
 
+# torch, or onnx_int8 to run a dynamically int8 quantized model on the CPU with onnxruntime
+MODEL_SERVER_BACKEND = os.getenv("MODEL_SERVER_BACKEND", "torch").lower()
+MODEL_SERVER_ONNX_QUANTIZATION = os.getenv(
+    "MODEL_SERVER_ONNX_QUANTIZATION", "avx2"
+)  # one of arm64, avx2, avx512, avx512_vnni, pick the best instruction set the CPU supports
+MODEL_SERVER_ONNX_CACHE_DIR = os.getenv(
+    "MODEL_SERVER_ONNX_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "codegraph")
+)  # where quantized onnx models are exported to
+MODEL_SERVER_ONNX_PARITY_CHECK = (
+    os.getenv("MODEL_SERVER_ONNX_PARITY_CHECK", "true").lower() == "true"
+)  # compare quantized embeddings to torch embeddings on startup, falls back to torch if they differ
+MODEL_SERVER_ONNX_PARITY_THRESHOLD = float(
+    os.getenv("MODEL_SERVER_ONNX_PARITY_THRESHOLD", "0.98")
+)  # min cosine similarity between quantized and torch embeddings to pass the parity check
 MODEL_SERVER_ALLOW_USE_GPU = os.getenv("MODEL_SERVER_ALLOW_USE_GPU", "true").lower() == "true"
 MODEL_SERVER_GPU_MAX_BATCH_SIZE = int(
     os.getenv("MODEL_SERVER_GPU_MAX_BATCH_SIZE", "16")
@@ -49,6 +77,24 @@ MODEL_SERVER_GPU_MAX_BATCH_SIZE = int(
 MODEL_SERVER_GPU_BATCH_WAIT_MS = int(
     os.getenv("MODEL_SERVER_GPU_BATCH_WAIT_MS", "10")
 )  # ms to wait after receiving first request to collect a bigger batch for higher GPU throughput
+MODEL_SERVER_CPU_MAX_BATCH_TOKENS = int(
+    os.getenv("MODEL_SERVER_CPU_MAX_BATCH_TOKENS", "8192")
+)  # stop collecting requests into a CPU batch once it has this many tokens
+MODEL_SERVER_CPU_MAX_BATCH_SIZE = int(
+    os.getenv("MODEL_SERVER_CPU_MAX_BATCH_SIZE", "32")
+)  # max texts per forward pass on the CPU, texts are bucketed by length to reduce padding
+MODEL_SERVER_CPU_BATCH_WAIT_MS = int(
+    os.getenv("MODEL_SERVER_CPU_BATCH_WAIT_MS", "10")
+)  # ms to wait after receiving first request to collect a bigger batch for higher CPU throughput
+MODEL_SERVER_CPU_INFERENCE_THREADS = int(
+    os.getenv("MODEL_SERVER_CPU_INFERENCE_THREADS", "2")
+)  # number of CPU batches embedded concurrently
+MODEL_SERVER_CPU_TORCH_THREADS = int(
+    os.getenv(
+        "MODEL_SERVER_CPU_TORCH_THREADS",
+        str(max(1, (os.cpu_count() or 1) // MODEL_SERVER_CPU_INFERENCE_THREADS)),
+    )
+)  # torch/onnxruntime intra-op threads, shared by all inference threads
 
 
 ### MCP Server Configs
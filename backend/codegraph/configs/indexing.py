@@ -9,15 +9,59 @@ EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "jinaai/jina-embeddings-v2-base-c
 INDEXING_CHUNK_SIZE = int(os.getenv("INDEXING_CHUNK_SIZE", "512"))
 INDEXING_CHUNK_OVERLAP = int(os.getenv("INDEXING_CHUNK_OVERLAP", "0"))
 
+INDEXING_USE_LOCAL_TOKENIZER = (
+    os.getenv("INDEXING_USE_LOCAL_TOKENIZER", "true").lower() == "true"
+)  # count tokens in-process instead of through the model server
+INDEXING_TOKEN_COUNT_CACHE_SIZE = int(os.getenv("INDEXING_TOKEN_COUNT_CACHE_SIZE", "100000"))
+
 _EMBEDDING_SPACE = os.getenv("EMBEDDING_SPACE", "cosine")
 if not _EMBEDDING_SPACE in get_args(Space):
     raise EnvironmentError(f"EMBEDDING_SPACE must be one of: {get_args(Space)}")
 EMBEDDING_SPACE = cast(Space, _EMBEDDING_SPACE)
 
+EMBEDDING_CACHE_SIZE = int(
+    os.getenv("EMBEDDING_CACHE_SIZE", "50000")
+)  # max number of embeddings cached in-process, on top of the Redis cache
+EMBEDDING_CACHE_TTL = int(os.getenv("EMBEDDING_CACHE_TTL", str(7 * 24 * 60 * 60)))  # seconds
+
 NUM_RETRIEVED_CHUNKS = int(os.getenv("NUM_RETRIEVED_CHUNKS", "10"))
 
 MAX_INDEXING_WORKERS = int(os.getenv("MAX_INDEXING_WORKERS", "40"))
-INDEXING_BATCH_SIZE = int(os.getenv("INDEXING_BATCH_SIZE", MAX_INDEXING_WORKERS))
+INDEXING_BATCH_SIZE = int(
+    os.getenv("INDEXING_BATCH_SIZE", MAX_INDEXING_WORKERS)
+)  # max files queued for indexing at once, files are queued as soon as their next step is ready
+INDEXING_PARSE_PROCESSES = int(
+    os.getenv("INDEXING_PARSE_PROCESSES", "0")
+)  # parse files in this many processes instead of the indexing threads, 0 to disable
+INDEXING_DISTRIBUTED = (
+    os.getenv("INDEXING_DISTRIBUTED", "false").lower() == "true"
+)  # split indexing of a project into subtasks run by any indexing worker, instead of just one
+INDEXING_DISTRIBUTED_BATCH_SIZE = int(
+    os.getenv("INDEXING_DISTRIBUTED_BATCH_SIZE", "100")
+)  # files per indexing subtask
+INDEXING_VECTOR_BATCH_CHUNKS = int(
+    os.getenv("INDEXING_VECTOR_BATCH_CHUNKS", "256")
+)  # chunks of many files are embedded and written to the index together, up to this many
+INDEXING_VECTOR_BATCH_WAIT_MS = int(
+    os.getenv("INDEXING_VECTOR_BATCH_WAIT_MS", "50")
+)  # or once the first chunks waited this long
+INDEXING_PARSE_CACHE_SIZE_MB = int(
+    os.getenv("INDEXING_PARSE_CACHE_SIZE_MB", "512")
+)  # estimated memory of file texts and parsed trees reused between the steps of an indexing run
+
+INDEXING_WATCH_DEBOUNCE_MS = int(
+    os.getenv("INDEXING_WATCH_DEBOUNCE_MS", "500")
+)  # changed paths are sent for indexing once no more changes happen for this long
+INDEXING_WATCH_MAX_DELAY_MS = int(
+    os.getenv("INDEXING_WATCH_MAX_DELAY_MS", "5000")
+)  # unless changes keep happening for this long since the first change
+INDEXING_WATCH_REFRESH_INTERVAL = int(
+    os.getenv("INDEXING_WATCH_REFRESH_INTERVAL", "30")
+)  # seconds between checking for created or deleted projects to watch
+
+INDEXING_USE_GIT = (
+    os.getenv("INDEXING_USE_GIT", "true").lower() == "true"
+)  # find changed files of git repositories with git instead of walking them, and skip ignored files
 
 MAX_INDEXING_FILE_SIZE_MB = int(os.getenv("MAX_INDEXING_FILE_SIZE_MB", "10"))
 DIRECTORY_SKIP_INDEXING_PATTERN = os.getenv(
@@ -48,6 +48,9 @@ class Project(Base):
     name: Mapped[str] = mapped_column(String)
     root_path: Mapped[str] = mapped_column(String)
     languages: Mapped[list[Language]] = mapped_column(ARRAY(String), default=[])
+    last_indexed_git_tree: Mapped[str | None] = mapped_column(
+        String
+    )  # git tree of the working tree when last indexed, None if not in a git repository
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
 
@@ -87,6 +90,7 @@ class File(Base):
     language: Mapped[Language | None] = mapped_column(String)
     indexing_step: Mapped[IndexingStep] = mapped_column(String)
     chunks: Mapped[int] = mapped_column(Integer, default=0)
+    content_hash: Mapped[str | None] = mapped_column(String)  # None for directories
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     last_indexed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
@@ -1,18 +1,25 @@
 import re
 from pathlib import Path
+from typing import cast
 from uuid import UUID
 
 from chonkie import CodeChunker, SentenceChunker
 from chonkie.chunker.base import BaseChunker
+from chonkie.tokenizer import Tokenizer
 from chonkie.types.base import Chunk as ChonkieChunk
 from chonkie.types.code import CodeChunk as ChonkieCodeChunk
 from sqlalchemy import select
 from sqlalchemy.orm import Session
+from tree_sitter import Tree
+from tree_sitter_language_pack import get_parser
 
 from codegraph.configs.indexing import INDEXING_CHUNK_OVERLAP, INDEXING_CHUNK_SIZE
 from codegraph.db.models import File, Node
-from codegraph.graph.models import Chunk
-from codegraph.model_service.client import count_tokens
+from codegraph.graph.indexing.chunking.token_counter import TokenCounter
+from codegraph.graph.indexing.metrics import measure_stage, record
+from codegraph.graph.indexing.parse_cache import ParseCache
+from codegraph.graph.indexing.parsing.tree_sitter_parser import parse_syntax_tree
+from codegraph.graph.models import Chunk, IndexingStage, Language
 from codegraph.utils.logging import get_logger
 
 logger = get_logger()
@@ -22,35 +29,59 @@ class Chunker:
     """A thread-safe class that chunks text/code into smaller pieces for indexing."""
 
     def __init__(
-        self, chunk_size: int = INDEXING_CHUNK_SIZE, chunk_overlap: int = INDEXING_CHUNK_OVERLAP
+        self,
+        chunk_size: int = INDEXING_CHUNK_SIZE,
+        chunk_overlap: int = INDEXING_CHUNK_OVERLAP,
+        parse_cache: ParseCache | None = None,
     ):
+        """If a `parse_cache` is given, files are read and parsed through it, so that their text
+        and tree-sitter tree are shared with the other indexing steps of the run.
+        """
         self._chunk_size = chunk_size
         self._chunk_overlap = chunk_overlap
+        self._parse_cache = parse_cache
+        self._token_counter = TokenCounter()
 
     def chunk(self, file: File, session: Session) -> list[Chunk]:
         """Chunks a file content into smaller pieces. Will attempt to preserve code & sentence
         structure. If the file is a code file, it will also find the corresponding codegraph nodes
         referenced in the chunk.
         """
+        with measure_stage(IndexingStage.CHUNKING):
+            chunks = self._chunk(file, session)
+            record(chunks=len(chunks), tokens=sum(chunk.token_count for chunk in chunks))
+            return chunks
+
+    def _chunk(self, file: File, session: Session) -> list[Chunk]:
         filepath = Path(file.path)
         language = file.language
         assert filepath.is_file()
 
-        file_text = filepath.read_text(encoding="utf-8")
+        if self._parse_cache is not None:
+            file_text = self._parse_cache.read_text(filepath)
+        else:
+            file_text = filepath.read_text(encoding="utf-8")
+        record(bytes=len(file_text.encode("utf-8")))
 
         if language is None:
             chunker: BaseChunker = SentenceChunker(
-                tokenizer_or_token_counter=count_tokens,
+                tokenizer_or_token_counter=self._token_counter,
                 chunk_size=self._chunk_size,
                 chunk_overlap=self._chunk_overlap,
             )
         else:
             chunker = CodeChunker(
-                tokenizer_or_token_counter=count_tokens,
+                tokenizer_or_token_counter=self._token_counter,
                 chunk_size=self._chunk_size,
                 language=language,
                 include_nodes=True,
             )
+            if self._parse_cache is not None:
+                chunker.parser = _CachedTreeParser(filepath, language, self._parse_cache, file_text)
+
+        # chonkie wraps callables to count one text at a time, use our counter directly so that
+        # batched counts (e.g. all sentences of a file) are made in a single call
+        chunker.tokenizer = cast(Tokenizer, self._token_counter)
 
         chunks = chunker.chunk(file_text)
         return [
@@ -92,3 +123,23 @@ class Chunker:
             .scalars()
             .all()
         )
+
+
+class _CachedTreeParser:
+    """Stands in for the tree-sitter parser of chonkie's `CodeChunker`, returning the tree of the
+    chunked file text from the parse cache.
+    """
+
+    def __init__(
+        self, filepath: Path, language: Language, parse_cache: ParseCache, file_text: str
+    ) -> None:
+        self._filepath = filepath
+        self._language = language
+        self._parse_cache = parse_cache
+        self._file_text = file_text
+
+    def parse(self, text: bytes) -> Tree:
+        # chonkie slices the text by the tree's byte offsets, so the tree must be of this text
+        if len(text) != len(self._file_text.encode("utf-8")):
+            return get_parser(self._language.value).parse(text)
+        return parse_syntax_tree(self._filepath, self._language, self._parse_cache, self._file_text)
@@ -0,0 +1,99 @@
+from hashlib import blake2b
+from threading import Lock
+from typing import Any, Sequence
+
+from transformers import AutoTokenizer
+
+from codegraph.configs.indexing import (
+    EMBEDDING_MODEL,
+    INDEXING_TOKEN_COUNT_CACHE_SIZE,
+    INDEXING_USE_LOCAL_TOKENIZER,
+)
+from codegraph.graph.indexing.metrics import measure_stage, record
+from codegraph.graph.models import IndexingStage
+from codegraph.model_service.client import count_tokens, count_tokens_batch
+from codegraph.utils.logging import get_logger
+from codegraph.utils.lru_cache import LRUCache
+
+logger = get_logger()
+
+
+class TokenCounter:
+    """A thread-safe token counter which memoizes token counts by text hash. Counts tokens either
+    in-process with the embedding model's tokenizer, or through the model server. Both give the
+    same counts (special tokens included, empty text has 0 tokens).
+
+    Implements the `count_tokens` and `count_tokens_batch` interface of chonkie's `Tokenizer`.
+    """
+
+    _tokenizer: Any = None
+    _tokenizer_lock = Lock()
+    _cache: LRUCache[bytes, int] = LRUCache(INDEXING_TOKEN_COUNT_CACHE_SIZE)
+
+    def __init__(self, use_local_tokenizer: bool = INDEXING_USE_LOCAL_TOKENIZER) -> None:
+        self._use_local_tokenizer = use_local_tokenizer
+        if use_local_tokenizer:
+            self._load_tokenizer()
+
+    def __call__(self, text: str) -> int:
+        return self.count_tokens(text)
+
+    def count_tokens(self, text: str) -> int:
+        """Returns the token count of `text`."""
+        return self.count_tokens_batch([text])[0]
+
+    def count_tokens_batch(self, texts: Sequence[str]) -> list[int]:
+        """Returns the token count of each text. Only texts not in the cache are tokenized, all in
+        one batch.
+        """
+        keys = [_get_text_key(text) for text in texts]
+        token_counts = [self._cache.get(key) for key in keys]
+
+        missing = [i for i, token_count in enumerate(token_counts) if token_count is None]
+        if missing:
+            with measure_stage(IndexingStage.TOKEN_COUNTING):
+                missing_counts = self._count_tokens_uncached([texts[i] for i in missing])
+            for i, token_count in zip(missing, missing_counts):
+                token_counts[i] = token_count
+                self._cache.put(keys[i], token_count)
+
+        return [token_count or 0 for token_count in token_counts]
+
+    def _count_tokens_uncached(self, texts: list[str]) -> list[int]:
+        if not self._use_local_tokenizer:
+            record(model_calls=1)
+            if len(texts) == 1:
+                return [count_tokens(texts[0])]
+            return count_tokens_batch(texts)
+
+        nonempty_texts = [text for text in texts if text]
+        if not nonempty_texts:
+            return [0] * len(texts)
+
+        # fast tokenizers may raise "Already borrowed" when used concurrently
+        with self._tokenizer_lock:
+            encodings = self._tokenizer(nonempty_texts)
+
+        token_counts = iter(len(input_ids) for input_ids in encodings["input_ids"])
+        return [next(token_counts) if text else 0 for text in texts]
+
+    @classmethod
+    def _load_tokenizer(cls) -> None:
+        """Loads the embedding model's tokenizer once per process, from local cache if possible."""
+        with cls._tokenizer_lock:
+            if cls._tokenizer is not None:
+                return
+
+            logger.info(f"Loading tokenizer for {EMBEDDING_MODEL}")
+            try:
+                cls._tokenizer = AutoTokenizer.from_pretrained(  # type: ignore[no-untyped-call]
+                    EMBEDDING_MODEL, trust_remote_code=True, local_files_only=True
+                )
+            except OSError:
+                cls._tokenizer = AutoTokenizer.from_pretrained(  # type: ignore[no-untyped-call]
+                    EMBEDDING_MODEL, trust_remote_code=True
+                )
+
+
+def _get_text_key(text: str) -> bytes:
+    return blake2b(text.encode("utf-8"), digest_size=16).digest()
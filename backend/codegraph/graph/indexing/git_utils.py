@@ -0,0 +1,132 @@
+import os
+import shutil
+import subprocess
+import tempfile
+from collections.abc import Iterable
+from pathlib import Path
+
+from codegraph.utils.logging import get_logger
+
+logger = get_logger()
+
+_GIT_TIMEOUT = 60  # seconds
+
+
+def _run_git(
+    args: list[str], cwd: Path, input: str | None = None, env: dict[str, str] | None = None
+) -> str | None:
+    """Runs a git command, and returns its output, or `None` if it failed."""
+    if shutil.which("git") is None:
+        return None
+
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            cwd=cwd,
+            input=input,
+            env=env,
+            capture_output=True,
+            text=True,
+            errors="surrogateescape",
+            timeout=_GIT_TIMEOUT,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.debug(f"git {args[0]} failed in {cwd}: {e}")
+        return None
+
+    if result.returncode != 0:
+        logger.debug(f"git {args[0]} failed in {cwd}: {result.stderr.strip()}")
+        return None
+    return result.stdout
+
+
+def _split_paths(output: str, project_root: Path) -> list[str]:
+    """Splits NUL separated paths relative to the project root into absolute paths."""
+    return [(project_root / path).as_posix() for path in output.split("\0") if path]
+
+
+def snapshot_worktree(project_root: Path, filetypes: Iterable[str]) -> str | None:
+    """Writes the files of the given types in the working tree of the project, including untracked
+    but not ignored files, as a git tree, and returns its hash. Returns `None` if the project is
+    not in a git repository.
+
+    A copy of the repository's index is updated with the changed files, so only files whose stats
+    changed since last staged are read, and the repository's index, refs, and working tree are left
+    untouched. Only the blobs of changed files are added to the repository's objects.
+    """
+    index_path = _run_git(
+        ["rev-parse", "--path-format=absolute", "--git-path", "index"], project_root
+    )
+    if index_path is None:
+        return None
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_index_path = os.path.join(tmp_dir, "index")
+        if os.path.exists(index_path.strip()):
+            shutil.copyfile(index_path.strip(), tmp_index_path)
+        env = {**os.environ, "GIT_INDEX_FILE": tmp_index_path}
+
+        pathspecs = [f"*{filetype}" for filetype in sorted(filetypes)]
+        changed_paths = _run_git(
+            ["ls-files", "--others", "--modified", "--deleted", "--exclude-standard", "-z"]
+            + ["--", *pathspecs],
+            project_root,
+            env=env,
+        )
+        if changed_paths is None:
+            return None
+        if changed_paths and (
+            _run_git(
+                ["update-index", "--add", "--remove", "-z", "--stdin"],
+                project_root,
+                input=changed_paths,
+                env=env,
+            )
+            is None
+        ):
+            return None
+        tree = _run_git(["write-tree"], project_root, env=env)
+
+    return None if tree is None else tree.strip()
+
+
+def get_changed_paths(project_root: Path, old_tree: str, new_tree: str) -> list[str] | None:
+    """Returns the absolute paths which were added, modified, or deleted in the project between two
+    snapshots. Returns `None` if they can't be compared, e.g., if the old snapshot was pruned.
+    """
+    output = _run_git(
+        ["diff", "--name-only", "--no-renames", "--relative", "-z", old_tree, new_tree, "--", "."],
+        project_root,
+    )
+    return None if output is None else _split_paths(output, project_root)
+
+
+def get_ignored_paths(project_root: Path) -> set[str]:
+    """Returns the absolute paths of the untracked files and directories ignored by git in the
+    project. Ignored directories are not listed into. Returns nothing if not in a git repository.
+    """
+    output = _run_git(
+        ["ls-files", "--others", "--ignored", "--exclude-standard", "--directory", "-z"],
+        project_root,
+    )
+    if output is None:
+        return set()
+    return {path.rstrip("/") for path in _split_paths(output, project_root)}
+
+
+def filter_ignored_paths(project_root: Path, paths: list[str]) -> list[str]:
+    """Returns the absolute paths which aren't ignored by git, either directly or through one of
+    their directories. Returns all paths if not in a git repository.
+    """
+    if not paths:
+        return paths
+
+    relative_paths = [os.path.relpath(path, project_root) for path in paths]
+    output = _run_git(
+        ["check-ignore", "--stdin", "-z"], project_root, input="\0".join(relative_paths) + "\0"
+    )
+    if output is None:
+        return paths  # also fails if no paths are ignored
+
+    ignored_paths = set(_split_paths(output, project_root))
+    return [path for path in paths if path not in ignored_paths]
@@ -0,0 +1,199 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from datetime import timedelta
+from threading import Lock
+from time import monotonic, perf_counter
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from codegraph.graph.models import IndexingStage, StageMetrics
+from codegraph.utils.logging import get_logger
+
+logger = get_logger()
+
+# the metrics collected in this context, and the innermost stage being measured
+_current_metrics: ContextVar["IndexingMetrics | None"] = ContextVar("current_metrics", default=None)
+_current_stage: ContextVar[IndexingStage | None] = ContextVar("current_stage", default=None)
+
+
+@dataclass
+class _StageCounters:
+    started_at: float
+    ended_at: float
+    busy_time: float = 0.0
+    files: int = 0
+    chunks: int = 0
+    bytes: int = 0
+    tokens: int = 0
+    db_queries: int = 0
+    model_calls: int = 0
+    file_latencies: list[float] = field(default_factory=list)
+
+
+_SUMMED_FIELDS = ("busy_time", "files", "chunks", "bytes", "tokens", "db_queries", "model_calls")
+
+
+class IndexingMetrics:
+    """A thread-safe collector of the time spent and work done in each stage of an indexing run.
+
+    Metrics are collected in the threads which `activate` them, by the components running in them
+    through `measure_stage` and `record`, which do nothing if no metrics are active. Database
+    queries and model server calls are attributed to the innermost stage being measured, so stages
+    nested in another (e.g., embedding in the vector store) are also counted in the outer one.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._stages: dict[IndexingStage, _StageCounters] = {}
+
+    def __getstate__(self) -> dict[str, Any]:
+        # sent back from parsing processes without the lock
+        with self._lock:
+            return {"_stages": self._stages}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self._lock = Lock()
+        self._stages = state["_stages"]
+
+    @contextmanager
+    def activate(self) -> Iterator["IndexingMetrics"]:
+        """Collects the metrics of the current thread (or context) into these metrics."""
+        token = _current_metrics.set(self)
+        try:
+            yield self
+        finally:
+            _current_metrics.reset(token)
+
+    def add(
+        self,
+        stage: IndexingStage,
+        counts: dict[str, int] | None = None,
+        *,
+        started_at: float | None = None,
+        duration: float | None = None,
+        is_file: bool = False,
+    ) -> None:
+        """Adds the duration of a measured block (started at `started_at`) and counts to a stage.
+        The duration of `is_file` blocks is also tracked as the latency of a file.
+        """
+        now = monotonic()
+        with self._lock:
+            counters = self._stages.get(stage)
+            if counters is None:
+                counters = self._stages[stage] = _StageCounters(started_at or now, now)
+            if started_at is not None:
+                counters.started_at = min(counters.started_at, started_at)
+            counters.ended_at = max(counters.ended_at, now)
+
+            if duration is not None:
+                counters.busy_time += duration
+                if is_file:
+                    counters.files += 1
+                    counters.file_latencies.append(duration)
+            for name, count in (counts or {}).items():
+                setattr(counters, name, getattr(counters, name) + count)
+
+    def merge(self, other: "IndexingMetrics") -> None:
+        """Adds the metrics collected in `other` (e.g., in another process) to these metrics."""
+        with other._lock:
+            other_stages = {
+                stage: replace(counters, file_latencies=counters.file_latencies.copy())
+                for stage, counters in other._stages.items()
+            }
+
+        # the monotonic clock is shared by the processes of a machine, so their start and end times
+        # can be compared
+        with self._lock:
+            for stage, other_counters in other_stages.items():
+                counters = self._stages.get(stage)
+                if counters is None:
+                    self._stages[stage] = other_counters
+                    continue
+                counters.started_at = min(counters.started_at, other_counters.started_at)
+                counters.ended_at = max(counters.ended_at, other_counters.ended_at)
+                for name in _SUMMED_FIELDS:
+                    setattr(counters, name, getattr(counters, name) + getattr(other_counters, name))
+                counters.file_latencies.extend(other_counters.file_latencies)
+
+    def get_stages(self) -> dict[IndexingStage, StageMetrics]:
+        """Returns the metrics of each stage measured so far."""
+        with self._lock:
+            return {
+                stage: StageMetrics(
+                    wall_time=timedelta(seconds=counters.ended_at - counters.started_at),
+                    busy_time=timedelta(seconds=counters.busy_time),
+                    files=counters.files,
+                    chunks=counters.chunks,
+                    bytes=counters.bytes,
+                    tokens=counters.tokens,
+                    db_queries=counters.db_queries,
+                    model_calls=counters.model_calls,
+                    p50_file_latency=_get_percentile(counters.file_latencies, 0.5),
+                    p95_file_latency=_get_percentile(counters.file_latencies, 0.95),
+                )
+                for stage, counters in self._stages.items()
+            }
+
+
+@contextmanager
+def measure_stage(stage: IndexingStage, is_file: bool = False) -> Iterator[None]:
+    """Measures a block as part of a stage of the active metrics. If `is_file`, the block is the
+    processing of a single file, which is counted and whose latency is tracked.
+    """
+    metrics = _current_metrics.get()
+    if metrics is None:
+        yield
+        return
+
+    token = _current_stage.set(stage)
+    started_at = monotonic()
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        _current_stage.reset(token)
+        metrics.add(stage, started_at=started_at, duration=perf_counter() - start, is_file=is_file)
+
+
+def record(**counts: int) -> None:
+    """Adds counts (e.g., `chunks`, `bytes`, `tokens`, `model_calls`) to the innermost stage being
+    measured, if any.
+    """
+    metrics = _current_metrics.get()
+    stage = _current_stage.get()
+    if metrics is not None and stage is not None:
+        metrics.add(stage, counts)
+
+
+def log_stage_metrics(prefix: str, stages: dict[IndexingStage, StageMetrics]) -> None:
+    """Logs the metrics of each stage, e.g., at the end of an indexing task."""
+    for stage, metrics in stages.items():
+        latencies = ""
+        if metrics.p50_file_latency is not None and metrics.p95_file_latency is not None:
+            latencies = (
+                f", p50 {metrics.p50_file_latency.total_seconds() * 1000:.1f}ms"
+                f", p95 {metrics.p95_file_latency.total_seconds() * 1000:.1f}ms per file"
+            )
+        logger.info(
+            f"{prefix}: {stage.value} took {metrics.wall_time.total_seconds():.2f}s "
+            f"(busy {metrics.busy_time.total_seconds():.2f}s), {metrics.files} files, "
+            f"{metrics.chunks} chunks, {metrics.bytes} bytes, {metrics.tokens} tokens, "
+            f"{metrics.db_queries} db queries, {metrics.model_calls} model calls{latencies}"
+        )
+
+
+def _get_percentile(values: list[float], q: float) -> timedelta | None:
+    """Returns the nearest-rank `q` quantile of the values in seconds, or `None` if empty."""
+    if not values:
+        return None
+    values = sorted(values)
+    return timedelta(seconds=values[min(len(values) - 1, int(q * len(values)))])
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_db_query(*args: Any) -> None:
+    record(db_queries=1)
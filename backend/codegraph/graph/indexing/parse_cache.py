@@ -0,0 +1,76 @@
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+from codegraph.configs.indexing import INDEXING_PARSE_CACHE_SIZE_MB
+from codegraph.utils.logging import get_logger
+from codegraph.utils.lru_cache import LRUCache
+
+logger = get_logger()
+
+TreeType = TypeVar("TreeType")
+
+
+class ParseCache:
+    """A thread-safe cache of file texts and parsed trees, shared by the indexing steps of a run so
+    that each file is read and parsed once. Bounded by the estimated memory of its entries (texts
+    are sized by their utf-8 encoded bytes), with least-recently-used eviction. Entries are keyed
+    by the file's modification time, so a file that changes during the run is read again.
+    """
+
+    def __init__(self, max_bytes: int = INDEXING_PARSE_CACHE_SIZE_MB * 1024 * 1024) -> None:
+        self._cache: LRUCache[tuple[str, int, str], Any] = LRUCache(max_bytes)
+
+    def read_text(self, filepath: Path) -> str:
+        """Returns the utf-8 text of a file."""
+        key = self._get_key(filepath, "text")
+        text = self._cache.get(key)
+        if text is None:
+            text = filepath.read_text(encoding="utf-8")
+            self._cache.put(key, text, size=_get_size(text))
+        return text
+
+    def parse(
+        self,
+        filepath: Path,
+        kind: str,
+        parse_fn: Callable[[str], TreeType],
+        size_factor: int,
+        text: str | None = None,
+    ) -> TreeType:
+        """Returns the tree of a file parsed by `parse_fn`, which is cached under `kind`. The size
+        of the tree is estimated as `size_factor` times the size in bytes of the file's text.
+        Exceptions raised by `parse_fn` are not cached.
+
+        If the caller already read the file's `text` (e.g., through `read_text`), the tree is of
+        that text: a cached tree is only returned if it was parsed from the same text, so that
+        positions in the tree match the text even if the file changed in between.
+        """
+        key = self._get_key(filepath, kind)
+        entry: tuple[str, TreeType] | None = self._cache.get(key)
+        if entry is not None:
+            tree_text, tree = entry
+            if text is None or tree_text is text or tree_text == text:
+                return tree
+
+        if text is None:
+            text = self.read_text(filepath)
+        tree = parse_fn(text)
+        self._cache.put(key, (text, tree), size=_get_size(text) * size_factor)
+        return tree
+
+    def log_stats(self) -> None:
+        """Logs the hit rate and size of the cache."""
+        total = self._cache.hits + self._cache.misses
+        hit_rate = self._cache.hits / total if total else 0.0
+        logger.info(
+            f"Parse cache: {self._cache.hits} hits, {self._cache.misses} misses "
+            f"(hit rate {hit_rate:.1%}), {self._cache.size / 1024 / 1024:.1f} MB cached"
+        )
+
+    @staticmethod
+    def _get_key(filepath: Path, kind: str) -> tuple[str, int, str]:
+        return (filepath.as_posix(), filepath.stat().st_mtime_ns, kind)
+
+
+def _get_size(text: str) -> int:
+    return len(text.encode("utf-8"))
@@ -1,35 +1,75 @@
+import uuid
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import ClassVar
+from typing import Any, ClassVar
+from uuid import UUID
 
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from sqlalchemy.sql.expression import func
 
 from codegraph.db.models import Alias, File, Node, Node__Reference
+from codegraph.graph.indexing.parse_cache import ParseCache
+from codegraph.graph.indexing.parsing.symbol_table import SymbolTable
 from codegraph.graph.models import Language, NodeType
 
+# buffered node, alias, and reference rows of a parser, as plain data that can be sent between
+# processes
+ParsedRows = tuple[list[dict[str, Any]], list[dict[str, Any]], list[dict[str, Any]]]
+
 
 class BaseParser(ABC):
     """A base class for all parsers. A new parser is created for every file."""
 
     _LANGUAGE: ClassVar[Language | None] = None
 
-    def __init__(self, project_id: int, project_root: Path, filepath: Path, session: Session):
+    def __init__(
+        self,
+        project_id: int,
+        project_root: Path,
+        filepath: Path,
+        session: Session | None,
+        symbol_table: SymbolTable | None = None,
+        file_id: UUID | None = None,
+        parse_cache: ParseCache | None = None,
+    ):
         """Initializes the parser. `filepath` is absolute. `session` is unique to this parser.
-        Either `extract_definitions` or `extract_references` will run exactly once per parser. The
-        given `session` should not be committed.
+        Either `extract_definitions` or `extract_references` will run exactly once per parser,
+        followed by `flush`. The given `session` should not be committed. If a `symbol_table` is
+        given, qualifiers are resolved in memory instead of through the database.
+
+        Without a `session` the parser is detached from the database (e.g., to parse in another
+        process), so the `file_id` and, to extract references, the `symbol_table` must be given.
+        Its rows are then taken with `take_rows` and written with `write_rows`, instead of `flush`.
+
+        If a `parse_cache` is given, the file is read and parsed through it, so that its text and
+        trees are shared with the other indexing steps of the run.
         """
         assert filepath.is_file()
+        assert session is not None or file_id is not None
 
         self._project_id = project_id
         self._project_root = project_root
         self._filepath = filepath
         self._session = session
-        self._file = (
-            session.query(File)
-            .filter(File.project_id == self._project_id, File.path == filepath.as_posix())
-            .one()
-        )
+        self._symbol_table = symbol_table
+        self._parse_cache = parse_cache
+        if file_id is None:
+            assert session is not None
+            file_id = (
+                session.query(File.id)
+                .filter(File.project_id == self._project_id, File.path == filepath.as_posix())
+                .one()
+                .id
+            )
+        self._file_id = file_id
+
+        # rows are buffered and written in bulk by `flush`
+        self._buffered_nodes: dict[str, Node] = {}
+        self._buffered_node_rows: list[dict[str, Any]] = []
+        self._buffered_alias_rows: list[dict[str, Any]] = []
+        self._buffered_reference_rows: list[dict[str, Any]] = []
 
     @abstractmethod
     def extract_definitions(self) -> None:
@@ -44,8 +84,47 @@ class BaseParser(ABC):
         runs for all files in the project.
         """
 
+    def flush(self) -> None:
+        """Writes all buffered `Node`s, `Alias`es, and `Node__Reference`s to the database in bulk.
+        Does not commit the session.
+        """
+        assert self._session is not None
+        self.write_rows(self._session, self.take_rows())
+
+    def take_rows(self) -> ParsedRows:
+        """Returns and clears all buffered node, alias, and reference rows."""
+        rows = (
+            self._buffered_node_rows,
+            self._buffered_alias_rows,
+            self._buffered_reference_rows,
+        )
+        self._buffered_nodes = {}
+        self._buffered_node_rows = []
+        self._buffered_alias_rows = []
+        self._buffered_reference_rows = []
+        return rows
+
+    @staticmethod
+    def write_rows(session: Session, rows: ParsedRows) -> None:
+        """Writes rows taken from a parser to the database in bulk. Does not commit the session."""
+        node_rows, alias_rows, reference_rows = rows
+
+        # nodes must be written first as references depend on them
+        if node_rows:
+            session.execute(insert(Node), node_rows)
+        if alias_rows:
+            session.execute(insert(Alias), alias_rows)
+        if reference_rows:
+            # a usage can coincide with a definition reference (e.g., `def f(): ...; f()`)
+            session.execute(pg_insert(Node__Reference).on_conflict_do_nothing(), reference_rows)
+
     def _find_node(self, global_qualifier: str) -> Node | None:
-        """Finds a `Node` object in the database."""
+        """Finds a `Node` object in the buffer, symbol table, or database."""
+        if (buffered_node := self._buffered_nodes.get(global_qualifier)) is not None:
+            return buffered_node
+        if self._symbol_table is not None:
+            return self._symbol_table.find_node(global_qualifier)
+        assert self._session is not None
         return (
             self._session.query(Node)
             .filter(Node.project_id == self._project_id, Node.global_qualifier == global_qualifier)
@@ -55,48 +134,58 @@ class BaseParser(ABC):
     def _create_node(
         self, name: str, global_qualifier: str, definition: str | None, node_type: NodeType
     ) -> Node:
-        """Creates a `Node` object and adds it to the database. Does not commit the session."""
-        db_node = Node(
-            name=name,
-            global_qualifier=global_qualifier,
-            definition=definition,
-            type=node_type,
-            file_id=self._file.id,
-            project_id=self._project_id,
-        )
-        self._session.add(db_node)
-        self._session.flush()
+        """Creates a `Node` object and buffers it to be added to the database on `flush`. The
+        returned `Node` is not attached to the session.
+        """
+        row = {
+            "id": uuid.uuid4(),
+            "name": name,
+            "global_qualifier": global_qualifier,
+            "definition": definition,
+            "type": node_type,
+            "file_id": self._file_id,
+            "project_id": self._project_id,
+        }
+        db_node = Node(**row)
+        self._buffered_nodes[global_qualifier] = db_node
+        self._buffered_node_rows.append(row)
         return db_node
 
     def _create_alias(self, local_qualifier: str, global_qualifier: str) -> Alias:
-        """Creates an `Alias` object and adds it to the database. Does not commit the session."""
-        db_alias = Alias(
-            local_qualifier=local_qualifier,
-            global_qualifier=global_qualifier,
-            project_id=self._project_id,
-            file_id=self._file.id,
-        )
-        self._session.add(db_alias)
-        self._session.flush()
-        return db_alias
+        """Creates an `Alias` object and buffers it to be added to the database on `flush`. The
+        returned `Alias` is not attached to the session.
+        """
+        row = {
+            "local_qualifier": local_qualifier,
+            "global_qualifier": global_qualifier,
+            "project_id": self._project_id,
+            "file_id": self._file_id,
+        }
+        self._buffered_alias_rows.append(row)
+        return Alias(**row)
 
     def _create_reference(
         self, source_node: Node, target_node: Node, line_number: int
     ) -> Node__Reference:
-        """Creates a `Node__Reference` object and adds it to the database. Does not commit the
-        session.
+        """Creates a `Node__Reference` object and buffers it to be added to the database on `flush`.
+        The returned `Node__Reference` is not attached to the session.
         """
-        db_reference = Node__Reference(
-            source_node_id=source_node.id, target_node_id=target_node.id, line_number=line_number
-        )
-        self._session.add(db_reference)
-        self._session.flush()
-        return db_reference
+        row = {
+            "source_node_id": source_node.id,
+            "target_node_id": target_node.id,
+            "line_number": line_number,
+        }
+        self._buffered_reference_rows.append(row)
+        return Node__Reference(**row)
 
     def _resolve_alias(self, local_qualifier: str) -> Node | None:
         """Recursively traverses the `Alias` tree to find the `Node` referenced by the
         `local_qualifier`. Returns `None` if the `local_qualifier` is not found.
         """
+        if self._symbol_table is not None:
+            return self._symbol_table.resolve(local_qualifier)
+
+        assert self._session is not None
         parts = local_qualifier.split(".")
 
         # search for partial or full alias match
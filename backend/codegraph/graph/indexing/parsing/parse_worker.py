@@ -0,0 +1,57 @@
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from uuid import UUID
+
+from codegraph.graph.indexing.metrics import IndexingMetrics
+from codegraph.graph.indexing.parsing.base_parser import BaseParser, ParsedRows
+from codegraph.graph.indexing.parsing.symbol_table import SymbolTable
+from codegraph.graph.models import IndexingStep
+
+# the symbol table of this parsing process, shared by all its reference extractions
+_symbol_table: SymbolTable | None = None
+
+
+def create_parse_executor(
+    max_workers: int, symbol_table: SymbolTable | None = None
+) -> ProcessPoolExecutor:
+    """Creates a pool of parsing processes, which parse files with `parse_file` without the GIL
+    serializing them. The `symbol_table` is sent to each process once, and is required to extract
+    references. Processes are spawned rather than forked, as the indexing process is multithreaded.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=mp.get_context("spawn"),
+        initializer=_init_parse_worker,
+        initargs=(symbol_table,),
+    )
+
+
+def parse_file(
+    parser_cls: type[BaseParser],
+    indexing_step: IndexingStep,
+    project_id: int,
+    project_root: Path,
+    filepath: Path,
+    file_id: UUID,
+) -> tuple[ParsedRows, IndexingMetrics]:
+    """Runs a parser detached from the database, and returns its rows to be written by the caller
+    with `BaseParser.write_rows`, along with the metrics of the parsing, to be merged into the
+    caller's metrics (as metrics don't reach across processes).
+    """
+    assert indexing_step in (IndexingStep.DEFINITIONS, IndexingStep.REFERENCES)
+
+    metrics = IndexingMetrics()
+    with metrics.activate():
+        parser = parser_cls(project_id, project_root, filepath, None, _symbol_table, file_id)
+        if indexing_step == IndexingStep.DEFINITIONS:
+            parser.extract_definitions()
+        else:
+            assert _symbol_table is not None
+            parser.extract_references()
+        return parser.take_rows(), metrics
+
+
+def _init_parse_worker(symbol_table: SymbolTable | None) -> None:
+    global _symbol_table
+    _symbol_table = symbol_table
@@ -1,25 +1,46 @@
 import ast
 from pathlib import Path
+from uuid import UUID
 
 from sqlalchemy.orm import Session
 
 from codegraph.db.models import Node
+from codegraph.graph.indexing.metrics import measure_stage, record
+from codegraph.graph.indexing.parse_cache import ParseCache
 from codegraph.graph.indexing.parsing.base_parser import BaseParser
-from codegraph.graph.models import Language, NodeType
+from codegraph.graph.indexing.parsing.symbol_table import SymbolTable
+from codegraph.graph.models import IndexingStage, Language, NodeType
 from codegraph.utils.logging import get_logger
 
 logger = get_logger()
 
+# python ASTs take up roughly 30 times the memory of their source text
+_AST_SIZE_FACTOR = 30
+
 
 class PythonParser(BaseParser):
     """A parser for Python files."""
 
     _LANGUAGE = Language.PYTHON
 
-    def __init__(self, project_id: int, project_root: Path, filepath: Path, session: Session):
-        super().__init__(project_id, project_root, filepath, session)
+    def __init__(
+        self,
+        project_id: int,
+        project_root: Path,
+        filepath: Path,
+        session: Session | None,
+        symbol_table: SymbolTable | None = None,
+        file_id: UUID | None = None,
+        parse_cache: ParseCache | None = None,
+    ):
+        super().__init__(
+            project_id, project_root, filepath, session, symbol_table, file_id, parse_cache
+        )
 
-        self._file_text = self._filepath.read_text(encoding="utf-8")
+        if parse_cache is not None:
+            self._file_text = parse_cache.read_text(self._filepath)
+        else:
+            self._file_text = self._filepath.read_text(encoding="utf-8")
 
         # get module name
         parts = self._filepath.relative_to(self._project_root).with_suffix("").parts
@@ -30,10 +51,8 @@ class PythonParser(BaseParser):
 
     def extract_definitions(self) -> None:
         # parse file
-        try:
-            tree = ast.parse(self._file_text, filename=str(self._filepath))
-        except SyntaxError:
-            logger.warning(f"Syntax error in {self._filepath}, skipping")
+        tree = self._parse()
+        if tree is None:
             return
 
         # create module node (could set definition to file_text if we want)
@@ -46,10 +65,8 @@ class PythonParser(BaseParser):
 
     def extract_references(self) -> None:
         # parse file
-        try:
-            tree = ast.parse(self._file_text, filename=str(self._filepath))
-        except SyntaxError:
-            logger.warning(f"Syntax error in {self._filepath}, skipping")
+        tree = self._parse()
+        if tree is None:
             return
 
         # get module node
@@ -57,8 +74,30 @@ class PythonParser(BaseParser):
         assert module_node is not None
         self._module_node = module_node
 
-        # create references
-        self._walk_extract_references(tree, self._module_name)
+        # create references, resolving names through the scopes enclosing them
+        self._created_references: set[tuple[UUID, UUID, int]] = set()
+        self._walk_extract_references(tree, module_node, [])
+
+    def _parse(self) -> ast.Module | None:
+        """Parses the file, or returns `None` if it has a syntax error."""
+        try:
+            if self._parse_cache is not None:
+                return self._parse_cache.parse(
+                    self._filepath,
+                    "python_ast",
+                    self._parse_text,
+                    _AST_SIZE_FACTOR,
+                    self._file_text,
+                )
+            return self._parse_text(self._file_text)
+        except SyntaxError:
+            logger.warning(f"Syntax error in {self._filepath}, skipping")
+            return None
+
+    def _parse_text(self, text: str) -> ast.Module:
+        with measure_stage(IndexingStage.PARSING):
+            record(bytes=len(text.encode("utf-8")))
+            return ast.parse(text, filename=str(self._filepath))
 
     # ------------------------- EXTRACT DEFINITIONS HELPERS ------------------------- #
 
@@ -109,7 +148,167 @@ class PythonParser(BaseParser):
 
     # ------------------------- EXTRACT REFERENCES HELPERS ------------------------- #
 
-    def _walk_extract_references(self, tree: ast.AST, parent_qualifier: str) -> None:
-        # TODO: create call, inheritance, type hinting, etc. references. A VERY difficult task.
-        # need to index every symbol so variables and attributes can be resolved
-        pass
+    def _walk_extract_references(
+        self, tree: ast.AST, source_node: Node, scopes: list["_Scope"]
+    ) -> None:
+        # handle class and function definitions
+        if isinstance(tree, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            parent_qualifier = scopes[-1].qualifier if scopes else self._module_name
+            node = self._find_node(f"{parent_qualifier}.{tree.name}")
+            if node is None:
+                return
+
+            # decorators, base classes, annotations, and defaults are evaluated in the enclosing
+            # scope, but are referenced by the defined node
+            outer_exprs: list[ast.expr | None] = [*tree.decorator_list]
+            if isinstance(tree, ast.ClassDef):
+                outer_exprs.extend(tree.bases)
+                outer_exprs.extend(keyword.value for keyword in tree.keywords)
+            else:
+                args = [*tree.args.posonlyargs, *tree.args.args, *tree.args.kwonlyargs]
+                args.extend(arg for arg in (tree.args.vararg, tree.args.kwarg) if arg is not None)
+                outer_exprs.extend(arg.annotation for arg in args)
+                outer_exprs.extend(tree.args.defaults)
+                outer_exprs.extend(tree.args.kw_defaults)
+                outer_exprs.append(tree.returns)
+            for expr in outer_exprs:
+                if expr is not None:
+                    self._walk_extract_references(expr, node, scopes)
+
+            # the body is evaluated in its own scope
+            scope = self._create_scope(tree, node.global_qualifier, scopes)
+            for child in tree.body:
+                self._walk_extract_references(child, node, [*scopes, scope])
+
+        # handle names and attribute chains, e.g., calls, attribute accesses, and type hints
+        elif isinstance(tree, (ast.Name, ast.Attribute)) and isinstance(tree.ctx, ast.Load):
+            parts = _get_dotted_parts(tree)
+            if parts is None:  # not a chain of names, e.g., `func().attr`
+                for child_node in ast.iter_child_nodes(tree):
+                    self._walk_extract_references(child_node, source_node, scopes)
+                return
+
+            target_node = self._resolve_name(parts, scopes)
+            if target_node is not None:
+                self._create_reference_once(source_node, target_node, tree.lineno)
+
+        # lambdas and comprehensions bind their own variables
+        elif isinstance(
+            tree, (ast.Lambda, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+        ):
+            parent_qualifier = scopes[-1].qualifier if scopes else self._module_name
+            scope = self._create_scope(tree, parent_qualifier, scopes)
+            for child_node in ast.iter_child_nodes(tree):
+                self._walk_extract_references(child_node, source_node, [*scopes, scope])
+
+        else:
+            for child_node in ast.iter_child_nodes(tree):
+                self._walk_extract_references(child_node, source_node, scopes)
+
+    def _create_scope(self, tree: ast.AST, qualifier: str, scopes: list["_Scope"]) -> "_Scope":
+        """Creates the scope of a definition, lambda, or comprehension, with the names bound in it.
+        Nested definitions refer to their `Node`, imports to their module level `Alias`, and other
+        names (e.g., local variables) to nothing.
+        """
+        scope = _Scope(qualifier, isinstance(tree, ast.ClassDef))
+
+        # parameters, with `self` or `cls` referring to the class a method is defined in
+        if isinstance(tree, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            args = [*tree.args.posonlyargs, *tree.args.args, *tree.args.kwonlyargs]
+            args.extend(arg for arg in (tree.args.vararg, tree.args.kwarg) if arg is not None)
+            for arg in args:
+                scope.names[arg.arg] = None
+
+            if (
+                not isinstance(tree, ast.Lambda)
+                and scopes
+                and scopes[-1].is_class
+                and args
+                and args[0].arg in ("self", "cls")
+            ):
+                scope.names[args[0].arg] = scopes[-1].qualifier
+
+        # names bound in the body, without descending into nested scopes
+        global_names: set[str] = set()
+        stack: list[ast.AST] = list(ast.iter_child_nodes(tree))
+        while stack:
+            child = stack.pop()
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                scope.names[child.name] = f"{qualifier}.{child.name}"
+                continue
+            if isinstance(child, (ast.Import, ast.ImportFrom)):
+                for alias in child.names:
+                    name = alias.asname or alias.name.split(".")[0]
+                    scope.names[name] = f"{self._module_name}.{name}"
+                continue
+            if isinstance(child, (ast.Global, ast.Nonlocal)):
+                global_names.update(child.names)
+            elif isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store):
+                scope.names.setdefault(child.id, None)
+            elif isinstance(child, ast.ExceptHandler) and child.name is not None:
+                scope.names.setdefault(child.name, None)
+            if not isinstance(child, (ast.Lambda, ast.expr_context)):
+                stack.extend(ast.iter_child_nodes(child))
+
+        for name in global_names:
+            scope.names.pop(name, None)
+        return scope
+
+    def _resolve_name(self, parts: list[str], scopes: list["_Scope"]) -> Node | None:
+        """Resolves the longest prefix of a chain of names (e.g., `module.Class.method`) that refers
+        to a `Node`, looking up the first name in the enclosing scopes, then the module's scope.
+        """
+        prefix: str | None = f"{self._module_name}.{parts[0]}"
+        for i, scope in enumerate(reversed(scopes)):
+            # class bodies aren't visible from the functions defined in them
+            if scope.is_class and i > 0:
+                continue
+            if parts[0] in scope.names:
+                prefix = scope.names[parts[0]]
+                break
+        if prefix is None:
+            return None
+
+        for i in range(len(parts), 0, -1):
+            node = self._resolve_alias(".".join([prefix, *parts[1:i]]))
+            if node is not None:
+                return node
+        return None
+
+    def _create_reference_once(
+        self, source_node: Node, target_node: Node, line_number: int
+    ) -> None:
+        """Creates a `Node__Reference` unless it was already created, or the target contains the
+        source (e.g., recursive calls, or `self` in a method referring to its class).
+        """
+        if f"{source_node.global_qualifier}.".startswith(f"{target_node.global_qualifier}."):
+            return
+
+        key = (source_node.id, target_node.id, line_number)
+        if key not in self._created_references:
+            self._created_references.add(key)
+            self._create_reference(source_node, target_node, line_number)
+
+
+class _Scope:
+    """The names bound in the body of a definition, lambda, or comprehension. Each name maps to the
+    qualifier it refers to, or to `None` if it can't refer to a `Node` (e.g., a local variable).
+    """
+
+    def __init__(self, qualifier: str, is_class: bool) -> None:
+        self.qualifier = qualifier
+        self.is_class = is_class
+        self.names: dict[str, str | None] = {}
+
+
+def _get_dotted_parts(tree: ast.Name | ast.Attribute) -> list[str] | None:
+    """Returns the names of a chain like `a.b.c`, or `None` if it doesn't start with a name."""
+    parts: list[str] = []
+    expr: ast.expr = tree
+    while isinstance(expr, ast.Attribute):
+        parts.append(expr.attr)
+        expr = expr.value
+    if not isinstance(expr, ast.Name):
+        return None
+    parts.append(expr.id)
+    return parts[::-1]
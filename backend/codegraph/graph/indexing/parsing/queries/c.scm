@@ -0,0 +1,44 @@
+; definitions
+
+(function_definition
+  declarator: [
+    (function_declarator
+      declarator: (identifier) @name)
+    (pointer_declarator
+      declarator: (function_declarator
+        declarator: (identifier) @name))
+    (pointer_declarator
+      declarator: (pointer_declarator
+        declarator: (function_declarator
+          declarator: (identifier) @name)))
+  ]) @definition.function
+
+[
+  (struct_specifier
+    name: (type_identifier) @name
+    body: (_))
+  (union_specifier
+    name: (type_identifier) @name
+    body: (_))
+  (enum_specifier
+    name: (type_identifier) @name
+    body: (_))
+] @definition.class
+
+; typedefs of anonymous types, e.g., `typedef struct { ... } name;`
+(type_definition
+  type: [
+    (struct_specifier !name)
+    (union_specifier !name)
+    (enum_specifier !name)
+  ]
+  declarator: (type_identifier) @name) @definition.class
+
+; includes don't bind names, so they aren't captured as imports
+
+; references
+
+(call_expression
+  function: (identifier) @reference)
+
+(type_identifier) @reference
@@ -0,0 +1,58 @@
+; definitions
+
+(function_definition
+  declarator: [
+    (function_declarator
+      declarator: [(identifier) (field_identifier) (qualified_identifier)] @name)
+    (pointer_declarator
+      declarator: (function_declarator
+        declarator: [(identifier) (field_identifier) (qualified_identifier)] @name))
+    (reference_declarator
+      (function_declarator
+        declarator: [(identifier) (field_identifier) (qualified_identifier)] @name))
+  ]) @definition.function
+
+[
+  (class_specifier
+    name: (type_identifier) @name
+    body: (_))
+  (struct_specifier
+    name: (type_identifier) @name
+    body: (_))
+  (union_specifier
+    name: (type_identifier) @name
+    body: (_))
+  (enum_specifier
+    name: (type_identifier) @name
+    body: (_))
+] @definition.class
+
+; typedefs of anonymous types, e.g., `typedef struct { ... } name;`
+(type_definition
+  type: [
+    (struct_specifier !name)
+    (union_specifier !name)
+    (enum_specifier !name)
+  ]
+  declarator: (type_identifier) @name) @definition.class
+
+(namespace_definition
+  name: [(namespace_identifier) (nested_namespace_specifier)] @name) @definition.module
+
+; imports, includes don't bind names so they aren't captured
+
+(using_declaration
+  (qualified_identifier
+    scope: (_) @import.module
+    name: (identifier) @import.name))
+
+; references
+
+(call_expression
+  function: [(identifier) (qualified_identifier)] @reference)
+
+(type_identifier) @reference
+
+(qualified_identifier
+  scope: (namespace_identifier)
+  name: (type_identifier)) @reference
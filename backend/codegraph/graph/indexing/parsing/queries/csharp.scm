@@ -0,0 +1,44 @@
+; definitions
+
+[
+  (class_declaration
+    name: (identifier) @name)
+  (interface_declaration
+    name: (identifier) @name)
+  (struct_declaration
+    name: (identifier) @name)
+  (enum_declaration
+    name: (identifier) @name)
+  (record_declaration
+    name: (identifier) @name)
+] @definition.class
+
+[
+  (method_declaration
+    name: (identifier) @name)
+  (constructor_declaration
+    name: (identifier) @name)
+] @definition.function
+
+(namespace_declaration
+  name: [(identifier) (qualified_name)] @name) @definition.module
+
+; imports, only aliases bind names (e.g., `using Name = Namespace.Type;`)
+
+(using_directive
+  name: (identifier) @import.alias
+  [(identifier) (qualified_name)] @import.module)
+
+; references
+
+(invocation_expression
+  function: [(identifier) (member_access_expression)] @reference)
+
+(object_creation_expression
+  type: [(identifier) (qualified_name)] @reference)
+
+(base_list
+  [(identifier) (qualified_name)] @reference)
+
+(parameter
+  type: [(identifier) (qualified_name)] @reference)
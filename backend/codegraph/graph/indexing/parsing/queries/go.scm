@@ -0,0 +1,33 @@
+; definitions
+
+(function_declaration
+  name: (identifier) @name) @definition.function
+
+(method_declaration
+  receiver: (parameter_list
+    (parameter_declaration
+      type: [
+        (type_identifier) @parent
+        (pointer_type (type_identifier) @parent)
+        (generic_type type: (type_identifier) @parent)
+        (pointer_type (generic_type type: (type_identifier) @parent))
+      ]))
+  name: (field_identifier) @name) @definition.function
+
+(type_spec
+  name: (type_identifier) @name) @definition.class
+
+; imports
+
+(import_spec
+  name: (package_identifier)? @import.alias
+  path: (interpreted_string_literal (interpreted_string_literal_content) @import.module))
+
+; references
+
+(call_expression
+  function: [(identifier) (selector_expression)] @reference)
+
+(type_identifier) @reference
+
+(qualified_type) @reference
@@ -0,0 +1,46 @@
+; definitions
+
+[
+  (class_declaration
+    name: (identifier) @name)
+  (interface_declaration
+    name: (identifier) @name)
+  (enum_declaration
+    name: (identifier) @name)
+  (record_declaration
+    name: (identifier) @name)
+  (annotation_type_declaration
+    name: (identifier) @name)
+] @definition.class
+
+[
+  (method_declaration
+    name: (identifier) @name)
+  (constructor_declaration
+    name: (identifier) @name)
+] @definition.function
+
+; imports, except wildcards
+
+(import_declaration
+  (scoped_identifier) @import.module .)
+
+; references
+
+(method_invocation
+  !object
+  name: (identifier) @reference)
+
+(method_invocation
+  object: (this)
+  name: (identifier) @reference)
+
+(method_invocation
+  object: [(identifier) (field_access)] @reference)
+
+(object_creation_expression
+  type: [(type_identifier) (scoped_type_identifier)] @reference)
+
+(type_identifier) @reference
+
+(scoped_type_identifier) @reference
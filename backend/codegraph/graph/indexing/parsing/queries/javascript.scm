@@ -0,0 +1,66 @@
+; definitions
+
+(function_declaration
+  name: (identifier) @name) @definition.function
+
+(generator_function_declaration
+  name: (identifier) @name) @definition.function
+
+(class_declaration
+  name: (identifier) @name) @definition.class
+
+(method_definition
+  name: (property_identifier) @name) @definition.function
+
+(variable_declarator
+  name: (identifier) @name
+  value: [(arrow_function) (function_expression) (class)]) @definition.function
+
+; imports
+
+(import_statement
+  (import_clause
+    (named_imports
+      (import_specifier
+        name: (identifier) @import.name
+        alias: (identifier)? @import.alias)))
+  source: (string (string_fragment) @import.module))
+
+(import_statement
+  (import_clause
+    [
+      (identifier) @import.alias
+      (namespace_import (identifier) @import.alias)
+    ])
+  source: (string (string_fragment) @import.module))
+
+(variable_declarator
+  name: (identifier) @import.alias
+  value: (call_expression
+    function: (identifier) @_require
+    arguments: (arguments . (string (string_fragment) @import.module)))
+  (#eq? @_require "require"))
+
+(variable_declarator
+  name: (object_pattern
+    [
+      (shorthand_property_identifier_pattern) @import.name
+      (pair_pattern
+        key: (property_identifier) @import.name
+        value: (identifier) @import.alias)
+    ])
+  value: (call_expression
+    function: (identifier) @_require
+    arguments: (arguments . (string (string_fragment) @import.module)))
+  (#eq? @_require "require"))
+
+; references
+
+(call_expression
+  function: [(identifier) (member_expression)] @reference)
+
+(new_expression
+  constructor: [(identifier) (member_expression)] @reference)
+
+(class_heritage
+  [(identifier) (member_expression)] @reference)
@@ -0,0 +1,49 @@
+; definitions
+
+[
+  (class_declaration
+    name: (name) @name)
+  (interface_declaration
+    name: (name) @name)
+  (trait_declaration
+    name: (name) @name)
+  (enum_declaration
+    name: (name) @name)
+] @definition.class
+
+[
+  (function_definition
+    name: (name) @name)
+  (method_declaration
+    name: (name) @name)
+] @definition.function
+
+; imports
+
+(namespace_use_clause
+  (qualified_name
+    prefix: (namespace_name) @import.module
+    (name) @import.name)
+  alias: (name)? @import.alias)
+
+; references
+
+(function_call_expression
+  function: [(name) (qualified_name)] @reference)
+
+(scoped_call_expression
+  scope: [(name) (qualified_name)] @reference)
+
+(member_call_expression
+  object: (variable_name (name) @_this)
+  name: (name) @reference
+  (#eq? @_this "this"))
+
+(object_creation_expression
+  [(name) (qualified_name)] @reference)
+
+(base_clause
+  [(name) (qualified_name)] @reference)
+
+(class_interface_clause
+  [(name) (qualified_name)] @reference)
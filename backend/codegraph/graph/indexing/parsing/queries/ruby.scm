@@ -0,0 +1,32 @@
+; definitions
+
+(module
+  name: [(constant) (scope_resolution)] @name) @definition.module
+
+(class
+  name: [(constant) (scope_resolution)] @name) @definition.class
+
+[
+  (method
+    name: (_) @name)
+  (singleton_method
+    name: (_) @name)
+] @definition.function
+
+; requires don't bind names, so they aren't captured as imports
+
+; references
+
+(call
+  !receiver
+  method: (identifier) @reference)
+
+(call
+  receiver: (self)
+  method: (identifier) @reference)
+
+(call
+  receiver: [(constant) (scope_resolution)] @reference)
+
+(superclass
+  [(constant) (scope_resolution)] @reference)
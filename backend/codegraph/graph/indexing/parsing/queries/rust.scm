@@ -0,0 +1,77 @@
+; definitions
+
+(function_item
+  name: (identifier) @name) @definition.function
+
+(function_signature_item
+  name: (identifier) @name) @definition.function
+
+; methods are qualified under the type they're implemented for
+(impl_item
+  type: [
+    (type_identifier) @parent
+    (generic_type type: (type_identifier) @parent)
+  ]
+  body: (declaration_list
+    (function_item
+      name: (identifier) @name) @definition.function))
+
+[
+  (struct_item
+    name: (type_identifier) @name)
+  (enum_item
+    name: (type_identifier) @name)
+  (union_item
+    name: (type_identifier) @name)
+  (trait_item
+    name: (type_identifier) @name)
+  (type_item
+    name: (type_identifier) @name)
+] @definition.class
+
+(mod_item
+  name: (identifier) @name
+  body: (declaration_list)) @definition.module
+
+(macro_definition
+  name: (identifier) @name) @definition.function
+
+; imports
+
+(use_declaration
+  argument: (scoped_identifier
+    path: (_) @import.module
+    name: (identifier) @import.name))
+
+(use_declaration
+  argument: (use_as_clause
+    path: (scoped_identifier
+      path: (_) @import.module
+      name: (identifier) @import.name)
+    alias: (identifier) @import.alias))
+
+(use_declaration
+  argument: (scoped_use_list
+    path: (_) @import.module
+    list: (use_list
+      [
+        (identifier) @import.name
+        (use_as_clause
+          path: (identifier) @import.name
+          alias: (identifier) @import.alias)
+      ])))
+
+; references
+
+(call_expression
+  function: [(identifier) (scoped_identifier)] @reference)
+
+(macro_invocation
+  macro: (identifier) @reference)
+
+(struct_expression
+  name: [(type_identifier) (scoped_type_identifier)] @reference)
+
+(type_identifier) @reference
+
+(scoped_type_identifier) @reference
@@ -0,0 +1,92 @@
+; definitions
+
+(function_declaration
+  name: (identifier) @name) @definition.function
+
+(generator_function_declaration
+  name: (identifier) @name) @definition.function
+
+(function_signature
+  name: (identifier) @name) @definition.function
+
+[
+  (class_declaration
+    name: (type_identifier) @name)
+  (abstract_class_declaration
+    name: (type_identifier) @name)
+  (interface_declaration
+    name: (type_identifier) @name)
+  (type_alias_declaration
+    name: (type_identifier) @name)
+  (enum_declaration
+    name: (identifier) @name)
+] @definition.class
+
+[
+  (method_definition
+    name: (property_identifier) @name)
+  (method_signature
+    name: (property_identifier) @name)
+  (abstract_method_signature
+    name: (property_identifier) @name)
+] @definition.function
+
+(variable_declarator
+  name: (identifier) @name
+  value: [(arrow_function) (function_expression) (class)]) @definition.function
+
+(internal_module
+  name: [(identifier) (nested_identifier)] @name) @definition.module
+
+; imports
+
+(import_statement
+  (import_clause
+    (named_imports
+      (import_specifier
+        name: (identifier) @import.name
+        alias: (identifier)? @import.alias)))
+  source: (string (string_fragment) @import.module))
+
+(import_statement
+  (import_clause
+    [
+      (identifier) @import.alias
+      (namespace_import (identifier) @import.alias)
+    ])
+  source: (string (string_fragment) @import.module))
+
+(variable_declarator
+  name: (identifier) @import.alias
+  value: (call_expression
+    function: (identifier) @_require
+    arguments: (arguments . (string (string_fragment) @import.module)))
+  (#eq? @_require "require"))
+
+(variable_declarator
+  name: (object_pattern
+    [
+      (shorthand_property_identifier_pattern) @import.name
+      (pair_pattern
+        key: (property_identifier) @import.name
+        value: (identifier) @import.alias)
+    ])
+  value: (call_expression
+    function: (identifier) @_require
+    arguments: (arguments . (string (string_fragment) @import.module)))
+  (#eq? @_require "require"))
+
+; references
+
+(call_expression
+  function: [(identifier) (member_expression)] @reference)
+
+(new_expression
+  constructor: [(identifier) (member_expression)] @reference)
+
+(extends_clause
+  value: [(identifier) (member_expression)] @reference)
+
+(type_identifier) @reference
+
+(nested_type_identifier) @reference
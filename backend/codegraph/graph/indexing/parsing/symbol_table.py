@@ -0,0 +1,90 @@
+from threading import Lock
+
+from sqlalchemy.orm import Session
+
+from codegraph.db.models import Alias, Node
+
+# guards against cyclic aliases (e.g., two modules re-exporting each other's names)
+_MAX_ALIAS_DEPTH = 64
+
+
+class SymbolTable:
+    """A thread-safe, read-only, in-memory view of a project's `Alias`es and `Node`s, used to
+    resolve qualifiers without querying the database. Should be loaded after the definitions of
+    every file in the project have been extracted, and shared between all parsers of an indexing
+    run.
+
+    `Node`s in the table are not attached to any session and do not have their `definition` loaded.
+    """
+
+    def __init__(self, aliases: dict[str, str], nodes: dict[str, Node]) -> None:
+        self._aliases = aliases
+        self._nodes = nodes
+        self._resolved: dict[str, Node | None] = {}
+        self._resolved_lock = Lock()
+
+    def __reduce__(self) -> tuple[type["SymbolTable"], tuple[dict[str, str], dict[str, Node]]]:
+        # the lock and memoized results aren't pickled, e.g., when sent to parsing processes
+        return (SymbolTable, (self._aliases, self._nodes))
+
+    @classmethod
+    def load(cls, project_id: int, session: Session) -> "SymbolTable":
+        """Loads all `Alias`es and `Node`s of the project in one query each."""
+        aliases: dict[str, str] = {
+            row.local_qualifier: row.global_qualifier
+            for row in session.query(Alias.local_qualifier, Alias.global_qualifier).filter(
+                Alias.project_id == project_id
+            )
+        }
+        nodes: dict[str, Node] = {
+            row.global_qualifier: Node(
+                id=row.id,
+                name=row.name,
+                global_qualifier=row.global_qualifier,
+                type=row.type,
+                file_id=row.file_id,
+                project_id=project_id,
+            )
+            for row in session.query(
+                Node.id, Node.name, Node.global_qualifier, Node.type, Node.file_id
+            ).filter(Node.project_id == project_id)
+        }
+        return cls(aliases, nodes)
+
+    def find_node(self, global_qualifier: str) -> Node | None:
+        """Finds a `Node` by its exact `global_qualifier`."""
+        return self._nodes.get(global_qualifier)
+
+    def resolve(self, local_qualifier: str) -> Node | None:
+        """Follows the `Alias`es matching the longest prefix of `local_qualifier` until no alias
+        matches, then finds the `Node` referenced by the resulting qualifier. Returns `None` if the
+        `local_qualifier` is not found. Results are memoized.
+        """
+        if local_qualifier in self._resolved:
+            return self._resolved[local_qualifier]
+
+        qualifier = local_qualifier
+        for _ in range(_MAX_ALIAS_DEPTH):
+            new_qualifier = self._replace_alias_prefix(qualifier)
+            if new_qualifier is None or new_qualifier == qualifier:
+                break
+            qualifier = new_qualifier
+        else:
+            qualifier = ""  # cyclic alias, cannot be resolved
+
+        node = self._nodes.get(qualifier)
+        with self._resolved_lock:
+            self._resolved[local_qualifier] = node
+        return node
+
+    def _replace_alias_prefix(self, qualifier: str) -> str | None:
+        """Replaces the longest prefix of `qualifier` matching an `Alias`. Returns `None` if no
+        prefix matches.
+        """
+        parts = qualifier.split(".")
+        for i in range(len(parts), 0, -1):
+            global_prefix = self._aliases.get(".".join(parts[:i]))
+            if global_prefix is not None:
+                suffix = ".".join(parts[i:])
+                return f"{global_prefix}.{suffix}" if suffix else global_prefix
+        return None
@@ -0,0 +1,459 @@
+import os
+import re
+from functools import cache
+from pathlib import Path
+from typing import ClassVar, NamedTuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+from tree_sitter import Node as SyntaxNode
+from tree_sitter import Query, QueryCursor, Tree
+from tree_sitter_language_pack import get_language, get_parser
+
+from codegraph.db.models import Node
+from codegraph.graph.indexing.metrics import measure_stage, record
+from codegraph.graph.indexing.parse_cache import ParseCache
+from codegraph.graph.indexing.parsing.base_parser import BaseParser
+from codegraph.graph.indexing.parsing.symbol_table import SymbolTable
+from codegraph.graph.models import IndexingStage, Language, NodeType
+
+_QUERIES_DIR = Path(__file__).parent / "queries"
+
+# tree-sitter trees take up roughly 10 times the memory of their source text
+_TREE_SIZE_FACTOR = 10
+
+_DEFINITION_CAPTURES = {
+    "definition.module": NodeType.MODULE,
+    "definition.class": NodeType.CLASS,
+    "definition.function": NodeType.FUNCTION,
+}
+_SEPARATOR_PATTERN = re.compile(r"\s*(?:::|->|\.|/|\\)\s*")
+_QUALIFIER_PATTERN = re.compile(r"^[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*$")
+_JAVA_PACKAGE_PATTERN = re.compile(r"^\s*package\s+([\w.]+)\s*;", re.MULTILINE)
+_RUST_ROOT_FILENAMES = ("lib.rs", "main.rs")
+
+
+def parse_syntax_tree(
+    filepath: Path, language: Language, parse_cache: ParseCache | None, text: str | None = None
+) -> Tree:
+    """Parses a file with tree-sitter, or its `text` if already read. If a `parse_cache` is given,
+    the tree is parsed through it, so that it's shared between chunking and parsing.
+    """
+
+    def _parse_text(text: str) -> Tree:
+        with measure_stage(IndexingStage.PARSING):
+            source = text.encode("utf-8")
+            record(bytes=len(source))
+            return get_parser(language.value).parse(source)
+
+    if parse_cache is not None:
+        return parse_cache.parse(filepath, "tree_sitter", _parse_text, _TREE_SIZE_FACTOR, text)
+    return _parse_text(filepath.read_text(encoding="utf-8") if text is None else text)
+
+
+class TreeSitterParser(BaseParser):
+    """A parser for any language tree-sitter supports, driven by the language's query file in
+    `queries/`, which captures:
+    - `@definition.module`, `@definition.class`, or `@definition.function`: a definition named by
+      `@name`. It is qualified under the innermost definition enclosing it, or, if captured, under
+      the definition of the file named by `@parent` (e.g., the receiver type of a Go method)
+    - `@import.module`: an imported module path, with the imported `@import.name` (e.g., from
+      `import { name } from "module"`) and its local `@import.alias` if any
+    - `@reference`: a name or path used by the innermost definition enclosing it, looked up in the
+      definitions enclosing it, then in the file
+
+    Modules are qualified by their path relative to the project root, suffix included, e.g.
+    `src/utils.ts` is `src.utils.ts`. Only the first of multiple definitions with the same
+    qualifier (e.g., overloads) is extracted. Local variables are not tracked, so they can't shadow
+    other names.
+
+    Subclasses set `_LANGUAGE`, and `_IMPORT_SUFFIXES` if imports are paths to the project's files.
+    """
+
+    # suffixes tried when resolving an import path to a file, relative to the importing file or the
+    # project root. `None` if imports aren't file paths
+    _IMPORT_SUFFIXES: ClassVar[tuple[str, ...] | None] = None
+
+    def __init__(
+        self,
+        project_id: int,
+        project_root: Path,
+        filepath: Path,
+        session: Session | None,
+        symbol_table: SymbolTable | None = None,
+        file_id: UUID | None = None,
+        parse_cache: ParseCache | None = None,
+    ):
+        super().__init__(
+            project_id, project_root, filepath, session, symbol_table, file_id, parse_cache
+        )
+        assert self._LANGUAGE is not None
+        self._language = self._LANGUAGE
+        self._module_name = self._get_module_name(self._filepath)
+
+    def extract_definitions(self) -> None:
+        # create module node
+        self._module_node = self._create_node(
+            self._filepath.name, self._module_name, None, NodeType.MODULE
+        )
+
+        matches = self._get_matches()
+        created_aliases: set[str] = set()
+        for captures in matches:
+            if "import.module" in captures:
+                self._create_alias_from_import(captures, created_aliases)
+
+        # create definition nodes
+        definitions = self._get_definitions(matches)
+        nodes = [
+            self._create_node(
+                definition.qualifier.rsplit(".", 1)[-1],
+                definition.qualifier,
+                _get_text(definition.syntax_node),
+                definition.node_type,
+            )
+            for definition in definitions
+        ]
+
+        # create module -> node & parent -> node references, parents may be defined after their
+        # children (e.g., Go methods declared before their receiver type)
+        for definition, node in zip(definitions, nodes):
+            line_number = definition.syntax_node.start_point.row + 1
+            self._create_reference(self._module_node, node, line_number)
+            if definition.parent_qualifier is not None:
+                parent_node = self._buffered_nodes[definition.parent_qualifier]
+                self._create_reference(parent_node, node, line_number)
+
+    def extract_references(self) -> None:
+        # get module node
+        module_node = self._find_node(self._module_name)
+        assert module_node is not None
+
+        matches = self._get_matches()
+        definitions = self._get_definitions(matches)
+        references = sorted(
+            (node for captures in matches for node in captures.get("reference", [])),
+            key=lambda node: node.start_byte,
+        )
+
+        # walk definitions and references in order, tracking the definitions enclosing each
+        # reference
+        created_references: set[tuple[UUID, UUID, int]] = set()
+        enclosing: list[_Definition] = []
+        i = 0
+        for reference in references:
+            while i < len(definitions) and definitions[i].syntax_node.start_byte <= (
+                reference.start_byte
+            ):
+                enclosing.append(definitions[i])
+                i += 1
+            while enclosing and enclosing[-1].syntax_node.end_byte <= reference.start_byte:
+                enclosing.pop()
+
+            name = _to_qualifier(_get_text(reference))
+            if not _QUALIFIER_PATTERN.match(name):  # not a path of names, e.g., `f().attr`
+                continue
+
+            source_node = module_node
+            if enclosing:
+                source_node = self._find_node(enclosing[-1].qualifier) or module_node
+            target_node = self._resolve_name(name, source_node.global_qualifier)
+            if target_node is None:
+                continue
+
+            # skip recursion, and references to enclosing definitions
+            if (
+                source_node.global_qualifier == target_node.global_qualifier
+                or source_node.global_qualifier.startswith(f"{target_node.global_qualifier}.")
+            ):
+                continue
+
+            line_number = reference.start_point.row + 1
+            key = (source_node.id, target_node.id, line_number)
+            if key not in created_references:
+                created_references.add(key)
+                self._create_reference(source_node, target_node, line_number)
+
+    def _get_module_name(self, filepath: Path) -> str:
+        return ".".join(filepath.relative_to(self._project_root).parts)
+
+    def _get_matches(self) -> list[dict[str, list[SyntaxNode]]]:
+        tree = parse_syntax_tree(self._filepath, self._language, self._parse_cache)
+        cursor = QueryCursor(_load_query(self._language))
+        return [captures for _, captures in cursor.matches(tree.root_node)]
+
+    def _get_definitions(self, matches: list[dict[str, list[SyntaxNode]]]) -> list["_Definition"]:
+        """Qualifies the captured definitions, sorted by their position in the file. Definitions
+        enclosing others come before them.
+        """
+        captured: list[tuple[SyntaxNode, NodeType, str, str | None]] = []
+        for captures in matches:
+            for capture_name, node_type in _DEFINITION_CAPTURES.items():
+                if capture_name in captures and "name" in captures:
+                    parent_nodes = captures.get("parent")
+                    captured.append(
+                        (
+                            captures[capture_name][0],
+                            node_type,
+                            _to_qualifier(_get_text(captures["name"][0])),
+                            _to_qualifier(_get_text(parent_nodes[0])) if parent_nodes else None,
+                        )
+                    )
+
+        # a definition captured with a `@parent` (e.g., a method in a Rust `impl`) takes precedence
+        # over the same definition captured without one
+        with_parent = {(c[0].start_byte, c[0].end_byte) for c in captured if c[3] is not None}
+        captured = [
+            c
+            for c in captured
+            if c[3] is not None or (c[0].start_byte, c[0].end_byte) not in with_parent
+        ]
+
+        # definitions with a `@parent` are qualified after the definitions they may refer to
+        captured.sort(key=lambda c: (c[3] is not None, c[0].start_byte, -c[0].end_byte))
+
+        definitions: dict[str, _Definition] = {}
+        enclosing: list[_Definition] = []
+        for syntax_node, node_type, name, parent in captured:
+            if parent is not None:
+                parent_qualifier: str | None = f"{self._module_name}.{parent}"
+                qualifier = f"{parent_qualifier}.{name}"
+                if parent_qualifier not in definitions:
+                    parent_qualifier = None  # e.g., defined in another file of the package
+            else:
+                while enclosing and enclosing[-1].syntax_node.end_byte < syntax_node.end_byte:
+                    enclosing.pop()
+                parent_qualifier = enclosing[-1].qualifier if enclosing else None
+                qualifier = f"{parent_qualifier or self._module_name}.{name}"
+
+            if qualifier in definitions or not _QUALIFIER_PATTERN.match(name):
+                continue
+            definition = _Definition(syntax_node, node_type, qualifier, parent_qualifier)
+            definitions[qualifier] = definition
+            if parent is None:
+                enclosing.append(definition)
+
+        return sorted(
+            definitions.values(),
+            key=lambda d: (d.syntax_node.start_byte, -d.syntax_node.end_byte),
+        )
+
+    def _create_alias_from_import(
+        self, captures: dict[str, list[SyntaxNode]], created_aliases: set[str]
+    ) -> None:
+        # abc.ts: import { z as bar } from "./x/y" -> (abc.ts.bar = x.y.ts.z)
+        path = _get_text(captures["import.module"][0]).strip("\"'`<>")
+        module_qualifier = self._resolve_import_path(path)
+
+        name = alias = None
+        if "import.name" in captures:
+            name = _to_qualifier(_get_text(captures["import.name"][0]))
+        if "import.alias" in captures:
+            alias = _get_text(captures["import.alias"][0])
+
+        if name is not None:
+            global_qualifier = f"{module_qualifier}.{name}"
+            local_name = alias or name.rsplit(".", 1)[-1]
+        else:
+            global_qualifier = module_qualifier
+            local_name = alias or _to_qualifier(path).rsplit(".", 1)[-1]
+
+        local_qualifier = f"{self._module_name}.{local_name}"
+        if (
+            local_qualifier in created_aliases
+            or local_qualifier == global_qualifier
+            or not _QUALIFIER_PATTERN.match(local_name)
+            or not _QUALIFIER_PATTERN.match(global_qualifier)
+        ):
+            return
+        created_aliases.add(local_qualifier)
+        self._create_alias(local_qualifier, global_qualifier)
+
+    def _resolve_import_path(self, path: str) -> str:
+        """Returns the module qualifier of the project file an import path refers to, or the path
+        as a qualifier if it doesn't refer to one (e.g., an external package).
+        """
+        if self._IMPORT_SUFFIXES is not None:
+            for base_dir in (self._filepath.parent, self._project_root):
+                candidate = os.path.normpath(base_dir / path)
+                for suffix in self._IMPORT_SUFFIXES:
+                    filepath = Path(f"{candidate}{suffix}")
+                    if filepath.is_relative_to(self._project_root) and filepath.is_file():
+                        return self._get_module_name(filepath)
+        return _to_qualifier(path)
+
+    def _resolve_name(self, name: str, source_qualifier: str) -> Node | None:
+        """Resolves a name used by a definition, looking it up in the definition and those
+        enclosing it, then in the module.
+        """
+        scope = source_qualifier
+        while True:
+            target_node = self._resolve_alias(f"{scope}.{name}")
+            if target_node is not None or scope == self._module_name:
+                return target_node
+            scope = scope.rsplit(".", 1)[0]
+
+
+class _Definition(NamedTuple):
+    syntax_node: SyntaxNode
+    node_type: NodeType
+    qualifier: str
+    parent_qualifier: str | None  # None if defined directly in the module
+
+
+@cache
+def _load_query(language: Language) -> Query:
+    query_text = (_QUERIES_DIR / f"{language.value}.scm").read_text(encoding="utf-8")
+    return Query(get_language(language.value), query_text)
+
+
+def _get_text(syntax_node: SyntaxNode) -> str:
+    return syntax_node.text.decode("utf-8") if syntax_node.text else ""
+
+
+def _to_qualifier(path: str) -> str:
+    """Converts a name or path (e.g., `a::b`, `a/b`, or `a.b`) to a dotted qualifier."""
+    return _SEPARATOR_PATTERN.sub(".", path.strip()).strip(".")
+
+
+class CParser(TreeSitterParser):
+    """A parser for C files."""
+
+    _LANGUAGE = Language.C
+
+
+class CppParser(TreeSitterParser):
+    """A parser for C++ files."""
+
+    _LANGUAGE = Language.CPP
+
+
+class CSharpParser(TreeSitterParser):
+    """A parser for C# files."""
+
+    _LANGUAGE = Language.CSHARP
+
+
+class GoParser(TreeSitterParser):
+    """A parser for Go files."""
+
+    _LANGUAGE = Language.GO
+
+
+class JavaParser(TreeSitterParser):
+    """A parser for Java files."""
+
+    _LANGUAGE = Language.JAVA
+
+    def _resolve_import_path(self, path: str) -> str:
+        # com.x.Class.member -> src/com/x/Class.java, where src is found from the file's package
+        parts = path.split(".")
+        source_root = self._get_source_root()
+        if source_root is not None:
+            for i in range(len(parts), 0, -1):
+                filepath = source_root.joinpath(*parts[:i]).with_suffix(".java")
+                if filepath.is_file():
+                    return ".".join([self._get_module_name(filepath), *parts[i - 1 :]])
+        return path
+
+    def _get_source_root(self) -> Path | None:
+        """Returns the directory the file's package is relative to, or `None` if it's outside the
+        project.
+        """
+        if self._parse_cache is not None:
+            text = self._parse_cache.read_text(self._filepath)
+        else:
+            text = self._filepath.read_text(encoding="utf-8")
+
+        source_root = self._filepath.parent
+        match = _JAVA_PACKAGE_PATTERN.search(text)
+        if match is not None:
+            package_parts = match.group(1).split(".")
+            if source_root.parts[-len(package_parts) :] != tuple(package_parts):
+                return None
+            source_root = source_root.parents[len(package_parts) - 1]
+        return source_root if source_root.is_relative_to(self._project_root) else None
+
+
+class JavaScriptParser(TreeSitterParser):
+    """A parser for JavaScript files."""
+
+    _LANGUAGE = Language.JAVASCRIPT
+    _IMPORT_SUFFIXES = ("", ".js", ".jsx", "/index.js", "/index.jsx")
+
+
+class PhpParser(TreeSitterParser):
+    """A parser for PHP files."""
+
+    _LANGUAGE = Language.PHP
+
+
+class RubyParser(TreeSitterParser):
+    """A parser for Ruby files."""
+
+    _LANGUAGE = Language.RUBY
+
+
+class RustParser(TreeSitterParser):
+    """A parser for Rust files."""
+
+    _LANGUAGE = Language.RUST
+
+    def _resolve_import_path(self, path: str) -> str:
+        # crate::a::b -> src/a/b.rs or src/a/b/mod.rs, or src/a.rs if b is defined in a
+        parts = _to_qualifier(path).split(".")
+        if parts[0] == "crate":
+            module_dir = self._get_crate_root()
+            parts = parts[1:]
+        elif parts[0] in ("self", "super"):
+            module_dir = self._get_module_dir(self._filepath)
+            while parts and parts[0] in ("self", "super"):
+                if parts[0] == "super":
+                    module_dir = module_dir.parent
+                parts = parts[1:]
+        else:
+            return super()._resolve_import_path(path)
+
+        if module_dir is not None:
+            for i in range(len(parts), -1, -1):
+                submodule_dir = module_dir.joinpath(*parts[:i])
+                for filepath in (
+                    submodule_dir.with_suffix(".rs"),
+                    *(submodule_dir / filename for filename in ("mod.rs", *_RUST_ROOT_FILENAMES)),
+                ):
+                    if filepath.is_relative_to(self._project_root) and filepath.is_file():
+                        return ".".join([self._get_module_name(filepath), *parts[i:]])
+        return ".".join(parts)
+
+    def _get_crate_root(self) -> Path | None:
+        """Returns the closest directory enclosing the file with a `lib.rs` or `main.rs`."""
+        for directory in self._filepath.parents:
+            if not directory.is_relative_to(self._project_root):
+                break
+            if any((directory / filename).is_file() for filename in _RUST_ROOT_FILENAMES):
+                return directory
+        return None
+
+    @staticmethod
+    def _get_module_dir(filepath: Path) -> Path:
+        """Returns the directory of a module's submodules, e.g., `a/` for `a.rs` or `a/mod.rs`."""
+        if filepath.name in ("mod.rs", *_RUST_ROOT_FILENAMES):
+            return filepath.parent
+        return filepath.with_suffix("")
+
+
+class TypeScriptParser(TreeSitterParser):
+    """A parser for TypeScript files."""
+
+    _LANGUAGE = Language.TYPESCRIPT
+    _IMPORT_SUFFIXES = (
+        "",
+        ".ts",
+        ".tsx",
+        ".js",
+        ".jsx",
+        "/index.ts",
+        "/index.tsx",
+        "/index.js",
+        "/index.jsx",
+    )
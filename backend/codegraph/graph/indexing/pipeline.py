@@ -1,14 +1,26 @@
+import hashlib
+import os
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import stat
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import ExitStack
 from datetime import datetime
 from pathlib import Path
 from time import monotonic
-from typing import Generator
-from uuid import UUID
+from typing import Any, Callable, Collection, Sequence, cast
+from uuid import UUID, uuid4
 
+from redis.exceptions import LockNotOwnedError
 from redis.lock import Lock
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import ColumnElement, insert, or_, select, update
+from sqlalchemy.orm import aliased
 
 from codegraph.configs.indexing import (
     DIRECTORY_SKIP_INDEXING_PATTERN,
@@ -17,32 +29,74 @@ from codegraph.configs.indexing import (
     INDEXING_BATCH_SIZE,
     INDEXING_CHUNK_OVERLAP,
     INDEXING_CHUNK_SIZE,
+    INDEXING_PARSE_PROCESSES,
+    INDEXING_USE_GIT,
     MAX_INDEXING_FILE_SIZE_MB,
     MAX_INDEXING_WORKERS,
 )
 from codegraph.db.engine import get_session
-from codegraph.db.models import File, Project
+from codegraph.db.models import Alias, File, Node, Node__Reference, Project
 from codegraph.graph.indexing.chunking.chunker import Chunker
+from codegraph.graph.indexing.git_utils import (
+    filter_ignored_paths,
+    get_changed_paths,
+    get_ignored_paths,
+    snapshot_worktree,
+)
+from codegraph.graph.indexing.metrics import IndexingMetrics, measure_stage, record
+from codegraph.graph.indexing.parse_cache import ParseCache
 from codegraph.graph.indexing.parsing.base_parser import BaseParser
+from codegraph.graph.indexing.parsing.parse_worker import create_parse_executor, parse_file
 from codegraph.graph.indexing.parsing.python_parser import PythonParser
+from codegraph.graph.indexing.parsing.symbol_table import SymbolTable
+from codegraph.graph.indexing.parsing.tree_sitter_parser import (
+    CParser,
+    CppParser,
+    CSharpParser,
+    GoParser,
+    JavaParser,
+    JavaScriptParser,
+    PhpParser,
+    RubyParser,
+    RustParser,
+    TypeScriptParser,
+)
 from codegraph.graph.models import (
     INDEXING_STEP_ORDER,
     NEXT_INDEXING_STEPS,
+    IndexingStage,
     IndexingStatus,
     IndexingStep,
     Language,
 )
 from codegraph.index.chroma import ChromaIndexManager
+from codegraph.index.chroma_writer import ChromaBatchWriter
 from codegraph.redis.lock_utils import extend_lock
 from codegraph.utils.logging import get_logger
 
 logger = get_logger()
 
 # NOTE: make sure to update `PARSER_CLASSES` when creating a new parser
-PARSER_CLASSES = [PythonParser]
+PARSER_CLASSES: list[type[BaseParser]] = [
+    PythonParser,
+    CParser,
+    CppParser,
+    CSharpParser,
+    GoParser,
+    JavaParser,
+    JavaScriptParser,
+    PhpParser,
+    RubyParser,
+    RustParser,
+    TypeScriptParser,
+]
+
+_GIT_SNAPSHOT_FILETYPES = {*INDEXED_FILETYPES, ".gitignore"}
 
 _PARSER_CLASSES_BY_LANGUAGE: dict[Language, type[BaseParser]] = {
-    parser_cls._LANGUAGE: parser_cls for parser_cls in PARSER_CLASSES
+    parser_cls._LANGUAGE: parser_cls
+    for parser_cls in PARSER_CLASSES
+    if parser_cls._LANGUAGE is not None
 }
 
 
@@ -59,10 +113,11 @@ def create_project(project_name: str, project_root: Path) -> int:
         session.flush()
 
         project_id = db_project.id
-        root_file = _create_file(
-            project_root, project_id, None, None, IndexingStep.COMPLETE, session
-        )  # root so no parent, dir so no language and no indexing step
-        db_project.root_file_id = root_file.id
+        root_file_row = _create_file(
+            project_root, project_id, None, None, IndexingStep.COMPLETE, project_root.stat(), None
+        )  # root so no parent, dir so no language, no indexing step, and no content hash
+        session.execute(insert(File), [root_file_row])
+        db_project.root_file_id = root_file_row["id"]
         session.commit()
 
     return project_id
@@ -77,15 +132,78 @@ def run_indexing(
     chunk_size: int = INDEXING_CHUNK_SIZE,
     chunk_overlap: int = INDEXING_CHUNK_OVERLAP,
     batch_size: int = INDEXING_BATCH_SIZE,
+    parse_processes: int = INDEXING_PARSE_PROCESSES,
+    paths: Sequence[Path] | None = None,
+    use_git: bool = INDEXING_USE_GIT,
 ) -> IndexingStatus:
     """Runs the complete (re)indexing pipeline for a given project. Indexing for the same project
     should not overlap. If a lock is provided, it will ensure it does not expire while indexing.
-    The indexing will pick up where it left off in case of a crash.
+    The indexing will pick up where it left off in case of a crash. If `parse_processes` is
+    positive, files are parsed in that many processes rather than in the indexing threads.
+
+    If `paths` are given, only the files on or under those (changed or deleted) paths are
+    re-indexed, along with the files referencing them, instead of walking the whole project. If
+    `use_git` and the project is in a git repository, the changed paths are found with git if not
+    given, and files ignored by git are skipped.
+
+    The returned status includes the time spent and work done in each stage of the indexing.
+    """
+    indexing_start_time = datetime.now()
+    metrics = IndexingMetrics()
+
+    cg_paths: list[Path] = []
+    vec_paths: list[Path] = []
+    if discover_files(
+        project_id,
+        lock,
+        directory_skip_pattern=directory_skip_pattern,
+        max_filesize=max_filesize,
+        paths=paths,
+        use_git=use_git,
+        metrics=metrics,
+    ):
+        cg_paths, vec_paths = index_files(
+            project_id,
+            lock,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            batch_size=batch_size,
+            parse_processes=parse_processes,
+            metrics=metrics,
+        )
+
+    return IndexingStatus(
+        start_time=indexing_start_time,
+        duration=datetime.now() - indexing_start_time,
+        codegraph_indexed_paths=cg_paths,
+        vector_indexed_paths=vec_paths,
+        stages=metrics.get_stages(),
+    )
+
+
+def discover_files(
+    project_id: int,
+    lock: Lock | None = None,
+    *,
+    directory_skip_pattern: str = DIRECTORY_SKIP_INDEXING_PATTERN,
+    max_filesize: float = MAX_INDEXING_FILE_SIZE_MB,
+    paths: Sequence[Path] | None = None,
+    use_git: bool = INDEXING_USE_GIT,
+    metrics: IndexingMetrics | None = None,
+) -> bool:
+    """Finds the new, changed, and deleted files of a project (see `run_indexing`), and sets the
+    indexing step of the files to (re)index. Returns whether the project still exists, as it's
+    deleted if its root no longer does. The discovery is measured in `metrics` if given.
     """
     indexing_start_time = datetime.now()
     last_locked_at = monotonic()
+    metrics = metrics or IndexingMetrics()
 
-    with get_session() as session:
+    with (
+        metrics.activate(),
+        measure_stage(IndexingStage.DISCOVERY),
+        get_session() as session,
+    ):
         # 1. Find project root
         db_project = session.query(Project).filter(Project.id == project_id).one()
         project_root = Path(db_project.root_path)
@@ -93,220 +211,544 @@ def run_indexing(
         assert root_file is not None
         assert root_file.path == db_project.root_path
 
-        # 2. Delete project if root no longer exists, otherwise update last indexed time
+        # 2. Delete project if root no longer exists
         index = ChromaIndexManager.get_or_create_index(project_id)
         if not project_root.is_dir():
             ChromaIndexManager.delete_index(project_id)
             session.delete(db_project)
             session.commit()
-            return IndexingStatus(
-                start_time=indexing_start_time,
-                duration=datetime.now() - indexing_start_time,
-                codegraph_indexed_paths=[],
-                vector_indexed_paths=[],
-            )
-        root_file.last_indexed_at = datetime.now()
-
-        # 3. Create indexing helpers
-        chunker = Chunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-
-        def _indexing_wrapper(_file_id: UUID) -> None:
-            with get_session() as _session:
-                _file = _session.query(File).filter(File.id == _file_id).one()
-                assert _file.indexing_step != IndexingStep.COMPLETE
+            return False
 
-                _step = _file.indexing_step
-                _filepath = Path(_file.path)
-
-                # codegraph indexing
-                if _step in (IndexingStep.DEFINITIONS, IndexingStep.REFERENCES):
-                    assert _file.language is not None
-                    _parser_cls = _PARSER_CLASSES_BY_LANGUAGE[_file.language]
-                    _parser = _parser_cls(project_id, project_root, _filepath, _session)
-
-                    if _step == IndexingStep.DEFINITIONS:
-                        _parser.extract_definitions()
-                    else:
-                        _parser.extract_references()
-
-                # vector indexing
-                elif _step == IndexingStep.VECTOR:
-                    if _chunks := chunker.chunk(_file, _session):
-                        index.upsert(_chunks)
-                        _file.chunks = len(_chunks)
-
-                # update step
-                _file.indexing_step = NEXT_INDEXING_STEPS[_step]
-                _session.commit()
-
-        # 4. Index `File`s, set appropriate indexing step, and track languages
+        # 3. Index `File`s, set appropriate indexing step, and track languages. If `paths` are
+        # given, only those paths (and the directories under them) are checked
         project_languages: set[Language] = set()
-
         skip_pattern = re.compile(directory_skip_pattern)
-        stack: list[tuple[Path, File]] = [(path, root_file) for path in project_root.iterdir()]
-        while stack:
-            path, parent_file = stack.pop()
 
-            if lock:
-                last_locked_at = extend_lock(lock, last_locked_at)
-
-            # check for skip conditions
-            file_stats = path.stat()
-            if (
-                (path.is_dir() and skip_pattern.match(path.name))
-                or (path.is_file() and file_stats.st_size > max_filesize * 1024 * 1024)
-                or (path.is_file() and path.suffix not in INDEXED_FILETYPES)
+        # snapshot git repositories before checking them, so changes made while indexing are found
+        # next time. If no paths are given, find the paths changed since the last snapshot (a full
+        # walk if `.gitignore`s changed), unless it's missing or was pruned by git
+        git_tree = snapshot_worktree(project_root, _GIT_SNAPSHOT_FILETYPES) if use_git else None
+        is_complete = paths is None  # whether all changes are indexed
+        if is_complete and git_tree is not None and db_project.last_indexed_git_tree is not None:
+            changed_paths = get_changed_paths(
+                project_root, db_project.last_indexed_git_tree, git_tree
+            )
+            if changed_paths is not None and not any(
+                os.path.basename(path) == ".gitignore" for path in changed_paths
             ):
-                continue
+                logger.info(f"Found {len(changed_paths)} changed paths with git.")
+                paths = [Path(path) for path in changed_paths]
 
-            language = FILETYPE_LANGUAGES.get(path.suffix)
+        target_paths = (
+            None if paths is None else _get_target_paths(paths, project_root, skip_pattern)
+        )
+        if target_paths is not None and use_git:
+            target_paths = filter_ignored_paths(project_root, target_paths)
+        ignored_paths: set[str] | None = None  # loaded when first walking a directory
+
+        # load all previously indexed files at once, or only those on or under the target paths
+        indexed_files_query = select(
+            File.id, File.path, File.last_indexed_at, File.content_hash
+        ).filter(File.project_id == project_id)
+        if target_paths is not None:
+            indexed_files_query = indexed_files_query.filter(
+                _get_paths_filter(target_paths, project_root)
+            )
+        indexed_files = {row.path: row for row in session.execute(indexed_files_query)}
+        seen_file_ids: set[UUID] = {root_file.id}
+        new_file_rows: list[dict[str, Any]] = []
+        new_file_ids: dict[str, UUID] = {}
+        changed_file_rows: list[dict[str, Any]] = []
+
+        def _is_skipped(
+            name: str, is_dir: bool, is_file: bool, get_size: Callable[[], int]
+        ) -> bool:
+            """Returns whether a directory or file should not be indexed."""
+            if is_dir:
+                return skip_pattern.match(name) is not None
+            return (
+                not is_file
+                or os.path.splitext(name)[1] not in INDEXED_FILETYPES
+                or get_size() > max_filesize * 1024 * 1024
+            )
+
+        def _index_entry(
+            path: str, is_dir: bool, file_stats: os.stat_result, parent_id: UUID
+        ) -> UUID:
+            """Creates the row of a new directory or file, or updates the row of a file whose
+            content has changed since last indexed (keeping its id so unchanged chunks are reused).
+            Returns the id of the row.
+            """
+            suffix = os.path.splitext(path)[1]
+            language = None if is_dir else FILETYPE_LANGUAGES.get(suffix)
             if language is not None:
                 project_languages.add(language)
 
-            current_file = _find_file(path, project_id, session)
+            if is_dir:
+                indexing_step = IndexingStep.COMPLETE  # dir so no indexing step
+            elif language in _PARSER_CLASSES_BY_LANGUAGE:
+                indexing_step = IndexingStep.DEFINITIONS  # language supports codegraph
+            else:
+                indexing_step = IndexingStep.VECTOR  # otherwise vector only
+
+            # create file if not previously indexed
+            indexed_file = indexed_files.get(path)
+            if indexed_file is None:
+                if path in new_file_ids:
+                    return new_file_ids[path]
+                file_row = _create_file(
+                    Path(path),
+                    project_id,
+                    parent_id,
+                    language,
+                    indexing_step,
+                    file_stats,
+                    None if is_dir else _hash_file(path),
+                )
+                file_id = cast(UUID, file_row["id"])
+                new_file_rows.append(file_row)
+                new_file_ids[path] = file_id
+                return file_id
 
-            # delete `File` and its chunks if it's a file and has been modified since last indexed
+            # otherwise mark it as seen, and re-index it if it's a file that has changed
+            seen_file_ids.add(indexed_file.id)
             updated_at = datetime.fromtimestamp(file_stats.st_mtime)
-            if (
-                current_file is not None
-                and path.is_file()
-                and updated_at > current_file.last_indexed_at
-            ):
-                index.delete(current_file)
-                session.delete(current_file)
-                session.flush()
-                current_file = None
-
-            # create file if not previously indexed, otherwise update last indexed time
-            if current_file is None:
-                if path.is_dir():
-                    current_file = _create_file(
-                        path, project_id, parent_file, None, IndexingStep.COMPLETE, session
-                    )  # dir so no language and no indexing step
-                else:
-                    current_file = _create_file(
-                        path,
-                        project_id,
-                        parent_file,
-                        language,
-                        (
-                            IndexingStep.DEFINITIONS
-                            if language in _PARSER_CLASSES_BY_LANGUAGE
-                            else IndexingStep.VECTOR
-                        ),  # do codegraph indexing if language is supported, otherwise vector only
-                        session,
+            if not is_dir and updated_at > indexed_file.last_indexed_at:
+                content_hash = _hash_file(path)
+                if content_hash != indexed_file.content_hash:
+                    changed_file_rows.append(
+                        {
+                            "id": indexed_file.id,
+                            "indexing_step": indexing_step,
+                            "content_hash": content_hash,
+                            "updated_at": updated_at,
+                        }
                     )
-            else:
-                current_file.last_indexed_at = datetime.now()
+            return cast(UUID, indexed_file.id)
+
+        def _walk(dirpath: str, parent_id: UUID) -> None:
+            """Indexes everything under a directory."""
+            nonlocal last_locked_at, ignored_paths
+            if ignored_paths is None:
+                ignored_paths = get_ignored_paths(project_root) if use_git else set()
 
-            # add subdirectories to stack and continue
-            if path.is_dir():
-                stack.extend((path, current_file) for path in path.iterdir())
+            stack: list[tuple[str, UUID]] = [(dirpath, parent_id)]
+            while stack:
+                dirpath, parent_id = stack.pop()
+
+                if lock:
+                    last_locked_at = extend_lock(lock, last_locked_at)
 
-        # find files that haven't been touched
-        deleted_file_ids = list(
+                # `DirEntry` caches its type and stats, so each entry is stat-ed at most once
+                with os.scandir(dirpath) as entries:
+                    for entry in entries:
+                        is_dir = entry.is_dir()
+                        if entry.path in ignored_paths or _is_skipped(
+                            entry.name, is_dir, entry.is_file(), lambda: entry.stat().st_size
+                        ):
+                            continue
+
+                        file_id = _index_entry(entry.path, is_dir, entry.stat(), parent_id)
+                        if is_dir:
+                            stack.append((entry.path, file_id))
+
+        if target_paths is None:
+            _walk(project_root.as_posix(), root_file.id)
+            deleted_file_ids = [
+                row.id for row in indexed_files.values() if row.id not in seen_file_ids
+            ]
+
+        else:
+            for target_path in target_paths:
+                # index the parent directories first, in case they're new
+                parent_id = root_file.id
+                for parent_path in reversed(Path(target_path).parents):
+                    if not parent_path.is_relative_to(project_root) or parent_path == project_root:
+                        continue
+                    try:
+                        parent_id = _index_entry(
+                            parent_path.as_posix(), True, parent_path.stat(), parent_id
+                        )
+                    except FileNotFoundError:
+                        break  # deleted while indexing, so picked up by the next indexing
+
+                # index the target, and everything under it if it's a directory. Targets that no
+                # longer exist are left unseen
+                try:
+                    file_stats = os.stat(target_path)
+                except FileNotFoundError:
+                    continue
+                is_dir = stat.S_ISDIR(file_stats.st_mode)
+                if _is_skipped(
+                    os.path.basename(target_path),
+                    is_dir,
+                    stat.S_ISREG(file_stats.st_mode),
+                    lambda: file_stats.st_size,
+                ):
+                    continue
+                file_id = _index_entry(target_path, is_dir, file_stats, parent_id)
+                if is_dir:
+                    _walk(target_path, file_id)
+
+            # only files on or under the targets are deleted, not their unseen parents
+            deleted_file_ids = [
+                row.id
+                for row in indexed_files.values()
+                if row.id not in seen_file_ids and _is_on_target_paths(row.path, target_paths)
+            ]
+
+        # references to the nodes of deleted and changed files are deleted along with the nodes, so
+        # re-extract the references of the remaining files which referenced them
+        stale_file_ids = [*deleted_file_ids, *(row["id"] for row in changed_file_rows)]
+        if stale_file_ids:
+            source_node = aliased(Node)
+            target_node = aliased(Node)
+            referencing_file_ids = (
+                select(source_node.file_id)
+                .join(Node__Reference, Node__Reference.source_node_id == source_node.id)
+                .join(target_node, Node__Reference.target_node_id == target_node.id)
+                .where(
+                    target_node.file_id.in_(stale_file_ids),
+                    source_node.file_id.not_in(stale_file_ids),
+                )
+            )
             session.execute(
-                select(File.id).filter(
-                    File.project_id == project_id, File.last_indexed_at < indexing_start_time
+                update(File)
+                .where(
+                    File.id.in_(referencing_file_ids),
+                    File.indexing_step == IndexingStep.COMPLETE,
                 )
+                .values(indexing_step=IndexingStep.REFERENCES)
             )
-            .scalars()
-            .all()
-        )
 
-        # delete files that haven't been touched, and their chunks
+        # delete files that haven't been seen, and their chunks
         if deleted_file_ids:
             index.delete_ids(deleted_file_ids, session)
             session.query(File).filter(File.id.in_(deleted_file_ids)).delete(
                 synchronize_session=False
             )
 
-        # update project languages
-        db_project.languages = list(project_languages)
+        # restart indexing of changed files from scratch, apart from their chunks which get diffed
+        if changed_file_rows:
+            changed_file_ids = [row["id"] for row in changed_file_rows]
+            session.query(Node).filter(Node.file_id.in_(changed_file_ids)).delete(
+                synchronize_session=False
+            )  # references are deleted by cascade
+            session.query(Alias).filter(Alias.file_id.in_(changed_file_ids)).delete(
+                synchronize_session=False
+            )
+            session.execute(update(File), changed_file_rows)
+
+        # bulk create new files (parents always precede their children), and update last indexed
+        # time of all checked files (mtimes after the start time will be picked up by the next
+        # indexing)
+        if new_file_rows:
+            session.execute(insert(File), new_file_rows)
+        if target_paths is None:
+            session.execute(
+                update(File)
+                .where(File.project_id == project_id)
+                .values(last_indexed_at=indexing_start_time)
+            )
+        else:
+            session.execute(
+                update(File)
+                .where(File.id.in_([*seen_file_ids, *new_file_ids.values()]))
+                .values(last_indexed_at=indexing_start_time)
+            )
+
+        # update project languages, only adding to them if not all files were checked
+        if target_paths is None:
+            db_project.languages = list(project_languages)
+        else:
+            db_project.languages = list(project_languages.union(db_project.languages))
+        if is_complete:
+            db_project.last_indexed_git_tree = git_tree
 
+        record(files=len(seen_file_ids) + len(new_file_ids))
         session.commit()
+    return True
+
+
+def index_files(
+    project_id: int,
+    lock: Lock | None = None,
+    *,
+    file_ids: Collection[UUID] | None = None,
+    extract_references: bool = True,
+    chunk_size: int = INDEXING_CHUNK_SIZE,
+    chunk_overlap: int = INDEXING_CHUNK_OVERLAP,
+    batch_size: int = INDEXING_BATCH_SIZE,
+    parse_processes: int = INDEXING_PARSE_PROCESSES,
+    metrics: IndexingMetrics | None = None,
+) -> tuple[list[Path], list[Path]]:
+    """Runs the remaining indexing steps of a project's files, or only of the files in `file_ids`.
+    References are extracted once the definitions of the files are, unless `extract_references`
+    is false, in which case the files are left waiting for it. Since references resolve to the
+    definitions of every file, only extract them once all other files had theirs extracted. Returns
+    the paths of the codegraph and vector indexed files. Each step of each file is measured in
+    `metrics` if given. Raises a `LockNotOwnedError` if `lock` is lost, without starting more steps.
+    """
+    last_locked_at = monotonic()
+    metrics = metrics or IndexingMetrics()
+
+    with get_session() as session:
+        db_project = session.query(Project).filter(Project.id == project_id).one()
+        project_root = Path(db_project.root_path)
+    index = ChromaIndexManager.get_or_create_index(project_id)
+
+    # 1. Create indexing helpers
+    parse_cache = ParseCache()  # shares file texts and trees between the steps of a file
+    chunker = Chunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap, parse_cache=parse_cache)
+    symbol_table: SymbolTable | None = None  # loaded once all definitions are extracted
+    parse_executor: ProcessPoolExecutor | None = None
+
+    def _indexing_wrapper(_file_id: UUID, _step: IndexingStep) -> IndexingStep:
+        """Runs the next indexing step of a file, `_step`, and returns the step after it."""
+        with metrics.activate(), measure_stage(IndexingStage(_step.value), is_file=True):
+            return _run_indexing_step(_file_id)
+
+    def _run_indexing_step(_file_id: UUID) -> IndexingStep:
+        with get_session() as _session:
+            _file = _session.query(File).filter(File.id == _file_id).one()
+            assert _file.indexing_step != IndexingStep.COMPLETE
+
+            _step = _file.indexing_step
+            _filepath = Path(_file.path)
+
+            # codegraph indexing
+            if _step in (IndexingStep.DEFINITIONS, IndexingStep.REFERENCES):
+                assert _file.language is not None
+                _parser_cls = _PARSER_CLASSES_BY_LANGUAGE[_file.language]
+
+                # parse in another process, and only write the parsed rows in this thread
+                if parse_executor is not None:
+                    _rows, _parse_metrics = parse_executor.submit(
+                        parse_file,
+                        _parser_cls,
+                        _step,
+                        project_id,
+                        project_root,
+                        _filepath,
+                        _file.id,
+                    ).result()
+                    metrics.merge(_parse_metrics)
+                    BaseParser.write_rows(_session, _rows)
+
+                else:
+                    _parser = _parser_cls(
+                        project_id,
+                        project_root,
+                        _filepath,
+                        _session,
+                        symbol_table,
+                        parse_cache=parse_cache,
+                    )
+                    if _step == IndexingStep.DEFINITIONS:
+                        _parser.extract_definitions()
+                    else:
+                        _parser.extract_references()
+                    _parser.flush()
+
+            # vector indexing
+            elif _step == IndexingStep.VECTOR:
+                _chunks = chunker.chunk(_file, _session)
+                # written together with the chunks of other files, wait until they are
+                writer.replace(_file.id, _file.chunks, _chunks).result()
+                _file.chunks = len(_chunks)
+                record(chunks=len(_chunks))
+
+            # update step
+            _next_step = NEXT_INDEXING_STEPS[_step]
+            if _next_step == IndexingStep.REFERENCES and (
+                _file.language not in _PARSER_CLASSES_BY_LANGUAGE
+            ):
+                _next_step = IndexingStep.COMPLETE  # language doesn't support codegraph
+            _file.indexing_step = _next_step
+            _session.commit()
+            return _next_step
 
-    # 5. Run indexing tasks
+    # 2. Run indexing tasks, queueing each file's next step as soon as it's ready. Only the
+    # references have to wait, until the definitions of every file have been extracted
     logger.info(f"Starting codegraph indexing for project {project_id}.")
     cg_paths: list[Path] = []
     vec_paths: list[Path] = []
 
-    with ThreadPoolExecutor(max_workers=MAX_INDEXING_WORKERS) as executor:
-        for step in INDEXING_STEP_ORDER:
-            for files in _get_batch_files_at_step(project_id, step, batch_size=batch_size):
-                # batch index
-                futs = [executor.submit(_indexing_wrapper, file.id) for file in files]
-                for fut in as_completed(futs):
-                    fut.result()
+    unindexed_files_query = select(File.id, File.path, File.indexing_step).filter(
+        File.project_id == project_id, File.indexing_step != IndexingStep.COMPLETE
+    )
+    if file_ids is not None:
+        unindexed_files_query = unindexed_files_query.filter(File.id.in_(file_ids))
+    with get_session() as session:
+        unindexed_files = session.execute(unindexed_files_query).all()
+
+    ready_files: deque[tuple[UUID, Path, IndexingStep]] = deque()
+    waiting_files: list[tuple[UUID, Path, IndexingStep]] = []  # waiting for all definitions
+    for file_id, filepath, step in sorted(
+        unindexed_files, key=lambda row: INDEXING_STEP_ORDER.index(row.indexing_step)
+    ):
+        if step == IndexingStep.REFERENCES:
+            waiting_files.append((file_id, Path(filepath), step))
+        else:
+            ready_files.append((file_id, Path(filepath), step))
+    num_unextracted_files = sum(
+        unindexed_file.indexing_step == IndexingStep.DEFINITIONS
+        for unindexed_file in unindexed_files
+    )
+    if parse_processes > 0 and num_unextracted_files > 0:
+        parse_executor = create_parse_executor(parse_processes)
+
+    with ExitStack() as exit_stack:
+        # shuts down the parsing processes last, once no more indexing threads use them
+        @exit_stack.callback
+        def _shutdown_parse_executor() -> None:
+            if parse_executor is not None:
+                parse_executor.shutdown(cancel_futures=True)
+
+        # closes the vector index writer once no more indexing threads use it, measuring its writes
+        with metrics.activate():
+            writer = exit_stack.enter_context(ChromaBatchWriter(index))
+        executor = exit_stack.enter_context(ThreadPoolExecutor(max_workers=MAX_INDEXING_WORKERS))
+
+        queued: dict[Future[IndexingStep], tuple[UUID, Path, IndexingStep]] = {}
+        while ready_files or (waiting_files and extract_references) or queued:
+            # share one read-only symbol table between all reference extractions
+            if num_unextracted_files == 0 and waiting_files and extract_references:
+                if symbol_table is None:
+                    with get_session() as session:
+                        symbol_table = SymbolTable.load(project_id, session)
+
+                    # parsing processes get their own copy of the symbol table
+                    if parse_processes > 0:
+                        if parse_executor is not None:
+                            parse_executor.shutdown()
+                        parse_executor = create_parse_executor(parse_processes, symbol_table)
+                ready_files.extend(waiting_files)
+                waiting_files.clear()
+
+            # stop once the lock is lost (e.g., released after another subtask of distributed
+            # indexing failed), so that indexing of the project never overlaps
+            if lock and ready_files and not lock.owned():
+                for queued_fut in queued:
+                    queued_fut.cancel()
+                raise LockNotOwnedError(  # type: ignore[no-untyped-call]
+                    f"Lost the indexing lock of project {project_id}"
+                )
 
-                # extend locks and track indexed paths
-                if lock:
-                    last_locked_at = extend_lock(lock, last_locked_at)
-                if step == IndexingStep.REFERENCES:
-                    cg_paths.extend(Path(file.path) for file in files)
+            while ready_files and len(queued) < batch_size:
+                file_id, filepath, step = ready_files.popleft()
+                fut = executor.submit(_indexing_wrapper, file_id, step)
+                queued[fut] = (file_id, filepath, step)
+
+            done, _ = wait(queued, return_when=FIRST_COMPLETED)
+            for fut in done:
+                file_id, filepath, step = queued.pop(fut)
+                try:
+                    next_step = fut.result()
+                except Exception:
+                    for queued_fut in queued:
+                        queued_fut.cancel()
+                    raise
+
+                # track indexed paths, and queue the file's next step
+                if step == IndexingStep.DEFINITIONS:
+                    num_unextracted_files -= 1
                 elif step == IndexingStep.VECTOR:
-                    vec_paths.extend(Path(file.path) for file in files)
+                    vec_paths.append(filepath)
+                elif step == IndexingStep.REFERENCES:
+                    cg_paths.append(filepath)
 
-    return IndexingStatus(
-        start_time=indexing_start_time,
-        duration=datetime.now() - indexing_start_time,
-        codegraph_indexed_paths=cg_paths,
-        vector_indexed_paths=vec_paths,
-    )
+                if next_step == IndexingStep.REFERENCES:
+                    waiting_files.append((file_id, filepath, next_step))
+                elif next_step != IndexingStep.COMPLETE:
+                    ready_files.append((file_id, filepath, next_step))
+
+            # extend locks
+            if lock:
+                last_locked_at = extend_lock(lock, last_locked_at)
 
+    parse_cache.log_stats()
+    ChromaIndexManager.Embedder.get_cache().log_stats()
 
-def _find_file(filepath: Path, project_id: int, session: Session) -> File | None:
-    """Finds a `File` object in the database."""
-    return (
-        session.query(File)
-        .filter(File.project_id == project_id, File.path == filepath.as_posix())
-        .one_or_none()
-    )
+    return cg_paths, vec_paths
 
 
 def _create_file(
     filepath: Path,
     project_id: int,
-    parent: File | None,
+    parent_id: UUID | None,
     language: Language | None,
     indexing_step: IndexingStep,
-    session: Session,
-) -> File:
-    """Creates a `File` object and adds it to the database. Does not commit the session."""
-    file_stats = filepath.stat()
-    created_at = datetime.fromtimestamp(file_stats.st_ctime)
-    updated_at = datetime.fromtimestamp(file_stats.st_mtime)
-
-    db_file = File(
-        name=filepath.name,
-        path=filepath.as_posix(),
-        language=language,
-        indexing_step=indexing_step,
-        created_at=created_at,
-        updated_at=updated_at,
-        parent_id=parent.id if parent is not None else None,
-        project_id=project_id,
+    file_stats: os.stat_result,
+    content_hash: str | None,
+) -> dict[str, Any]:
+    """Creates the row of a `File` object, with a client-side id, to be bulk inserted into the
+    database.
+    """
+    return {
+        "id": uuid4(),
+        "name": filepath.name,
+        "path": filepath.as_posix(),
+        "language": language,
+        "indexing_step": indexing_step,
+        "created_at": datetime.fromtimestamp(file_stats.st_ctime),
+        "updated_at": datetime.fromtimestamp(file_stats.st_mtime),
+        "content_hash": content_hash,
+        "parent_id": parent_id,
+        "project_id": project_id,
+    }
+
+
+def _hash_file(filepath: str) -> str:
+    """Returns the hash of a file's content. The file is read in blocks, not all at once."""
+    with open(filepath, "rb") as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+
+
+def _get_target_paths(
+    paths: Sequence[Path], project_root: Path, skip_pattern: re.Pattern[str]
+) -> list[str] | None:
+    """Returns the absolute paths to re-index, or `None` if the whole project should be. Paths
+    outside the project or under skipped directories are dropped, deleted paths are replaced by
+    their highest deleted parent directory, and paths under another path are merged into it.
+    """
+    target_paths: set[Path] = set()
+    for path in paths:
+        path = Path(os.path.normpath(project_root / path))  # relative paths are from the root
+        if path == project_root:
+            return None
+        if not path.is_relative_to(project_root):
+            continue
+        if any(skip_pattern.match(part) for part in path.relative_to(project_root).parts[:-1]):
+            continue
+
+        while not path.parent.exists() and path.parent != project_root:
+            path = path.parent
+        target_paths.add(path)
+
+    return sorted(
+        path.as_posix()
+        for path in target_paths
+        if not any(parent in target_paths for parent in path.parents)
     )
-    session.add(db_file)
 
-    session.flush()
-    return db_file
 
+def _get_paths_filter(target_paths: list[str], project_root: Path) -> ColumnElement[bool]:
+    """Returns a filter matching the `File`s on, under, or above the target paths."""
+    parent_paths = {
+        parent.as_posix()
+        for target_path in target_paths
+        for parent in Path(target_path).parents
+        if parent.is_relative_to(project_root)
+    }
+    return or_(
+        File.path.in_([*target_paths, *parent_paths]),
+        *(File.path.startswith(f"{target_path}/", autoescape=True) for target_path in target_paths),
+    )
 
-def _get_batch_files_at_step(
-    project_id: int, indexing_step: IndexingStep, batch_size: int = INDEXING_BATCH_SIZE
-) -> Generator[list[File], None, None]:
-    """Generator that yields `File`s to index at a given `indexing_step`."""
-    assert indexing_step != IndexingStep.COMPLETE
 
-    while True:
-        with get_session() as session:
-            files = (
-                session.query(File)
-                .filter(File.project_id == project_id, File.indexing_step == indexing_step)
-                .limit(batch_size)
-                .all()
-            )
-        if not files:
-            break
-        yield files
+def _is_on_target_paths(path: str, target_paths: list[str]) -> bool:
+    """Returns whether a path is on or under one of the target paths."""
+    return any(
+        path == target_path or path.startswith(f"{target_path}/") for target_path in target_paths
+    )
@@ -0,0 +1,238 @@
+import os
+import re
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock
+from time import monotonic
+
+from celery import Celery
+from sqlalchemy import select
+from watchdog.events import (
+    EVENT_TYPE_CREATED,
+    EVENT_TYPE_DELETED,
+    EVENT_TYPE_MODIFIED,
+    EVENT_TYPE_MOVED,
+    FileSystemEvent,
+    FileSystemEventHandler,
+)
+from watchdog.observers import Observer
+from watchdog.observers.api import BaseObserver, ObservedWatch
+
+from codegraph.celery.constants import CeleryPriority, CeleryQueue, CeleryTask
+from codegraph.configs.indexing import (
+    DIRECTORY_SKIP_INDEXING_PATTERN,
+    INDEXED_FILETYPES,
+    INDEXING_WATCH_DEBOUNCE_MS,
+    INDEXING_WATCH_MAX_DELAY_MS,
+    INDEXING_WATCH_REFRESH_INTERVAL,
+)
+from codegraph.db.engine import SqlEngine, get_session, wait_for_db
+from codegraph.db.models import Project
+from codegraph.redis.client import wait_for_redis
+from codegraph.utils.logging import get_logger
+
+logger = get_logger()
+
+_WATCHED_EVENT_TYPES = {
+    EVENT_TYPE_CREATED,
+    EVENT_TYPE_DELETED,
+    EVENT_TYPE_MODIFIED,
+    EVENT_TYPE_MOVED,
+}
+
+
+@dataclass
+class _PendingChanges:
+    first_changed_at: float
+    last_changed_at: float
+    paths: set[str] = field(default_factory=set)
+
+
+class ChangeDebouncer:
+    """Collects the changed paths of each project, and dispatches them together once the project
+    had no changes for `debounce` seconds, or at most `max_delay` seconds after its first change.
+    """
+
+    def __init__(
+        self,
+        dispatch: Callable[[int, list[str]], None],
+        debounce: float = INDEXING_WATCH_DEBOUNCE_MS / 1000,
+        max_delay: float = INDEXING_WATCH_MAX_DELAY_MS / 1000,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self._dispatch = dispatch
+        self._debounce = debounce
+        self._max_delay = max_delay
+        self._clock = clock
+        self._pending: dict[int, _PendingChanges] = {}
+        self._lock = Lock()
+
+    def add(self, project_id: int, path: str) -> None:
+        """Adds a changed path of a project."""
+        now = self._clock()
+        with self._lock:
+            pending = self._pending.get(project_id)
+            if pending is None:
+                pending = self._pending[project_id] = _PendingChanges(now, now)
+            pending.last_changed_at = now
+            pending.paths.add(path)
+
+    def flush(self, force: bool = False) -> None:
+        """Dispatches the changed paths of projects which are due, or of all projects if `force`."""
+        now = self._clock()
+        with self._lock:
+            due_project_ids = [
+                project_id
+                for project_id, pending in self._pending.items()
+                if force
+                or now - pending.last_changed_at >= self._debounce
+                or now - pending.first_changed_at >= self._max_delay
+            ]
+            due_changes = [
+                (project_id, self._pending.pop(project_id)) for project_id in due_project_ids
+            ]
+
+        # dispatch outside the lock, so new changes can be added in the meantime. Changes that
+        # failed to dispatch are retried with the next flush
+        for project_id, pending in due_changes:
+            try:
+                self._dispatch(project_id, sorted(pending.paths))
+            except Exception as e:
+                logger.error(f"watcher ({project_id}): failed to dispatch changes: {e}")
+                for path in pending.paths:
+                    self.add(project_id, path)
+
+
+class _ProjectEventHandler(FileSystemEventHandler):
+    """Adds the indexable paths of a project's filesystem events to a debouncer."""
+
+    def __init__(
+        self,
+        project_id: int,
+        project_root: Path,
+        debouncer: ChangeDebouncer,
+        skip_pattern: re.Pattern[str],
+    ) -> None:
+        self._project_id = project_id
+        self._project_root = project_root
+        self._debouncer = debouncer
+        self._skip_pattern = skip_pattern
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        # directory modifications are reported by the events of their entries
+        if event.event_type not in _WATCHED_EVENT_TYPES:
+            return
+        if event.is_directory and event.event_type == EVENT_TYPE_MODIFIED:
+            return
+
+        # moves are a deletion of the source and a creation of the destination
+        for path in (event.src_path, event.dest_path):
+            path = os.fsdecode(path)
+            if path and self._is_indexable(Path(path), event.is_directory):
+                self._debouncer.add(self._project_id, path)
+
+    def _is_indexable(self, path: Path, is_directory: bool) -> bool:
+        if not path.is_relative_to(self._project_root) or path == self._project_root:
+            return False
+
+        parts = path.relative_to(self._project_root).parts
+        if any(self._skip_pattern.match(part) for part in parts[:-1]):
+            return False
+        if is_directory:
+            return self._skip_pattern.match(parts[-1]) is None
+        return path.suffix in INDEXED_FILETYPES
+
+
+class ProjectWatcher:
+    """Watches the roots of all projects for changes, and dispatches the changed paths of each
+    project for indexing once debounced. Projects are refreshed every `refresh_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        dispatch: Callable[[int, list[str]], None],
+        *,
+        directory_skip_pattern: str = DIRECTORY_SKIP_INDEXING_PATTERN,
+        debounce: float = INDEXING_WATCH_DEBOUNCE_MS / 1000,
+        max_delay: float = INDEXING_WATCH_MAX_DELAY_MS / 1000,
+        refresh_interval: float = INDEXING_WATCH_REFRESH_INTERVAL,
+    ) -> None:
+        self._debouncer = ChangeDebouncer(dispatch, debounce, max_delay)
+        self._skip_pattern = re.compile(directory_skip_pattern)
+        self._poll_interval = min(debounce, max_delay) / 2
+        self._refresh_interval = refresh_interval
+        self._observer: BaseObserver = Observer()
+        self._watches: dict[int, tuple[str, ObservedWatch]] = {}
+
+    def refresh(self) -> None:
+        """Starts watching new projects, and stops watching deleted or moved projects."""
+        with get_session() as session:
+            project_roots = dict(session.execute(select(Project.id, Project.root_path)).tuples())
+
+        for project_id, (root_path, watch) in list(self._watches.items()):
+            if project_roots.get(project_id) != root_path:
+                self._observer.unschedule(watch)
+                del self._watches[project_id]
+                logger.info(f"watcher ({project_id}): stopped watching {root_path}")
+
+        for project_id, root_path in project_roots.items():
+            if project_id in self._watches or not os.path.isdir(root_path):
+                continue
+            handler = _ProjectEventHandler(
+                project_id, Path(root_path), self._debouncer, self._skip_pattern
+            )
+            try:
+                watch = self._observer.schedule(handler, root_path, recursive=True)
+            except OSError as e:
+                logger.error(f"watcher ({project_id}): could not watch {root_path}: {e}")
+                continue
+            self._watches[project_id] = (root_path, watch)
+            logger.info(f"watcher ({project_id}): started watching {root_path}")
+
+    def run(self) -> None:
+        """Watches until interrupted, dispatching any remaining changes before returning."""
+        self._observer.start()
+        last_refreshed_at: float | None = None
+        try:
+            while True:
+                if last_refreshed_at is None or (
+                    monotonic() - last_refreshed_at >= self._refresh_interval
+                ):
+                    self.refresh()
+                    last_refreshed_at = monotonic()
+
+                self._debouncer.flush()
+                time.sleep(self._poll_interval)
+        finally:
+            self._observer.stop()
+            self._observer.join()
+            self._debouncer.flush(force=True)
+
+
+def main() -> None:
+    SqlEngine.init_engine()
+    if not wait_for_redis() or not wait_for_db():
+        raise SystemExit(1)
+
+    celery_app = Celery(__name__)
+    celery_app.config_from_object("codegraph.celery.configs.shared_default")
+
+    def _send_indexing_task(project_id: int, paths: list[str]) -> None:
+        logger.info(f"watcher ({project_id}): queued {len(paths)} changed paths")
+        celery_app.send_task(
+            CeleryTask.RUN_INDEXING,
+            kwargs={"project_id": project_id, "paths": paths},
+            queue=CeleryQueue.INDEXING,
+            priority=CeleryPriority.HIGH,  # above the periodic full indexing
+        )
+
+    try:
+        ProjectWatcher(_send_indexing_task).run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -50,16 +50,44 @@ class IndexingStep(str, Enum):
     COMPLETE = "complete"
 
 
-INDEXING_STEP_ORDER = (IndexingStep.DEFINITIONS, IndexingStep.REFERENCES, IndexingStep.VECTOR)
+# vector indexing only needs the file's own definitions, so it runs before the references, which
+# need the definitions of every file. Files without codegraph support skip from VECTOR to COMPLETE
+INDEXING_STEP_ORDER = (IndexingStep.DEFINITIONS, IndexingStep.VECTOR, IndexingStep.REFERENCES)
 NEXT_INDEXING_STEPS = {
-    IndexingStep.DEFINITIONS: IndexingStep.REFERENCES,
-    IndexingStep.REFERENCES: IndexingStep.VECTOR,
-    IndexingStep.VECTOR: IndexingStep.COMPLETE,
+    IndexingStep.DEFINITIONS: IndexingStep.VECTOR,
+    IndexingStep.VECTOR: IndexingStep.REFERENCES,
+    IndexingStep.REFERENCES: IndexingStep.COMPLETE,
 }
 
 
+class IndexingStage(str, Enum):
+    DISCOVERY = "discovery"
+    DEFINITIONS = "definitions"  # per file, as the indexing steps
+    VECTOR = "vector"
+    REFERENCES = "references"
+    PARSING = "parsing"  # nested in the per file stages
+    CHUNKING = "chunking"
+    TOKEN_COUNTING = "token_counting"
+    VECTOR_STORE = "vector_store"
+    EMBEDDING = "embedding"
+
+
+class StageMetrics(BaseModel):
+    wall_time: timedelta  # from the stage's first start to its last end
+    busy_time: timedelta  # summed over the threads running the stage
+    files: int
+    chunks: int
+    bytes: int
+    tokens: int
+    db_queries: int
+    model_calls: int
+    p50_file_latency: timedelta | None
+    p95_file_latency: timedelta | None
+
+
 class IndexingStatus(BaseModel):
     start_time: datetime
     duration: timedelta
     codegraph_indexed_paths: list[Path]
     vector_indexed_paths: list[Path]
+    stages: dict[IndexingStage, StageMetrics] = {}
@@ -17,7 +17,8 @@ from codegraph.configs.app_configs import (
 )
 from codegraph.configs.indexing import EMBEDDING_MODEL, EMBEDDING_SPACE, NUM_RETRIEVED_CHUNKS
 from codegraph.db.models import File
-from codegraph.graph.models import Chunk, InferenceChunk
+from codegraph.graph.indexing.metrics import measure_stage
+from codegraph.graph.models import Chunk, IndexingStage, InferenceChunk
 from codegraph.index.chunk_utils import (
     doc_to_chunk,
     doc_to_inference_chunk,
@@ -25,7 +26,7 @@ from codegraph.index.chunk_utils import (
     get_chunk_doc_metadata,
     get_doc_id,
 )
-from codegraph.model_service.client import embed_texts
+from codegraph.index.embedding_cache import EmbeddingCache
 from codegraph.utils.logging import get_logger
 
 logger = get_logger()
@@ -35,14 +36,26 @@ class ChromaIndexManager:
     """A class that manages the ChromaIndex and embedding model."""
 
     class Embedder(EmbeddingFunction[Embeddable]):
+        _cache: EmbeddingCache | None = None
+
         def __init__(self) -> None:
             pass
 
         def __call__(self, input: Embeddable) -> Embeddings:
-            return cast(
-                Embeddings,
-                embed_texts(cast(list[str], input), normalize=EMBEDDING_SPACE == "cosine"),
-            )
+            with measure_stage(IndexingStage.EMBEDDING):
+                return cast(
+                    Embeddings,
+                    self.get_cache().embed(
+                        cast(list[str], input), normalize=EMBEDDING_SPACE == "cosine"
+                    ),
+                )
+
+        @classmethod
+        def get_cache(cls) -> EmbeddingCache:
+            """Returns the embedding cache shared by all embedders in this process."""
+            if cls._cache is None:
+                cls._cache = EmbeddingCache()
+            return cls._cache
 
         @staticmethod
         def name() -> str:
@@ -104,6 +117,59 @@ class ChromaIndex:
             metadatas=[get_chunk_doc_metadata(chunk) for chunk in chunks],
         )
 
+    def replace(self, file: File, chunks: list[Chunk]) -> None:
+        """Replaces the chunks indexed for `file` (as given by `file.chunks`) with `chunks`. Chunks
+        whose text was already indexed for this file reuse the existing embeddings instead of being
+        re-embedded, and previous chunks past the end of `chunks` are deleted. Does not modify the
+        `file` database object.
+        """
+        self.replace_batch([(file.id, file.chunks, chunks)])
+
+    def replace_batch(self, replacements: list[tuple[UUID, int, list[Chunk]]]) -> None:
+        """Replaces the chunks of many files at once (see `replace`), given as the file id, its
+        number of previously indexed chunks, and its new chunks. The previous embeddings are read
+        in one request, the new texts are embedded in one batch, and all chunks are upserted in
+        one request.
+        """
+        with measure_stage(IndexingStage.VECTOR_STORE):
+            self._replace_batch(replacements)
+
+    def _replace_batch(self, replacements: list[tuple[UUID, int, list[Chunk]]]) -> None:
+        prev_chunk_ids = [
+            get_doc_id(file_id, chunk_id)
+            for file_id, num_prev_chunks, _ in replacements
+            for chunk_id in range(num_prev_chunks)
+        ]
+        chunks = [chunk for _, _, file_chunks in replacements for chunk in file_chunks]
+
+        # find embeddings of previously indexed chunks
+        embeddings: dict[str, Any] = {}
+        if prev_chunk_ids:
+            results = self.collection.get(ids=prev_chunk_ids, include=["documents", "embeddings"])
+            if results["documents"] is not None and results["embeddings"] is not None:
+                embeddings = dict(zip(results["documents"], results["embeddings"]))
+
+        # embed the new texts, and upsert all chunks with their new or previous embeddings
+        new_texts = list(dict.fromkeys(c.text for c in chunks if c.text not in embeddings))
+        if new_texts:
+            embeddings.update(zip(new_texts, ChromaIndexManager.Embedder()(new_texts)))
+        if chunks:
+            self.collection.upsert(
+                ids=[get_chunk_doc_id(chunk) for chunk in chunks],
+                embeddings=[embeddings[chunk.text] for chunk in chunks],
+                documents=[chunk.text for chunk in chunks],
+                metadatas=[get_chunk_doc_metadata(chunk) for chunk in chunks],
+            )
+
+        # delete chunks that no longer exist
+        stale_chunk_ids = [
+            get_doc_id(file_id, chunk_id)
+            for file_id, num_prev_chunks, file_chunks in replacements
+            for chunk_id in range(len(file_chunks), num_prev_chunks)
+        ]
+        if stale_chunk_ids:
+            self.collection.delete(ids=stale_chunk_ids)
+
     def delete(self, file: File) -> None:
         """Deletes chunks associated with the given `file`. Does not modify the `file` database
         object."""
@@ -115,11 +181,12 @@ class ChromaIndex:
         """Deletes chunks associated with the given list of `file_ids`. Does not modify the `File`
         database objects. The `File` objects must still exist for this function to work.
         """
-        chunk_ids: list[str] = []
-        for row in session.query(File.id, File.chunks).filter(File.id.in_(file_ids)).all():
-            chunk_ids.extend(get_doc_id(row.id, chunk_id) for chunk_id in range(row.chunks))
-        if chunk_ids:
-            self.collection.delete(ids=chunk_ids)
+        with measure_stage(IndexingStage.VECTOR_STORE):
+            chunk_ids: list[str] = []
+            for row in session.query(File.id, File.chunks).filter(File.id.in_(file_ids)).all():
+                chunk_ids.extend(get_doc_id(row.id, chunk_id) for chunk_id in range(row.chunks))
+            if chunk_ids:
+                self.collection.delete(ids=chunk_ids)
 
     def query(
         self,
@@ -0,0 +1,139 @@
+from collections import deque
+from concurrent.futures import Future
+from contextvars import copy_context
+from dataclasses import dataclass, field
+from threading import Condition, Thread
+from time import monotonic
+from types import TracebackType
+from uuid import UUID
+
+from codegraph.configs.indexing import INDEXING_VECTOR_BATCH_CHUNKS, INDEXING_VECTOR_BATCH_WAIT_MS
+from codegraph.graph.models import Chunk
+from codegraph.index.chroma import ChromaIndex
+from codegraph.utils.logging import get_logger
+
+logger = get_logger()
+
+
+@dataclass
+class _Replacement:
+    file_id: UUID
+    num_prev_chunks: int
+    chunks: list[Chunk]
+    submitted_at: float
+    future: Future[None] = field(default_factory=Future)
+
+
+class ChromaBatchWriter:
+    """A bounded background writer, which replaces the chunks of many files in the index at once
+    (see `ChromaIndex.replace_batch`). Replacements are written once `max_batch_chunks` chunks are
+    pending, or `max_batch_wait` seconds after the first pending one. Adding a replacement blocks
+    while `max_pending_chunks` chunks are already pending.
+
+    Each replacement's future completes once its chunks are written, or fails with the error of
+    its batch, so a file should only be marked as indexed once its future completes. Batches are
+    written in a copy of the context the writer was started in (e.g., to measure them in the
+    active indexing metrics).
+    """
+
+    def __init__(
+        self,
+        index: ChromaIndex,
+        max_batch_chunks: int = INDEXING_VECTOR_BATCH_CHUNKS,
+        max_batch_wait: float = INDEXING_VECTOR_BATCH_WAIT_MS / 1000,
+        max_pending_chunks: int | None = None,
+    ) -> None:
+        self._index = index
+        self._max_batch_chunks = max(1, max_batch_chunks)
+        self._max_batch_wait = max_batch_wait
+        self._max_pending_chunks = max_pending_chunks or 4 * self._max_batch_chunks
+
+        self._condition = Condition()
+        self._pending: deque[_Replacement] = deque()
+        self._num_pending_chunks = 0
+        self._closed = False
+        self._thread: Thread | None = None
+
+    def __enter__(self) -> "ChromaBatchWriter":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """Starts writing in the background."""
+        context = copy_context()
+        self._thread = Thread(target=context.run, args=(self._run,), daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Writes the remaining replacements, and stops writing."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def replace(self, file_id: UUID, num_prev_chunks: int, chunks: list[Chunk]) -> Future[None]:
+        """Adds the replacement of a file's `num_prev_chunks` previously indexed chunks with
+        `chunks`, and returns a future completing once it's written.
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Chroma writer is closed")
+
+            # a file with more chunks than can be pending is still let through once none are
+            while self._pending and (
+                self._num_pending_chunks + len(chunks) > self._max_pending_chunks
+            ):
+                self._condition.wait()
+
+            replacement = _Replacement(file_id, num_prev_chunks, chunks, monotonic())
+            self._pending.append(replacement)
+            self._num_pending_chunks += len(chunks)
+            self._condition.notify_all()
+        return replacement.future
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+
+                # wait for the batch to fill up, until the oldest replacement waited long enough
+                while (
+                    not self._closed
+                    and self._num_pending_chunks < self._max_batch_chunks
+                    and (wait := self._pending[0].submitted_at + self._max_batch_wait - monotonic())
+                    > 0
+                ):
+                    self._condition.wait(wait)
+
+                batch = [self._pending.popleft()]
+                num_chunks = len(batch[0].chunks)
+                while (
+                    self._pending
+                    and num_chunks + len(self._pending[0].chunks) <= self._max_batch_chunks
+                ):
+                    batch.append(self._pending.popleft())
+                    num_chunks += len(batch[-1].chunks)
+                self._num_pending_chunks -= num_chunks
+                self._condition.notify_all()
+
+            try:
+                self._index.replace_batch([(r.file_id, r.num_prev_chunks, r.chunks) for r in batch])
+            except Exception as e:
+                logger.error(f"Failed to write {num_chunks} chunks of {len(batch)} files: {e}")
+                for replacement in batch:
+                    replacement.future.set_exception(e)
+            else:
+                for replacement in batch:
+                    replacement.future.set_result(None)
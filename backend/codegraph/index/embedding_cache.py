@@ -0,0 +1,115 @@
+from hashlib import sha256
+from threading import Lock
+from typing import cast
+
+import numpy as np
+from redis.exceptions import RedisError
+
+from codegraph.configs.indexing import EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_TTL, EMBEDDING_MODEL
+from codegraph.graph.indexing.metrics import record
+from codegraph.model_service.client import embed_texts
+from codegraph.redis.client import get_redis_client
+from codegraph.utils.logging import get_logger
+from codegraph.utils.lru_cache import LRUCache
+
+logger = get_logger()
+
+_REDIS_KEY_PREFIX = "embedding"
+
+
+class EmbeddingCache:
+    """A thread-safe, two-tier cache of text embeddings, keyed by the embedding model, whether the
+    embedding is normalized, and the hash of the text. Embeddings are looked up in-process first,
+    then in Redis, and only the remaining texts are embedded by the model server. Redis errors are
+    logged and otherwise ignored.
+    """
+
+    def __init__(
+        self, local_size: int = EMBEDDING_CACHE_SIZE, ttl: int = EMBEDDING_CACHE_TTL
+    ) -> None:
+        self._local: LRUCache[str, np.ndarray] = LRUCache(local_size)
+        self._redis = get_redis_client()
+        self._ttl = ttl
+
+        self._stats_lock = Lock()
+        self._redis_hits = 0
+        self._misses = 0
+
+    def embed(self, texts: list[str], normalize: bool) -> list[np.ndarray]:
+        """Returns the float32 embedding of each text."""
+        keys = [_get_key(text, normalize) for text in texts]
+        embeddings = [self._local.get(key) for key in keys]
+
+        # look up local misses in redis
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        redis_hits = 0
+        if missing:
+            for i, value in zip(missing, self._redis_get([keys[i] for i in missing])):
+                if value is not None:
+                    embedding = np.frombuffer(value, dtype=np.float32)
+                    self._local.put(keys[i], embedding)
+                    embeddings[i] = embedding
+                    redis_hits += 1
+
+        # embed remaining texts once each
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            missing_texts = {keys[i]: texts[i] for i in missing}
+            record(model_calls=1)
+            missing_embeddings = embed_texts(list(missing_texts.values()), normalize=normalize)
+            if len(missing_embeddings) != len(missing_texts):
+                raise ValueError(
+                    f"Model server returned {len(missing_embeddings)} embeddings for "
+                    f"{len(missing_texts)} texts"
+                )
+            new_embeddings = {
+                key: np.asarray(embedding, dtype=np.float32)
+                for key, embedding in zip(missing_texts, missing_embeddings)
+            }
+            for key, embedding in new_embeddings.items():
+                self._local.put(key, embedding)
+            self._redis_set(new_embeddings)
+
+            for i in missing:
+                embeddings[i] = new_embeddings[keys[i]]
+
+        with self._stats_lock:
+            self._redis_hits += redis_hits
+            self._misses += len(missing)
+
+        return cast(list[np.ndarray], embeddings)  # every missing embedding was filled
+
+    def log_stats(self) -> None:
+        """Logs the hit rate of each tier since the cache was created."""
+        local_hits = self._local.hits
+        with self._stats_lock:
+            redis_hits = self._redis_hits
+            misses = self._misses
+
+        total = local_hits + redis_hits + misses
+        hit_rate = (local_hits + redis_hits) / total if total else 0.0
+        logger.info(
+            f"Embedding cache: {local_hits} local hits, {redis_hits} redis hits, {misses} misses "
+            f"(hit rate {hit_rate:.1%})"
+        )
+
+    def _redis_get(self, keys: list[str]) -> list[bytes | None]:
+        try:
+            return cast(list[bytes | None], self._redis.mget(keys))
+        except RedisError as e:
+            logger.warning(f"Embedding cache: failed to read from redis: {e}")
+            return [None] * len(keys)
+
+    def _redis_set(self, embeddings: dict[str, np.ndarray]) -> None:
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for key, embedding in embeddings.items():
+                pipe.set(key, embedding.tobytes(), ex=self._ttl)
+            pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Embedding cache: failed to write to redis: {e}")
+
+
+def _get_key(text: str, normalize: bool) -> str:
+    text_hash = sha256(text.encode("utf-8")).hexdigest()
+    return f"{_REDIS_KEY_PREFIX}:{EMBEDDING_MODEL}:{int(normalize)}:{text_hash}"
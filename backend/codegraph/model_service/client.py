@@ -1,42 +1,89 @@
+import asyncio
+import os
+from threading import Lock
 from time import monotonic, sleep
 
+import httpx
+import numpy as np
 import requests
+from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from codegraph.configs.app_configs import (
+    MODEL_SERVER_CLIENT_CONNECT_TIMEOUT,
+    MODEL_SERVER_CLIENT_MAX_RETRIES,
+    MODEL_SERVER_CLIENT_POOL_SIZE,
+    MODEL_SERVER_CLIENT_READ_TIMEOUT,
+    MODEL_SERVER_CLIENT_RETRY_BACKOFF,
     MODEL_SERVER_HOST,
     MODEL_SERVER_PORT,
     READINESS_INTERVAL,
     READINESS_TIMEOUT,
 )
 from codegraph.model_service.shared_models import (
+    EMBEDDINGS_MEDIA_TYPE,
+    CountTokensBatchRequest,
+    CountTokensBatchResponse,
     CountTokensRequest,
     CountTokensResponse,
     EmbedRequest,
     EmbedResponse,
+    decode_embeddings,
 )
 from codegraph.utils.logging import get_logger
 
 logger = get_logger()
 
+_BASE_URL = f"http://{MODEL_SERVER_HOST}:{MODEL_SERVER_PORT}"
+_TIMEOUT = (MODEL_SERVER_CLIENT_CONNECT_TIMEOUT, MODEL_SERVER_CLIENT_READ_TIMEOUT)
+_RETRY_STATUSES = (502, 503, 504)
+_EMBED_HEADERS = {"Accept": f"{EMBEDDINGS_MEDIA_TYPE}, application/json;q=0.5"}
+
+_session: requests.Session | None = None
+_session_pid: int | None = None
+_session_lock = Lock()
+
+_async_client: httpx.AsyncClient | None = None
+_async_client_loop: asyncio.AbstractEventLoop | None = None
+
 
 def count_tokens(text: str) -> int:
     req = CountTokensRequest(text=text)
-    resp = requests.post(
-        f"http://{MODEL_SERVER_HOST}:{MODEL_SERVER_PORT}/count_tokens", json=req.model_dump()
-    )
-    resp.raise_for_status()
-    result = CountTokensResponse(**resp.json())
-    return result.token_count
+    resp = _post("/count_tokens", req)
+    return CountTokensResponse.model_validate_json(resp.content).token_count
 
 
-def embed_texts(texts: list[str], normalize: bool = True) -> list[list[float]]:
+def count_tokens_batch(texts: list[str]) -> list[int]:
+    req = CountTokensBatchRequest(texts=texts)
+    resp = _post("/count_tokens_batch", req)
+    return CountTokensBatchResponse.model_validate_json(resp.content).token_counts
+
+
+def embed_texts(texts: list[str], normalize: bool = True) -> np.ndarray:
+    """Returns the float32 embedding of each text as a row of a read-only 2D array."""
     req = EmbedRequest(texts=texts, normalize=normalize)
-    resp = requests.post(
-        f"http://{MODEL_SERVER_HOST}:{MODEL_SERVER_PORT}/embed", json=req.model_dump()
-    )
-    resp.raise_for_status()
-    result = EmbedResponse(**resp.json())
-    return result.embeddings
+    resp = _post("/embed", req, headers=_EMBED_HEADERS)
+    return _parse_embeddings(resp.headers.get("Content-Type", ""), resp.content)
+
+
+async def count_tokens_async(text: str) -> int:
+    req = CountTokensRequest(text=text)
+    resp = await _post_async("/count_tokens", req)
+    return CountTokensResponse.model_validate_json(resp.content).token_count
+
+
+async def count_tokens_batch_async(texts: list[str]) -> list[int]:
+    req = CountTokensBatchRequest(texts=texts)
+    resp = await _post_async("/count_tokens_batch", req)
+    return CountTokensBatchResponse.model_validate_json(resp.content).token_counts
+
+
+async def embed_texts_async(texts: list[str], normalize: bool = True) -> np.ndarray:
+    """Returns the float32 embedding of each text as a row of a read-only 2D array."""
+    req = EmbedRequest(texts=texts, normalize=normalize)
+    resp = await _post_async("/embed", req, headers=_EMBED_HEADERS)
+    return _parse_embeddings(resp.headers.get("Content-Type", ""), resp.content)
 
 
 def wait_for_model_server() -> bool:
@@ -47,7 +94,7 @@ def wait_for_model_server() -> bool:
 
     while True:
         try:
-            if requests.get(f"http://{MODEL_SERVER_HOST}:{MODEL_SERVER_PORT}/health"):
+            if _get_session().get(f"{_BASE_URL}/health", timeout=_TIMEOUT):
                 ready = True
                 break
         except Exception:
@@ -69,3 +116,85 @@ def wait_for_model_server() -> bool:
 
     logger.info(f"Model Server: readiness probe succeeded")
     return True
+
+
+def _parse_embeddings(content_type: str, content: bytes) -> np.ndarray:
+    if content_type.startswith(EMBEDDINGS_MEDIA_TYPE):
+        return decode_embeddings(content)
+    result = EmbedResponse.model_validate_json(content)
+    return np.asarray(result.embeddings, dtype=np.float32)
+
+
+def _post(path: str, req: BaseModel, headers: dict[str, str] | None = None) -> requests.Response:
+    resp = _get_session().post(
+        f"{_BASE_URL}{path}", json=req.model_dump(), headers=headers, timeout=_TIMEOUT
+    )
+    resp.raise_for_status()
+    return resp
+
+
+async def _post_async(
+    path: str, req: BaseModel, headers: dict[str, str] | None = None
+) -> httpx.Response:
+    """Posts `req`, retrying on connection errors and `_RETRY_STATUSES` with exponential backoff
+    like the pooled session does.
+    """
+    client = _get_async_client()
+    for attempt in range(MODEL_SERVER_CLIENT_MAX_RETRIES):
+        try:
+            resp = await client.post(path, json=req.model_dump(), headers=headers)
+            if resp.status_code not in _RETRY_STATUSES:
+                return resp.raise_for_status()
+            logger.warning(f"Attempt {attempt + 1}: {path} returned {resp.status_code}")
+        except httpx.TransportError as e:
+            logger.warning(f"Attempt {attempt + 1}: failed to post to {path}: {e}")
+        await asyncio.sleep(MODEL_SERVER_CLIENT_RETRY_BACKOFF * 2**attempt)
+
+    resp = await client.post(path, json=req.model_dump(), headers=headers)
+    return resp.raise_for_status()
+
+
+def _get_session() -> requests.Session:
+    """Returns the pooled session of this process. Forked processes (e.g., celery workers) create
+    their own session, as sharing the parent's connections would interleave their requests.
+    """
+    global _session, _session_pid
+
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            retry = Retry(
+                total=MODEL_SERVER_CLIENT_MAX_RETRIES,
+                backoff_factor=MODEL_SERVER_CLIENT_RETRY_BACKOFF,
+                status_forcelist=_RETRY_STATUSES,
+                allowed_methods=None,  # every model server endpoint is idempotent
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=1, pool_maxsize=MODEL_SERVER_CLIENT_POOL_SIZE, max_retries=retry
+            )
+            _session = requests.Session()
+            _session.mount("http://", adapter)
+            _session_pid = os.getpid()
+        return _session
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    """Returns the pooled async client of the running event loop, created on first use. Clients
+    cannot be shared between event loops (e.g., between `asyncio.run` calls).
+    """
+    global _async_client, _async_client_loop
+
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop:
+        _async_client = httpx.AsyncClient(
+            base_url=_BASE_URL,
+            timeout=httpx.Timeout(
+                MODEL_SERVER_CLIENT_READ_TIMEOUT, connect=MODEL_SERVER_CLIENT_CONNECT_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=MODEL_SERVER_CLIENT_POOL_SIZE,
+                max_keepalive_connections=MODEL_SERVER_CLIENT_POOL_SIZE,
+            ),
+        )
+        _async_client_loop = loop
+    return _async_client
@@ -0,0 +1,100 @@
+from time import perf_counter
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from starlette.routing import Match
+
+# the default process collector also exports the server's resident memory and cpu time
+REQUESTS = Counter(
+    "model_server_requests_total", "Requests handled, by route", ["method", "route", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "model_server_request_duration_seconds",
+    "Time to handle a request, by route",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+QUEUE_DEPTH = Gauge("model_server_queue_depth", "Embed requests waiting to be batched")
+BATCH_REQUESTS = Histogram(
+    "model_server_batch_requests",
+    "Embed requests per batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+BATCH_TEXTS = Histogram(
+    "model_server_batch_texts",
+    "Texts per batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048),
+)
+BATCH_DURATION = Histogram(
+    "model_server_batch_duration_seconds",
+    "Time to embed a batch",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+EMBEDDED_TEXTS = Counter("model_server_embedded_texts_total", "Texts embedded")
+EMBEDDED_TOKENS = Counter("model_server_embedded_tokens_total", "Tokens embedded, without padding")
+PADDED_TOKENS = Counter("model_server_padded_tokens_total", "Tokens embedded, with padding")
+RETRIES = Counter("model_server_retries_total", "Failed attempts which were retried", ["function"])
+RETRY_TIME = Counter(
+    "model_server_retry_seconds_total",
+    "Time spent in calls which needed retries, including the waits between attempts",
+    ["function"],
+)
+DEVICE_MEMORY = Gauge(
+    "model_server_device_memory_bytes", "Memory used on the model's device", ["device", "kind"]
+)
+
+
+def observe_batch(
+    num_requests: int, num_texts: int, num_tokens: int, num_padded_tokens: int, duration: float
+) -> None:
+    """Records an embedded batch, and the time it took to embed it."""
+    BATCH_REQUESTS.observe(num_requests)
+    BATCH_TEXTS.observe(num_texts)
+    BATCH_DURATION.observe(duration)
+    EMBEDDED_TEXTS.inc(num_texts)
+    EMBEDDED_TOKENS.inc(num_tokens)
+    PADDED_TOKENS.inc(num_padded_tokens)
+
+
+def observe_retries(function: str, num_retries: int, duration: float) -> None:
+    """Records the retries of a call, and the time it took overall."""
+    RETRIES.labels(function).inc(num_retries)
+    RETRY_TIME.labels(function).inc(duration)
+
+
+def set_device_memory(device: str, memory: dict[str, int]) -> None:
+    """Sets the memory used on the device, by kind (e.g., allocated or reserved)."""
+    for kind, num_bytes in memory.items():
+        DEVICE_MEMORY.labels(device, kind).set(num_bytes)
+
+
+async def track_requests(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """A middleware recording the count and latency of requests by route template, so that paths
+    which match no route don't create a new label each.
+    """
+    route = next(
+        (
+            getattr(route, "path", "unmatched")
+            for route in request.app.routes
+            if route.matches(request.scope)[0] == Match.FULL
+        ),
+        "unmatched",
+    )
+
+    start = perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUEST_LATENCY.labels(request.method, route).observe(perf_counter() - start)
+        REQUESTS.labels(request.method, route, str(status)).inc()
+
+
+def metrics_response() -> Response:
+    """Returns the metrics in the Prometheus text format."""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
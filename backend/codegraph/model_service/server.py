@@ -1,22 +1,45 @@
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from typing import AsyncIterator, cast
+from time import perf_counter
+from typing import AsyncIterator
 
+import torch
 import torch.nn.functional as F
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse, Response
 
 from codegraph.configs.app_configs import (
+    MODEL_SERVER_BACKEND,
+    MODEL_SERVER_CPU_BATCH_WAIT_MS,
+    MODEL_SERVER_CPU_INFERENCE_THREADS,
+    MODEL_SERVER_CPU_MAX_BATCH_SIZE,
+    MODEL_SERVER_CPU_MAX_BATCH_TOKENS,
+    MODEL_SERVER_CPU_TORCH_THREADS,
     MODEL_SERVER_GPU_BATCH_WAIT_MS,
     MODEL_SERVER_GPU_MAX_BATCH_SIZE,
 )
 from codegraph.configs.indexing import EMBEDDING_MODEL
+from codegraph.model_service.metrics import (
+    QUEUE_DEPTH,
+    metrics_response,
+    observe_batch,
+    set_device_memory,
+    track_requests,
+)
 from codegraph.model_service.server_utils import (
+    EmbedStatsTracker,
     get_best_device,
+    get_device_memory,
     load_model,
     run_with_retry,
+    set_cpu_threads,
     use_gpu,
 )
 from codegraph.model_service.shared_models import (
+    EMBEDDINGS_MEDIA_TYPE,
+    CountTokensBatchRequest,
+    CountTokensBatchResponse,
     CountTokensRequest,
     CountTokensResponse,
     EmbedFuture,
@@ -24,6 +47,8 @@ from codegraph.model_service.shared_models import (
     EmbedRequest,
     EmbedResponse,
     HealthStatus,
+    ModelServerStats,
+    encode_embeddings,
 )
 from codegraph.utils.logging import get_logger
 
@@ -32,21 +57,39 @@ logger = get_logger()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
-    logger.info(f"Starting Model Server with model loaded on device={DEVICE}")
+    logger.info(
+        f"Starting Model Server with {MODEL_SERVER_BACKEND} model loaded on device={model.device}"
+    )
 
     # if using GPU, spawn batch worker tasks which handle GPU request batching
     if USE_GPU:
         asyncio.create_task(batch_worker())
+
+    # otherwise, spawn a batch worker per inference thread which handle CPU request batching
+    else:
+        set_cpu_threads(MODEL_SERVER_CPU_TORCH_THREADS)
+        logger.info(
+            f"Using {MODEL_SERVER_CPU_INFERENCE_THREADS} inference threads with "
+            f"{MODEL_SERVER_CPU_TORCH_THREADS} torch threads"
+        )
+        for _ in range(MODEL_SERVER_CPU_INFERENCE_THREADS):
+            asyncio.create_task(cpu_batch_worker())
     yield
 
 
 app = FastAPI(title="Model Server", lifespan=lifespan)
+app.middleware("http")(track_requests)
 
 
 DEVICE = get_best_device()
 USE_GPU = use_gpu()
-model = load_model(EMBEDDING_MODEL, DEVICE)
-queue: EmbedQueue | None = asyncio.Queue() if USE_GPU else None
+model = load_model(EMBEDDING_MODEL, DEVICE, MODEL_SERVER_BACKEND)
+queue: EmbedQueue = asyncio.Queue()
+cpu_inference_executor: ThreadPoolExecutor | None = (
+    None if USE_GPU else ThreadPoolExecutor(max_workers=MODEL_SERVER_CPU_INFERENCE_THREADS)
+)
+stats = EmbedStatsTracker()
+QUEUE_DEPTH.set_function(queue.qsize)
 
 
 @app.get("/health")
@@ -54,6 +97,21 @@ async def health_check() -> HealthStatus:
     return HealthStatus()
 
 
+@app.get("/stats")
+async def get_stats() -> ModelServerStats:
+    """Returns embedding statistics since the server started."""
+    return stats.snapshot()
+
+
+@app.get("/metrics")
+async def get_metrics() -> Response:
+    """Returns the Prometheus metrics of the server: request rates and latencies per route, the
+    depth of the embedding queue, batch sizes, embedded tokens, retries, and device memory.
+    """
+    set_device_memory(DEVICE, get_device_memory(DEVICE))
+    return metrics_response()
+
+
 @app.post("/count_tokens")
 async def tokenize(request: CountTokensRequest) -> CountTokensResponse:
     """Returns the token count for a given text."""
@@ -68,41 +126,49 @@ async def tokenize(request: CountTokensRequest) -> CountTokensResponse:
     return CountTokensResponse(token_count=tokens.shape[1])
 
 
-@app.post("/embed")
-async def embed(request: EmbedRequest) -> EmbedResponse:
-    """Returns a list of normalized embeddings for each text."""
+@app.post("/count_tokens_batch")
+async def tokenize_batch(request: CountTokensBatchRequest) -> CountTokensBatchResponse:
+    """Returns the token count for each text. Empty texts have a token count of 0."""
+    nonempty_texts = [text for text in request.texts if text]
+    if not nonempty_texts:
+        return CountTokensBatchResponse(token_counts=[0] * len(request.texts))
+
+    loop = asyncio.get_event_loop()
+    encodings = await loop.run_in_executor(
+        None, lambda: run_with_retry(model.tokenizer, nonempty_texts)
+    )
+
+    token_counts = iter(len(input_ids) for input_ids in encodings["input_ids"])
+    return CountTokensBatchResponse(
+        token_counts=[next(token_counts) if text else 0 for text in request.texts]
+    )
+
+
+@app.post("/embed", response_model=EmbedResponse)
+async def embed(request: EmbedRequest, accept: str | None = Header(default=None)) -> Response:
+    """Returns a list of normalized embeddings for each text. The embeddings are sent as
+    `EMBEDDINGS_MEDIA_TYPE` if the client accepts it, and as an `EmbedResponse` otherwise.
+    """
     if not request.texts:
         raise HTTPException(status_code=400, detail="Input texts list cannot be empty.")
     if not all(request.texts):
         raise HTTPException(status_code=400, detail="Input texts cannot contain empty strings.")
 
-    loop = asyncio.get_event_loop()
-
-    # CPU mode: run in thread pool for concurrency
-    if not USE_GPU:
-        logger.debug(f"Embedding {len(request.texts)} texts on the {DEVICE.upper()}")
-        embeddings = await loop.run_in_executor(
-            None,
-            lambda: run_with_retry(
-                model.encode,
-                request.texts,
-                convert_to_tensor=True,
-                normalize_embeddings=request.normalize,
-            ),
-        )
-        return EmbedResponse(embeddings=embeddings.tolist())
+    # enqueue request for batching
+    fut: EmbedFuture = asyncio.get_event_loop().create_future()
+    await queue.put((request, fut))
+    embeddings = await fut
 
-    # GPU mode: enqueue request for batching
-    fut: EmbedFuture = loop.create_future()
-    await cast(EmbedQueue, queue).put((request, fut))
-    return await fut
+    if accept is not None and EMBEDDINGS_MEDIA_TYPE in accept:
+        return Response(content=encode_embeddings(embeddings), media_type=EMBEDDINGS_MEDIA_TYPE)
+    return JSONResponse(content=EmbedResponse(embeddings=embeddings.tolist()).model_dump())
 
 
 async def batch_worker() -> None:
     """A worker which batches embedding requests in a `MODEL_SERVER_GPU_BATCH_WAIT_MS` window to
     maximize GPU throughput. Should only be used if the model is on the GPU.
     """
-    assert queue is not None
+    loop = asyncio.get_event_loop()
 
     while True:
         # wait for first request
@@ -122,28 +188,131 @@ async def batch_worker() -> None:
             except asyncio.QueueEmpty:
                 break
 
-        # embed batch and send embeddings back
+        # embed batch and send embeddings back, tokenizing in a thread to keep the event loop free
         try:
             logger.debug(
                 f"Embedding {len(batch_texts)} texts from {n_requests} requests on the GPU"
             )
-            embs = run_with_retry(
-                model.encode,
-                batch_texts,
-                batch_size=MODEL_SERVER_GPU_MAX_BATCH_SIZE,
-                convert_to_tensor=True,
-                normalize_embeddings=False,
+            token_lengths = await loop.run_in_executor(None, _get_token_lengths, batch_texts)
+            embs = _encode_bucketed(
+                batch_texts, token_lengths, MODEL_SERVER_GPU_MAX_BATCH_SIZE, n_requests
             )
+            _set_batch_results(futures, embs)
+        except Exception as e:
+            for _, fut in futures:
+                fut.set_exception(e)
+
 
-            # split embeddings back into individual requests
-            idx = 0
-            for request, fut in futures:
-                n = len(request.texts)
-                embeddings = embs[idx : idx + n]
-                if request.normalize:
-                    embeddings = F.normalize(embeddings, p=2, dim=1)
-                fut.set_result(EmbedResponse(embeddings=embeddings.tolist()))
-                idx += n
+async def cpu_batch_worker() -> None:
+    """A worker which batches embedding requests in a `MODEL_SERVER_CPU_BATCH_WAIT_MS` window, up
+    to `MODEL_SERVER_CPU_MAX_BATCH_TOKENS` tokens, and embeds the batch on a dedicated inference
+    thread. Should only be used if the model is not on the GPU.
+    """
+    assert cpu_inference_executor is not None
+    loop = asyncio.get_event_loop()
+
+    while True:
+        # wait for first request, tokenizing on an inference thread to keep the event loop free
+        request, fut = await queue.get()
+        batch_texts: list[str] = request.texts.copy()
+        try:
+            batch_token_lengths = await loop.run_in_executor(
+                cpu_inference_executor, _get_token_lengths, request.texts
+            )
+        except Exception as e:
+            fut.set_exception(e)
+            continue
+        batch_tokens = sum(batch_token_lengths)
+        futures = [(request, fut)]
+        n_requests = 1
+
+        # wait and collect more requests to embed as one batch, until the token budget is reached
+        await asyncio.sleep(MODEL_SERVER_CPU_BATCH_WAIT_MS / 1000)
+        while batch_tokens < MODEL_SERVER_CPU_MAX_BATCH_TOKENS and not queue.empty():
+            try:
+                request, fut = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            try:
+                token_lengths = await loop.run_in_executor(
+                    cpu_inference_executor, _get_token_lengths, request.texts
+                )
+            except Exception as e:
+                fut.set_exception(e)
+                continue
+            batch_texts.extend(request.texts)
+            batch_token_lengths.extend(token_lengths)
+            batch_tokens += sum(token_lengths)
+            futures.append((request, fut))
+            n_requests += 1
+
+        # embed batch on an inference thread and send embeddings back
+        try:
+            logger.debug(
+                f"Embedding {len(batch_texts)} texts ({batch_tokens} tokens) from {n_requests} "
+                f"requests on the {DEVICE.upper()}"
+            )
+            embs = await loop.run_in_executor(
+                cpu_inference_executor,
+                lambda: _encode_bucketed(
+                    batch_texts, batch_token_lengths, MODEL_SERVER_CPU_MAX_BATCH_SIZE, n_requests
+                ),
+            )
+            _set_batch_results(futures, embs)
         except Exception as e:
             for _, fut in futures:
                 fut.set_exception(e)
+
+
+def _get_token_lengths(texts: list[str]) -> list[int]:
+    """Returns the number of tokens the model will embed for each text, after truncation."""
+    encodings = run_with_retry(model.tokenizer, texts)
+    return [min(len(input_ids), model.max_seq_length) for input_ids in encodings["input_ids"]]
+
+
+def _encode_bucketed(
+    texts: list[str], token_lengths: list[int], max_batch_size: int, num_requests: int
+) -> torch.Tensor:
+    """Embeds `texts` (of `num_requests` requests) in buckets of at most `max_batch_size` texts
+    with similar token lengths, so that little compute is wasted on padding. Returns the embeddings
+    in the original order.
+    """
+    batch_start = perf_counter()
+    order = sorted(range(len(texts)), key=token_lengths.__getitem__)
+
+    sorted_embs: list[torch.Tensor] = []
+    padded_tokens = 0
+    for start in range(0, len(order), max_batch_size):
+        bucket = order[start : start + max_batch_size]
+        padded_tokens += len(bucket) * token_lengths[bucket[-1]]  # padded to longest in bucket
+        sorted_embs.append(
+            run_with_retry(
+                model.encode,
+                [texts[i] for i in bucket],
+                batch_size=len(bucket),
+                convert_to_tensor=True,
+                normalize_embeddings=False,
+            )
+        )
+    stats.record_batch(len(texts), sum(token_lengths), padded_tokens)
+    observe_batch(
+        num_requests, len(texts), sum(token_lengths), padded_tokens, perf_counter() - batch_start
+    )
+
+    # scatter embeddings back to their original positions
+    embs = torch.cat(sorted_embs)
+    unsorted_embs = torch.empty_like(embs)
+    unsorted_embs[torch.tensor(order, device=embs.device)] = embs
+    return unsorted_embs
+
+
+def _set_batch_results(futures: list[tuple[EmbedRequest, EmbedFuture]], embs: torch.Tensor) -> None:
+    """Splits the embeddings of a batch back into the individual requests."""
+    idx = 0
+    for request, fut in futures:
+        n = len(request.texts)
+        embeddings = embs[idx : idx + n]
+        if request.normalize:
+            embeddings = F.normalize(embeddings, p=2, dim=1)
+        fut.set_result(embeddings.float().cpu().numpy())
+        idx += n
@@ -1,14 +1,24 @@
-from time import sleep
+from pathlib import Path
+from threading import Lock
+from time import monotonic, sleep
 from typing import Any, Callable, Literal, TypeVar
 
+import onnxruntime as ort  # type: ignore[import-untyped]
 import torch
-from sentence_transformers import SentenceTransformer
+from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
 
 from codegraph.configs.app_configs import (
     MODEL_SERVER_ALLOW_USE_GPU,
+    MODEL_SERVER_CPU_TORCH_THREADS,
     MODEL_SERVER_MAX_RETRIES,
+    MODEL_SERVER_ONNX_CACHE_DIR,
+    MODEL_SERVER_ONNX_PARITY_CHECK,
+    MODEL_SERVER_ONNX_PARITY_THRESHOLD,
+    MODEL_SERVER_ONNX_QUANTIZATION,
     MODEL_SERVER_RETRY_WAIT_MS,
 )
+from codegraph.model_service.metrics import observe_retries
+from codegraph.model_service.shared_models import ModelServerStats
 from codegraph.utils.logging import get_logger
 
 logger = get_logger()
@@ -26,14 +36,128 @@ def use_gpu() -> bool:
     return MODEL_SERVER_ALLOW_USE_GPU and torch.cuda.is_available()
 
 
-def load_model(model_name: str, device: str) -> SentenceTransformer:
+def get_device_memory(device: str) -> dict[str, int]:
+    """Returns the bytes of memory allocated and reserved by torch on the GPU. The memory used on
+    the CPU is the process' own.
+    """
+    if device == "cuda":
+        return {
+            "allocated": torch.cuda.memory_allocated(),
+            "reserved": torch.cuda.memory_reserved(),
+        }
+    elif device == "mps":
+        return {
+            "allocated": torch.mps.current_allocated_memory(),
+            "reserved": torch.mps.driver_allocated_memory(),
+        }
+    return {}
+
+
+def set_cpu_threads(num_threads: int) -> None:
+    """Sets the number of threads torch uses for intra-op parallelism on the CPU."""
+    torch.set_num_threads(num_threads)
+
+
+# texts of varying length and content, used to compare the embeddings of different backends
+PARITY_CHECK_TEXTS = [
+    "hello world",
+    "def add(a: int, b: int) -> int:\n    return a + b",
+    "class Stack:\n    def __init__(self):\n        self.items = []\n\n"
+    "    def push(self, item):\n        self.items.append(item)\n\n"
+    "    def pop(self):\n        return self.items.pop()",
+    "Returns the token count for a given text, special tokens included.",
+    "for (let i = 0; i < n; i++) {\n  total += values[i] * weights[i];\n}",
+    "SELECT id, name FROM users WHERE created_at > NOW() - INTERVAL '1 day';",
+]
+
+
+def load_model(model_name: str, device: str, backend: str = "torch") -> SentenceTransformer:
+    """Loads the model with the given backend. The `onnx_int8` backend is only used on the CPU,
+    and falls back to torch if it fails the parity check.
+    """
+    if backend == "onnx_int8":
+        if device == "cuda":
+            logger.warning("The onnx_int8 backend only runs on the CPU, using torch on the GPU")
+        else:
+            return _load_quantized_model(model_name)
+    elif backend != "torch":
+        raise ValueError(f"Unknown model backend {backend}")
+
+    return _load_sentence_transformer(model_name, device=device)
+
+
+def get_min_cosine_similarity(
+    model: SentenceTransformer, reference_model: SentenceTransformer, texts: list[str]
+) -> float:
+    """Returns the lowest cosine similarity between the embeddings of `model` and
+    `reference_model` over `texts`.
+    """
+    embs = model.encode(texts, convert_to_tensor=True, normalize_embeddings=True).float().cpu()
+    reference_embs = (
+        reference_model.encode(texts, convert_to_tensor=True, normalize_embeddings=True)
+        .float()
+        .cpu()
+    )
+    return float((embs * reference_embs).sum(dim=1).min().item())
+
+
+def _load_quantized_model(model_name: str) -> SentenceTransformer:
+    """Loads the int8 quantized onnx model, exporting and quantizing it on first use."""
+    save_dir = Path(MODEL_SERVER_ONNX_CACHE_DIR) / "onnx" / model_name.replace("/", "--")
+    file_suffix = f"qint8_{MODEL_SERVER_ONNX_QUANTIZATION}"
+    file_name = f"onnx/model_{file_suffix}.onnx"
+
+    if not (save_dir / file_name).exists():
+        logger.info(f"Exporting {model_name} to {save_dir / file_name}")
+        onnx_model = _load_sentence_transformer(model_name, device="cpu", backend="onnx")
+        onnx_model.save(str(save_dir))
+        export_dynamic_quantized_onnx_model(
+            onnx_model,
+            MODEL_SERVER_ONNX_QUANTIZATION,  # type: ignore[arg-type]
+            str(save_dir),
+            file_suffix=file_suffix,
+        )
+        del onnx_model
+
+    # onnxruntime uses every core by default, which oversubscribes the CPU across inference threads
+    session_options = ort.SessionOptions()
+    session_options.intra_op_num_threads = MODEL_SERVER_CPU_TORCH_THREADS
+    model = SentenceTransformer(
+        str(save_dir),
+        device="cpu",
+        backend="onnx",
+        trust_remote_code=True,
+        local_files_only=True,
+        model_kwargs={
+            "file_name": file_name,
+            "provider": "CPUExecutionProvider",
+            "session_options": session_options,
+        },
+    )
+    if not MODEL_SERVER_ONNX_PARITY_CHECK:
+        return model
+
+    reference_model = _load_sentence_transformer(model_name, device="cpu")
+    similarity = get_min_cosine_similarity(model, reference_model, PARITY_CHECK_TEXTS)
+    if similarity < MODEL_SERVER_ONNX_PARITY_THRESHOLD:
+        logger.error(
+            f"Quantized model failed the parity check (min cosine similarity {similarity:.4f} < "
+            f"{MODEL_SERVER_ONNX_PARITY_THRESHOLD}), falling back to torch"
+        )
+        return reference_model
+
+    logger.info(f"Quantized model passed the parity check (min cosine similarity {similarity:.4f})")
+    return model
+
+
+def _load_sentence_transformer(model_name: str, **kwargs: Any) -> SentenceTransformer:
     """Loads the model from local cache, or fallback to downloading the model."""
     try:
         return SentenceTransformer(
-            model_name, device=device, trust_remote_code=True, local_files_only=True
+            model_name, trust_remote_code=True, local_files_only=True, **kwargs
         )
     except OSError:
-        return SentenceTransformer(model_name, device=device, trust_remote_code=True)
+        return SentenceTransformer(model_name, trust_remote_code=True, **kwargs)
 
 
 OutputType = TypeVar("OutputType")
@@ -42,15 +166,53 @@ OutputType = TypeVar("OutputType")
 def run_with_retry(fn: Callable[..., OutputType], *args: Any, **kwargs: Any) -> OutputType:
     """Runs `fn` a maximum of `MODEL_SERVER_MAX_RETRIES + 1` times, waiting
     `MODEL_SERVER_RETRY_WAIT_MS` on failure. Mainly intended to deal with the occasional
-    transformers library "RuntimeError: Already Borrowed" bug.
+    transformers library "RuntimeError: Already Borrowed" bug. Retries are recorded in the metrics.
     """
-    for i in range(MODEL_SERVER_MAX_RETRIES):
-        try:
-            return fn(*args, **kwargs)
-        except Exception as e:
-            logger.error(
-                f"Attempt {i+1}: "
-                f"Failed to run {fn.__name__} with args {args} and kwargs {kwargs}: {e}"
+    fn_name = getattr(fn, "__name__", type(fn).__name__)  # e.g., tokenizers are callable objects
+    start = monotonic()
+    num_retries = 0
+    try:
+        for i in range(MODEL_SERVER_MAX_RETRIES):
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                logger.error(
+                    f"Attempt {i+1}: "
+                    f"Failed to run {fn_name} with args {args} and kwargs {kwargs}: {e}"
+                )
+                num_retries += 1
+                sleep(MODEL_SERVER_RETRY_WAIT_MS / 1000)
+        return fn(*args, **kwargs)
+    finally:
+        if num_retries:
+            observe_retries(fn_name, num_retries, monotonic() - start)
+
+
+class EmbedStatsTracker:
+    """A thread-safe tracker of embedding statistics."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._num_batches = 0
+        self._num_texts = 0
+        self._num_tokens = 0
+        self._num_padded_tokens = 0
+
+    def record_batch(self, num_texts: int, num_tokens: int, num_padded_tokens: int) -> None:
+        with self._lock:
+            self._num_batches += 1
+            self._num_texts += num_texts
+            self._num_tokens += num_tokens
+            self._num_padded_tokens += num_padded_tokens
+
+    def snapshot(self) -> ModelServerStats:
+        with self._lock:
+            return ModelServerStats(
+                num_batches=self._num_batches,
+                num_texts=self._num_texts,
+                num_tokens=self._num_tokens,
+                num_padded_tokens=self._num_padded_tokens,
+                padding_efficiency=(
+                    self._num_tokens / self._num_padded_tokens if self._num_padded_tokens else 1.0
+                ),
             )
-            sleep(MODEL_SERVER_RETRY_WAIT_MS / 1000)
-    return fn(*args, **kwargs)
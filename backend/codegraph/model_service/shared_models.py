@@ -1,8 +1,15 @@
+import struct
 from asyncio import Future, Queue
 from typing import Literal
 
+import numpy as np
 from pydantic import BaseModel
 
+# media type of embeddings sent as a (rows, dim) little-endian uint32 header followed by the
+# embeddings as a row-major little-endian float32 buffer
+EMBEDDINGS_MEDIA_TYPE = "application/x-codegraph-embeddings"
+_EMBEDDINGS_HEADER = struct.Struct("<II")
+
 
 class HealthStatus(BaseModel):
     status: Literal["ok"] = "ok"
@@ -16,6 +23,14 @@ class CountTokensResponse(BaseModel):
     token_count: int
 
 
+class CountTokensBatchRequest(BaseModel):
+    texts: list[str]
+
+
+class CountTokensBatchResponse(BaseModel):
+    token_counts: list[int]
+
+
 class EmbedRequest(BaseModel):
     texts: list[str]
     normalize: bool
@@ -25,5 +40,28 @@ class EmbedResponse(BaseModel):
     embeddings: list[list[float]]
 
 
-EmbedFuture = Future[EmbedResponse]
+class ModelServerStats(BaseModel):
+    num_batches: int
+    num_texts: int
+    num_tokens: int
+    num_padded_tokens: int
+    padding_efficiency: float  # fraction of the embedded tokens which weren't padding
+
+
+def encode_embeddings(embeddings: np.ndarray) -> bytes:
+    """Encodes a 2D array of embeddings as `EMBEDDINGS_MEDIA_TYPE`."""
+    rows, dim = embeddings.shape
+    return _EMBEDDINGS_HEADER.pack(rows, dim) + embeddings.astype("<f4", copy=False).tobytes()
+
+
+def decode_embeddings(content: bytes) -> np.ndarray:
+    """Decodes `EMBEDDINGS_MEDIA_TYPE` into a read-only 2D float32 array backed by `content`."""
+    rows, dim = _EMBEDDINGS_HEADER.unpack_from(content)
+    embeddings = np.frombuffer(
+        content, dtype="<f4", count=rows * dim, offset=_EMBEDDINGS_HEADER.size
+    )
+    return embeddings.reshape(rows, dim)
+
+
+EmbedFuture = Future[np.ndarray]
 EmbedQueue = Queue[tuple[EmbedRequest, EmbedFuture]]
@@ -0,0 +1,65 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Generic, TypeVar
+
+KeyType = TypeVar("KeyType")
+ValueType = TypeVar("ValueType")
+
+
+class LRUCache(Generic[KeyType, ValueType]):
+    """A thread-safe least-recently-used cache holding entries of total size at most `max_size`.
+    Each entry has size 1 unless specified otherwise.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._data: OrderedDict[KeyType, tuple[ValueType, int]] = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size(self) -> int:
+        """The total size of all cached entries."""
+        return self._size
+
+    def get(self, key: KeyType) -> ValueType | None:
+        """Returns the cached value for `key`, or `None` if it isn't cached."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: KeyType, value: ValueType, size: int = 1) -> None:
+        """Caches `value` under `key`, evicting the least recently used entries if full. Values
+        larger than the cache are not cached.
+        """
+        if size > self._max_size:
+            return
+
+        with self._lock:
+            old_entry = self._data.pop(key, None)
+            if old_entry is not None:
+                self._size -= old_entry[1]
+
+            self._data[key] = (value, size)
+            self._size += size
+            while self._size > self._max_size:
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self._size -= evicted_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
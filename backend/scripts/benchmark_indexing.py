@@ -0,0 +1,395 @@
+"""Measures the end-to-end indexing throughput of synthetic repositories, stage by stage.
+
+Indexes against the configured Postgres, Chroma, and model server (e.g., the dev docker compose
+services), so the numbers include every database round trip and embedding request. Each stage runs
+in its own process so its peak memory can be measured:
+    - discover: walking the project and adding its files to the database
+    - index: parsing, chunking, embedding, and extracting references of all files
+    - reindex: re-indexing the project after a fraction of its files changed
+
+Results can be saved as a baseline, and later runs compared against it to catch regressions.
+
+Usage (from the backend directory):
+    PYTHONPATH=. python scripts/benchmark_indexing.py --num-files 100 1000 --save-baseline b.json
+    PYTHONPATH=. python scripts/benchmark_indexing.py --num-files 100 1000 --baseline b.json
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import random
+import resource
+import sys
+import tempfile
+import time
+from multiprocessing.queues import Queue
+from pathlib import Path
+from typing import Any
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+ENV_PATH = ROOT_DIR / ".vscode" / ".env"
+if ENV_PATH.exists():
+    load_dotenv(ENV_PATH)
+
+from sqlalchemy import event, func, select  # noqa: E402
+
+from codegraph.configs.indexing import INDEXED_FILETYPES  # noqa: E402
+from codegraph.db.engine import SqlEngine, get_session  # noqa: E402
+from codegraph.db.models import File, Project  # noqa: E402
+from codegraph.graph.indexing.pipeline import (  # noqa: E402
+    create_project,
+    discover_files,
+    index_files,
+    run_indexing,
+)
+from codegraph.index.chroma import ChromaIndexManager  # noqa: E402
+
+MODULES_PER_PACKAGE = 20
+LANGUAGES = ["python", "typescript", "go"]
+STAGES = ["discover", "index", "reindex"]
+WORDS = (
+    "graph index query node edge file chunk embed vector search parse symbol scope module "
+    "package class function method reference import export type value result cache batch"
+).split()
+
+# metrics compared against the baseline, and whether higher is better
+COMPARED_METRICS = {
+    "files_per_sec": True,
+    "chunks_per_sec": True,
+    "db_round_trips": False,
+    "peak_rss_mb": False,
+}
+
+
+def _python_module(i: int, imported: list[int], modules: dict[int, str], defs: int) -> str:
+    lines = [f"from {modules[j].replace('/', '.')} import Class{j}, func{j}" for j in imported]
+    bases = ", ".join(f"Class{j}" for j in imported[:1])
+    lines += ["", "", f"class Class{i}({bases}):"]
+    for d in range(defs):
+        j = imported[d % len(imported)] if imported else i
+        lines += [
+            f"    def method{d}(self, value: Class{j}) -> int:",
+            "        total = 0",
+            "        for item in value.items:",
+            f"            total += func{j}(item) + self.method0(item)",
+            "        return total",
+            "",
+        ]
+    if not defs:
+        lines += ["    pass", ""]
+    lines += ["", f"def func{i}(value):", f"    return Class{i}().method0(value)"]
+    return "\n".join(lines) + "\n"
+
+
+def _typescript_module(i: int, imported: list[int], modules: dict[int, str], defs: int) -> str:
+    package = modules[i].split("/")[0]
+    lines = [
+        f'import {{ Class{j}, func{j} }} from "'
+        + (f"./mod{j}" if modules[j].split("/")[0] == package else f"../{modules[j]}")
+        + '";'
+        for j in imported
+    ]
+    extends = f" extends Class{imported[0]}" if imported else ""
+    lines += ["", f"export class Class{i}{extends} {{"]
+    for d in range(defs):
+        j = imported[d % len(imported)] if imported else i
+        lines += [
+            f"  method{d}(value: Class{j}): number {{",
+            "    let total = 0;",
+            "    for (const item of value.items) {",
+            f"      total += func{j}(item) + this.method0(item);",
+            "    }",
+            "    return total;",
+            "  }",
+            "",
+        ]
+    lines += [
+        "}",
+        "",
+        f"export function func{i}(value: any): number {{",
+        f"  return new Class{i}().method0(value);",
+        "}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def _go_module(i: int, imported: list[int], modules: dict[int, str], defs: int) -> str:
+    package = modules[i].split("/")[0]
+    qualifiers = {
+        j: "" if modules[j].split("/")[0] == package else modules[j].split("/")[0] + "."
+        for j in imported
+    }
+    import_paths = sorted(
+        {f'"bench/{qualifier[:-1]}"' for qualifier in qualifiers.values() if qualifier}
+    )
+    lines = [f"package {package}", ""]
+    if import_paths:
+        lines += ["import (", *[f"\t{path}" for path in import_paths], ")", ""]
+    lines += [f"type Type{i} struct {{", "\tItems []int", "}", ""]
+    for d in range(defs):
+        j = imported[d % len(imported)] if imported else i
+        qualifier = qualifiers.get(j, "")
+        lines += [
+            f"func (t *Type{i}) Method{d}(value *{qualifier}Type{j}) int {{",
+            "\ttotal := 0",
+            "\tfor _, item := range value.Items {",
+            f"\t\ttotal += {qualifier}Func{j}(item)",
+            "\t}",
+            "\treturn total",
+            "}",
+            "",
+        ]
+    lines += [f"func Func{i}(value int) int {{", "\treturn value + 1", "}"]
+    return "\n".join(lines) + "\n"
+
+
+_MODULE_GENERATORS = {
+    "python": (".py", _python_module),
+    "typescript": (".ts", _typescript_module),
+    "go": (".go", _go_module),
+}
+
+
+def generate_repo(
+    root: Path,
+    num_files: int,
+    *,
+    languages: list[str] = LANGUAGES,
+    defs_per_file: int = 5,
+    imports_per_file: int = 5,
+    text_ratio: float = 0.1,
+    seed: int = 0,
+) -> None:
+    """Generates `num_files` files, a `text_ratio` fraction of which are markdown documents, and the
+    rest modules spread evenly across `languages`. Each module defines a class (or type) with
+    `defs_per_file` methods, and a function, which use definitions imported from up to
+    `imports_per_file` other modules of the same language.
+    """
+    rng = random.Random(seed)
+    num_texts = round(num_files * text_ratio)
+    num_modules = num_files - num_texts
+
+    modules_by_language: dict[str, dict[int, str]] = {language: {} for language in languages}
+    for i in range(num_modules):
+        language = languages[i % len(languages)]
+        modules_by_language[language][i] = f"{language[:2]}pkg{i // MODULES_PER_PACKAGE}/mod{i}"
+
+    for language, modules in modules_by_language.items():
+        suffix, generate_module = _MODULE_GENERATORS[language]
+        for i, module in modules.items():
+            candidates = [j for j in modules if j != i]
+            imported = rng.sample(candidates, min(imports_per_file, len(candidates)))
+            filepath = root / f"{module}{suffix}"
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            filepath.write_text(generate_module(i, imported, modules, defs_per_file))
+
+    for package_dir in {path.parent for path in root.rglob("*.py")}:
+        (package_dir / "__init__.py").touch()
+    if modules_by_language.get("go"):
+        (root / "go.mod").write_text("module bench\n\ngo 1.21\n")
+
+    for i in range(num_texts):
+        filepath = root / "docs" / f"doc{i // MODULES_PER_PACKAGE}" / f"doc{i}.md"
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        sections = [
+            f"## Section {s}\n\n" + " ".join(rng.choices(WORDS, k=rng.randint(40, 120)))
+            for s in range(rng.randint(2, 8))
+        ]
+        filepath.write_text(f"# Document {i}\n\n" + "\n\n".join(sections) + "\n")
+
+
+def change_files(root: Path, ratio: float, seed: int = 0) -> list[Path]:
+    """Appends a comment line to a `ratio` fraction of the generated files, and returns them."""
+    rng = random.Random(seed)
+    filepaths = sorted(
+        path
+        for path in root.rglob("*")
+        if path.suffix in INDEXED_FILETYPES and path.name != "__init__.py"
+    )
+    changed = rng.sample(filepaths, max(1, round(len(filepaths) * ratio)))
+    for filepath in changed:
+        comment = (
+            "#" if filepath.suffix == ".py" else "<!-- -->" if filepath.suffix == ".md" else "//"
+        )
+        with filepath.open("a") as f:
+            f.write(f"{comment} changed\n")
+    return changed
+
+
+def run_stage(
+    stage: str, project_id: int, parse_processes: int, results: "Queue[dict[str, Any]]"
+) -> None:
+    """Runs an indexing stage, and reports its duration, database round trips, and peak memory."""
+    SqlEngine.init_engine()
+    round_trips = 0
+
+    def _count_round_trip(*args: Any) -> None:
+        nonlocal round_trips
+        round_trips += 1
+
+    event.listen(SqlEngine.get_engine(), "before_cursor_execute", _count_round_trip)
+
+    start = time.perf_counter()
+    if stage == "discover":
+        discover_files(project_id, use_git=False)
+    elif stage == "index":
+        index_files(project_id, parse_processes=parse_processes)
+    else:
+        run_indexing(project_id, parse_processes=parse_processes, use_git=False)
+    duration = time.perf_counter() - start
+
+    # parse processes are children, and count towards the stage's memory
+    peak_rss = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    results.put(
+        {"seconds": duration, "db_round_trips": round_trips, "peak_rss_mb": peak_rss / 1024}
+    )
+
+
+def _count_files(project_id: int, paths: list[Path] | None = None) -> tuple[int, int]:
+    """Returns the number of (given) files of a project, and their number of chunks."""
+    query = select(func.count(File.id), func.coalesce(func.sum(File.chunks), 0)).filter(
+        File.project_id == project_id, File.content_hash.is_not(None)
+    )
+    if paths is not None:
+        query = query.filter(File.path.in_([path.resolve().as_posix() for path in paths]))
+    with get_session() as session:
+        num_files, num_chunks = session.execute(query).one()
+    return num_files, num_chunks
+
+
+def benchmark(
+    root: Path, changed_ratio: float, parse_processes: int
+) -> dict[str, dict[str, float]]:
+    ctx = mp.get_context("spawn")
+    project_id = create_project(f"benchmark-{root.name}", root)
+    report: dict[str, dict[str, float]] = {}
+    try:
+        changed: list[Path] | None = None
+        for stage in STAGES:
+            if stage == "reindex":
+                changed = change_files(root, changed_ratio)
+
+            results: "Queue[dict[str, Any]]" = ctx.Queue()
+            process = ctx.Process(
+                target=run_stage, args=(stage, project_id, parse_processes, results)
+            )
+            process.start()
+            metrics = results.get()
+            process.join()
+            if process.exitcode != 0:
+                raise RuntimeError(f"{stage} stage failed with exit code {process.exitcode}")
+
+            num_files, num_chunks = _count_files(project_id, changed)
+            metrics["files"] = num_files
+            metrics["chunks"] = num_chunks
+            metrics["files_per_sec"] = num_files / metrics["seconds"]
+            metrics["chunks_per_sec"] = num_chunks / metrics["seconds"]
+            report[stage] = metrics
+    finally:
+        with get_session() as session:
+            session.delete(session.get_one(Project, project_id))
+            session.commit()
+        ChromaIndexManager.delete_index(project_id)
+
+    return report
+
+
+def compare(
+    reports: dict[str, dict[str, dict[str, float]]],
+    baseline: dict[str, dict[str, dict[str, float]]],
+    tolerance: float,
+) -> list[str]:
+    """Returns the metrics of each repository size and stage which regressed by more than
+    `tolerance` (a fraction) from the baseline.
+    """
+    regressions: list[str] = []
+    for num_files, report in reports.items():
+        for stage, metrics in report.items():
+            baseline_metrics = baseline.get(num_files, {}).get(stage)
+            if baseline_metrics is None:
+                continue
+            for metric, higher_is_better in COMPARED_METRICS.items():
+                old, new = baseline_metrics.get(metric), metrics[metric]
+                if not old:
+                    continue
+                change = (new - old) / old
+                if (-change if higher_is_better else change) > tolerance:
+                    regressions.append(
+                        f"{num_files} files, {stage}: {metric} {old:.1f} -> {new:.1f} "
+                        f"({change:+.0%})"
+                    )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--num-files", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--languages", nargs="+", choices=LANGUAGES, default=LANGUAGES)
+    parser.add_argument("--defs-per-file", type=int, default=5)
+    parser.add_argument("--imports-per-file", type=int, default=5)
+    parser.add_argument("--text-ratio", type=float, default=0.1)
+    parser.add_argument("--changed-ratio", type=float, default=0.05)
+    parser.add_argument("--parse-processes", type=int, default=0)
+    parser.add_argument("--save-baseline", type=Path, help="path to save the results to")
+    parser.add_argument("--baseline", type=Path, help="path of results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    SqlEngine.init_engine()
+    config = {
+        "languages": args.languages,
+        "defs_per_file": args.defs_per_file,
+        "imports_per_file": args.imports_per_file,
+        "text_ratio": args.text_ratio,
+        "changed_ratio": args.changed_ratio,
+        "parse_processes": args.parse_processes,
+    }
+
+    print(
+        f"{'files':>8}{'stage':>10}{'seconds':>10}{'files/s':>10}{'chunks/s':>10}"
+        f"{'db trips':>10}{'peak rss (MB)':>15}"
+    )
+    reports: dict[str, dict[str, dict[str, float]]] = {}
+    for num_files in args.num_files:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            generate_repo(
+                root,
+                num_files,
+                languages=args.languages,
+                defs_per_file=args.defs_per_file,
+                imports_per_file=args.imports_per_file,
+                text_ratio=args.text_ratio,
+            )
+            report = benchmark(root, args.changed_ratio, args.parse_processes)
+        reports[str(num_files)] = report
+        for stage, metrics in report.items():
+            print(
+                f"{num_files:>8}{stage:>10}{metrics['seconds']:>10.2f}"
+                f"{metrics['files_per_sec']:>10.1f}{metrics['chunks_per_sec']:>10.1f}"
+                f"{metrics['db_round_trips']:>10.0f}{metrics['peak_rss_mb']:>15.0f}"
+            )
+
+    if args.save_baseline is not None:
+        args.save_baseline.write_text(json.dumps({"config": config, "results": reports}, indent=2))
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline["config"] != config:
+            print(f"Warning: baseline was run with {baseline['config']}", file=sys.stderr)
+        regressions = compare(reports, baseline["results"], args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            raise SystemExit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Compares the throughput, memory usage, and embeddings of the model server backends on the CPU.
+
+Usage (from the backend directory):
+    PYTHONPATH=. python scripts/benchmark_model_backends.py --backends torch onnx_int8
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import random
+import resource
+import time
+from multiprocessing.queues import Queue
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+ENV_PATH = ROOT_DIR / ".vscode" / ".env"
+if ENV_PATH.exists():
+    load_dotenv(ENV_PATH)
+
+IDENTIFIERS = ["value", "items", "result", "config", "node", "index", "total", "path", "count"]
+STATEMENTS = [
+    "{a} = {b} + {c}",
+    "if {a} > {b}:\n        return {c}",
+    "for {a} in {b}:\n        {c}.append({a})",
+    "{a} = {b}.get('{c}', None)",
+    "return {a}({b}, {c})",
+]
+
+
+def generate_texts(num_texts: int, seed: int = 0) -> list[str]:
+    """Generates python functions of widely varying length, similar to indexed code chunks."""
+    rng = random.Random(seed)
+    texts = []
+    for i in range(num_texts):
+        lines = [f"def function_{i}({', '.join(rng.sample(IDENTIFIERS, 2))}):"]
+        for _ in range(int(rng.lognormvariate(2, 1)) + 1):
+            a, b, c = rng.sample(IDENTIFIERS, 3)
+            lines.append("    " + rng.choice(STATEMENTS).format(a=a, b=b, c=c))
+        texts.append("\n".join(lines))
+    return texts
+
+
+def run_backend(
+    backend: str, texts: list[str], batch_size: int, results: "Queue[dict[str, Any]]"
+) -> None:
+    """Benchmarks a backend in its own process, so its peak memory usage can be measured."""
+    # the parity check would load the torch model as well, which is compared against separately
+    os.environ["MODEL_SERVER_ONNX_PARITY_CHECK"] = "false"
+    from codegraph.configs.indexing import EMBEDDING_MODEL
+    from codegraph.model_service.server_utils import load_model
+
+    start = time.perf_counter()
+    model = load_model(EMBEDDING_MODEL, "cpu", backend)
+    load_time = time.perf_counter() - start
+
+    model.encode(texts[:batch_size], batch_size=batch_size)  # warm up
+    start = time.perf_counter()
+    embs = model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+    encode_time = time.perf_counter() - start
+
+    results.put(
+        {
+            "backend": backend,
+            "load_time": load_time,
+            "texts_per_sec": len(texts) / encode_time,
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "embeddings": np.asarray(embs, dtype=np.float32),
+        }
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx_int8"])
+    parser.add_argument("--num-texts", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    texts = generate_texts(args.num_texts)
+    ctx = mp.get_context("spawn")
+    reports: list[dict[str, Any]] = []
+    for backend in args.backends:
+        results: "Queue[dict[str, Any]]" = ctx.Queue()
+        process = ctx.Process(target=run_backend, args=(backend, texts, args.batch_size, results))
+        process.start()
+        reports.append(results.get())
+        process.join()
+
+    baseline = reports[0]
+    print(f"{args.num_texts} texts, batch size {args.batch_size}, baseline {baseline['backend']}")
+    print(
+        f"{'backend':<12}{'load (s)':>10}{'texts/s':>10}{'speedup':>10}"
+        f"{'peak rss (MB)':>15}{'min cos sim':>13}"
+    )
+    for report in reports:
+        similarity = (report["embeddings"] * baseline["embeddings"]).sum(axis=1).min()
+        print(
+            f"{report['backend']:<12}{report['load_time']:>10.1f}{report['texts_per_sec']:>10.1f}"
+            f"{report['texts_per_sec'] / baseline['texts_per_sec']:>9.2f}x"
+            f"{report['peak_rss_mb']:>15.0f}{similarity:>13.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""Load tests the model server's endpoints at different concurrencies, and reports their
+throughput, latencies, and batching efficiency.
+
+Requests replay the chunks of a corpus of source files (the codegraph package by default), cut into
+chunks of up to the indexing chunk size, and embedded a file at a time as indexing does. By default
+the running model server is load tested. Servers can instead be started for each given
+configuration of environment variables, e.g., to compare CPU and GPU batching, or batch waits:
+
+    --server cpu_wait10:MODEL_SERVER_ALLOW_USE_GPU=false,MODEL_SERVER_CPU_BATCH_WAIT_MS=10
+
+The report can be written as JSON, to be diffed between releases.
+
+Usage (from the backend directory):
+    PYTHONPATH=. python scripts/benchmark_model_server.py --concurrency 1 8 32 --output report.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+import numpy as np
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+ENV_PATH = ROOT_DIR / ".vscode" / ".env"
+if ENV_PATH.exists():
+    load_dotenv(ENV_PATH)
+
+from codegraph.configs.app_configs import MODEL_SERVER_HOST, MODEL_SERVER_PORT  # noqa: E402
+from codegraph.configs.indexing import INDEXING_CHUNK_SIZE  # noqa: E402
+from codegraph.model_service.shared_models import (  # noqa: E402
+    EMBEDDINGS_MEDIA_TYPE,
+    ModelServerStats,
+)
+
+BACKEND_DIR = ROOT_DIR / "backend"
+ENDPOINTS = ["embed", "count_tokens", "count_tokens_batch"]
+CHARS_PER_TOKEN = 4  # rough average for code
+SERVER_STARTUP_TIMEOUT = 600  # seconds, the model may have to be downloaded or exported
+
+
+def load_corpus(
+    corpus_dir: Path, chunk_size: int = INDEXING_CHUNK_SIZE, suffixes: tuple[str, ...] = (".py",)
+) -> list[list[str]]:
+    """Returns the chunks of each file of the corpus, cut at line boundaries into chunks of up to
+    roughly `chunk_size` tokens.
+    """
+    max_chars = chunk_size * CHARS_PER_TOKEN
+    files: list[list[str]] = []
+    for filepath in sorted(corpus_dir.rglob("*")):
+        if filepath.suffix not in suffixes or not filepath.is_file():
+            continue
+
+        chunks: list[str] = []
+        lines: list[str] = []
+        num_chars = 0
+        for line in filepath.read_text(encoding="utf-8", errors="replace").splitlines():
+            if lines and num_chars + len(line) > max_chars:
+                chunks.append("\n".join(lines))
+                lines, num_chars = [], 0
+            lines.append(line[:max_chars])
+            num_chars += len(line) + 1
+        if lines:
+            chunks.append("\n".join(lines))
+
+        chunks = [chunk for chunk in chunks if chunk.strip()]
+        if chunks:
+            files.append(chunks)
+    return files
+
+
+def build_payloads(
+    endpoint: str, files: list[list[str]], max_texts_per_request: int
+) -> list[dict[str, Any]]:
+    """Returns the request bodies of an endpoint: a chunk for `count_tokens`, and the chunks of a
+    file otherwise.
+    """
+    if endpoint == "count_tokens":
+        return [{"text": chunk} for chunks in files for chunk in chunks]
+    if endpoint == "count_tokens_batch":
+        return [{"texts": chunks[:max_texts_per_request]} for chunks in files]
+    return [{"texts": chunks[:max_texts_per_request], "normalize": True} for chunks in files]
+
+
+async def run_load(
+    base_url: str,
+    endpoint: str,
+    payloads: list[dict[str, Any]],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+) -> dict[str, Any]:
+    """Sends requests from `concurrency` clients back to back, each waiting for its response
+    before sending the next, for `warmup` then `duration` seconds. Only the requests sent after
+    the warmup are measured.
+    """
+    headers = {"Accept": EMBEDDINGS_MEDIA_TYPE} if endpoint == "embed" else None
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies: list[float] = []
+    num_texts = 0
+    num_errors = 0
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=300) as client:
+
+        async def _client(seed: int, deadline: float, is_measured: bool) -> None:
+            nonlocal num_texts, num_errors
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                payload = rng.choice(payloads)
+                start = time.perf_counter()
+                try:
+                    resp = await client.post(f"/{endpoint}", json=payload, headers=headers)
+                    resp.raise_for_status()
+                except httpx.HTTPError:
+                    num_errors += is_measured
+                    continue
+                if is_measured:
+                    latencies.append(time.perf_counter() - start)
+                    num_texts += len(payload.get("texts", [None]))
+
+        if warmup > 0:
+            deadline = time.perf_counter() + warmup
+            await asyncio.gather(*(_client(-i - 1, deadline, False) for i in range(concurrency)))
+
+        stats_before = await _get_stats(client)
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(_client(i, deadline, True) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        stats_after = await _get_stats(client)
+
+    result: dict[str, Any] = {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "duration_s": elapsed,
+        "requests": len(latencies),
+        "errors": num_errors,
+        "requests_per_sec": len(latencies) / elapsed,
+        "texts_per_sec": num_texts / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)) * 1000 if latencies else None,
+        "p99_ms": float(np.percentile(latencies, 99)) * 1000 if latencies else None,
+    }
+
+    # batching efficiency, from the server's stats (includes any other traffic to the server)
+    num_batches = stats_after.num_batches - stats_before.num_batches
+    num_tokens = stats_after.num_tokens - stats_before.num_tokens
+    num_padded_tokens = stats_after.num_padded_tokens - stats_before.num_padded_tokens
+    result["batches"] = num_batches
+    result["texts_per_batch"] = (
+        (stats_after.num_texts - stats_before.num_texts) / num_batches if num_batches else None
+    )
+    result["tokens_per_sec"] = num_tokens / elapsed
+    result["padding_efficiency"] = num_tokens / num_padded_tokens if num_padded_tokens else None
+    return result
+
+
+async def _get_stats(client: httpx.AsyncClient) -> ModelServerStats:
+    resp = await client.get("/stats")
+    resp.raise_for_status()
+    return ModelServerStats.model_validate_json(resp.content)
+
+
+def start_server(env_overrides: dict[str, str], port: int) -> subprocess.Popen[bytes]:
+    """Starts a model server with the given environment variables, and waits until it's healthy."""
+    env = {**os.environ, "PYTHONPATH": ".", **env_overrides}
+    process = subprocess.Popen(
+        ["uvicorn", "codegraph.model_service.server:app", "--host", "localhost"]
+        + ["--port", str(port), "--workers", "1"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+    deadline = time.monotonic() + SERVER_STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Model server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"http://localhost:{port}/health").is_success:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(1)
+
+    process.terminate()
+    raise TimeoutError(f"Model server did not start in {SERVER_STARTUP_TIMEOUT}s")
+
+
+def parse_server(value: str) -> tuple[str, dict[str, str]]:
+    """Parses a `name:KEY=VALUE,KEY=VALUE` server configuration."""
+    name, _, assignments = value.partition(":")
+    env = dict(assignment.split("=", 1) for assignment in assignments.split(",") if assignment)
+    return name, env
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--endpoints", nargs="+", choices=ENDPOINTS, default=["embed", "count_tokens"]
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=20, help="seconds per run")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds before each run")
+    parser.add_argument("--corpus", type=Path, default=BACKEND_DIR / "codegraph")
+    parser.add_argument("--chunk-size", type=int, default=INDEXING_CHUNK_SIZE)
+    parser.add_argument("--max-texts-per-request", type=int, default=64)
+    parser.add_argument(
+        "--server", type=parse_server, action="append", default=[], metavar="NAME:ENV=VALUE,..."
+    )
+    parser.add_argument("--port", type=int, default=MODEL_SERVER_PORT + 10)
+    parser.add_argument("--output", type=Path, help="path to write the JSON report to")
+    args = parser.parse_args()
+
+    files = load_corpus(args.corpus, args.chunk_size)
+    if not files:
+        raise SystemExit(f"No files found in {args.corpus}")
+    chunk_lengths = [len(chunk) for chunks in files for chunk in chunks]
+    print(
+        f"Corpus: {len(files)} files, {len(chunk_lengths)} chunks, "
+        f"median {int(np.median(chunk_lengths))} chars"
+    )
+
+    servers: list[tuple[str, dict[str, str] | None]] = args.server or [("running", None)]
+    results: list[dict[str, Any]] = []
+    print(
+        f"{'server':<16}{'endpoint':<20}{'conc':>6}{'req/s':>10}{'texts/s':>10}{'p50 (ms)':>10}"
+        f"{'p99 (ms)':>10}{'texts/batch':>13}{'padding eff':>13}{'errors':>8}"
+    )
+    for name, env in servers:
+        process = None if env is None else start_server(env, args.port)
+        base_url = (
+            f"http://{MODEL_SERVER_HOST}:{MODEL_SERVER_PORT}"
+            if env is None
+            else f"http://localhost:{args.port}"
+        )
+        try:
+            for endpoint in args.endpoints:
+                payloads = build_payloads(endpoint, files, args.max_texts_per_request)
+                for concurrency in args.concurrency:
+                    result = asyncio.run(
+                        run_load(
+                            base_url, endpoint, payloads, concurrency, args.duration, args.warmup
+                        )
+                    )
+                    result["server"] = name
+                    results.append(result)
+                    print(
+                        f"{name:<16}{endpoint:<20}{concurrency:>6}"
+                        f"{result['requests_per_sec']:>10.1f}{result['texts_per_sec']:>10.1f}"
+                        f"{_format(result['p50_ms'], 10)}{_format(result['p99_ms'], 10)}"
+                        f"{_format(result['texts_per_batch'], 13)}"
+                        f"{_format(result['padding_efficiency'], 13, 3)}{result['errors']:>8}"
+                    )
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    if args.output is not None:
+        report = {
+            "config": {
+                "endpoints": args.endpoints,
+                "concurrency": args.concurrency,
+                "duration_s": args.duration,
+                "corpus_files": len(files),
+                "corpus_chunks": len(chunk_lengths),
+                "chunk_size": args.chunk_size,
+                "max_texts_per_request": args.max_texts_per_request,
+                "servers": {name: env for name, env in servers},
+            },
+            "results": results,
+        }
+        args.output.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        print(f"Wrote report to {args.output}", file=sys.stderr)
+
+
+def _format(value: float | None, width: int, precision: int = 1) -> str:
+    return f"{'-':>{width}}" if value is None else f"{value:>{width}.{precision}f}"
+
+
+if __name__ == "__main__":
+    main()
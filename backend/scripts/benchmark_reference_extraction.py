@@ -0,0 +1,129 @@
+"""Measures the throughput of python definition and reference extraction on synthetic repositories.
+
+Parses without a database, so only parsing and name resolution are measured. The time per file
+should stay roughly constant as the repository grows.
+
+Usage (from the backend directory):
+    PYTHONPATH=. python scripts/benchmark_reference_extraction.py --num-files 100 1000 5000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+ENV_PATH = ROOT_DIR / ".vscode" / ".env"
+if ENV_PATH.exists():
+    load_dotenv(ENV_PATH)
+
+from codegraph.db.models import Node  # noqa: E402
+from codegraph.graph.indexing.parsing.python_parser import PythonParser  # noqa: E402
+from codegraph.graph.indexing.parsing.symbol_table import SymbolTable  # noqa: E402
+
+MODULES_PER_PACKAGE = 20
+IMPORTS_PER_MODULE = 5
+
+
+def generate_repo(root: Path, num_files: int, seed: int = 0) -> None:
+    """Generates `num_files` python modules, each defining classes and functions which inherit
+    from, annotate with, and call definitions imported from other modules.
+    """
+    rng = random.Random(seed)
+    modules = [f"pkg{i // MODULES_PER_PACKAGE}.mod{i}" for i in range(num_files)]
+    for i, module in enumerate(modules):
+        imported = rng.sample(range(num_files), min(IMPORTS_PER_MODULE, num_files))
+        lines = [f"from {modules[j]} import Class{j}, func{j}" for j in imported if j != i]
+        lines.append(f"import {modules[imported[0]]} as other")
+        bases = ", ".join(f"Class{j}" for j in imported[:2] if j != i)
+        lines += [
+            "",
+            "",
+            f"class Class{i}({bases}):",
+            f"    def method(self, value: Class{imported[-1]}) -> int:",
+            "        total = 0",
+            "        for item in value.items:",
+            f"            total += func{imported[-1]}(item) + self.helper(item)",
+            f"        return other.func{imported[0]}(total)",
+            "",
+            "    def helper(self, item):",
+            "        return [x for x in item if x] or len(item)",
+            "",
+            "",
+            f"def func{i}(value):",
+            f"    return Class{i}().helper(value)",
+        ]
+        filepath = root / Path(*module.split(".")).with_suffix(".py")
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        filepath.write_text("\n".join(lines) + "\n")
+
+    for package_dir in {path.parent for path in root.rglob("*.py")}:
+        (package_dir / "__init__.py").touch()
+
+
+def benchmark(root: Path) -> dict[str, float]:
+    filepaths = sorted(root.rglob("*.py"))
+    file_ids = {filepath: uuid.uuid4() for filepath in filepaths}
+
+    start = time.perf_counter()
+    node_rows: list[dict[str, Any]] = []
+    alias_rows: list[dict[str, Any]] = []
+    for filepath in filepaths:
+        parser = PythonParser(1, root, filepath, None, file_id=file_ids[filepath])
+        parser.extract_definitions()
+        nodes, aliases, _ = parser.take_rows()
+        node_rows += nodes
+        alias_rows += aliases
+    definitions_time = time.perf_counter() - start
+
+    symbol_table = SymbolTable(
+        {row["local_qualifier"]: row["global_qualifier"] for row in alias_rows},
+        {row["global_qualifier"]: Node(**row) for row in node_rows},
+    )
+
+    start = time.perf_counter()
+    num_refs = 0
+    for filepath in filepaths:
+        parser = PythonParser(1, root, filepath, None, symbol_table, file_ids[filepath])
+        parser.extract_references()
+        num_refs += len(parser.take_rows()[2])
+    references_time = time.perf_counter() - start
+
+    return {
+        "files": len(filepaths),
+        "nodes": len(node_rows),
+        "refs": num_refs,
+        "definitions_ms": definitions_time * 1000 / len(filepaths),
+        "references_ms": references_time * 1000 / len(filepaths),
+        "refs_per_sec": num_refs / references_time,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--num-files", type=int, nargs="+", default=[100, 1000, 5000])
+    args = parser.parse_args()
+
+    print(
+        f"{'files':>8}{'nodes':>10}{'refs':>10}{'defs (ms/file)':>16}"
+        f"{'refs (ms/file)':>16}{'refs/s':>10}"
+    )
+    for num_files in args.num_files:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            generate_repo(root, num_files)
+            report = benchmark(root)
+        print(
+            f"{report['files']:>8.0f}{report['nodes']:>10.0f}{report['refs']:>10.0f}"
+            f"{report['definitions_ms']:>16.2f}{report['references_ms']:>16.2f}"
+            f"{report['refs_per_sec']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Queues the partial re-indexing of changed or deleted paths, e.g. from an editor on save.
+
+Only the given paths (and everything under them) are re-indexed, along with the files referencing
+them, instead of the whole project. The project is the one whose root contains the paths. Paths
+can also be read from stdin, one per line, e.g. from a git post-merge or post-checkout hook run in
+the project root (with `PYTHONPATH` set to the backend directory):
+
+    git diff --name-only ORIG_HEAD HEAD | python <backend>/scripts/index_paths.py -
+
+Usage (from the backend directory):
+    PYTHONPATH=. python scripts/index_paths.py path/to/file.py path/to/deleted_dir
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+ENV_PATH = ROOT_DIR / ".vscode" / ".env"
+if ENV_PATH.exists():
+    load_dotenv(ENV_PATH)
+
+from celery import Celery  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+from codegraph.celery.constants import CeleryPriority, CeleryQueue, CeleryTask  # noqa: E402
+from codegraph.db.engine import SqlEngine, get_session  # noqa: E402
+from codegraph.db.models import Project  # noqa: E402
+
+
+def group_by_project(paths: list[Path], project_roots: dict[int, Path]) -> dict[int, list[str]]:
+    """Groups absolute paths by the project with the innermost root containing them. Paths outside
+    of every project are dropped.
+    """
+    paths_by_project: dict[int, list[str]] = {}
+    for path in paths:
+        project_ids = [
+            project_id
+            for project_id, project_root in project_roots.items()
+            if path.is_relative_to(project_root)
+        ]
+        if not project_ids:
+            print(f"Skipping {path}, not in any project", file=sys.stderr)
+            continue
+
+        project_id = max(project_ids, key=lambda project_id: len(project_roots[project_id].parts))
+        paths_by_project.setdefault(project_id, []).append(path.as_posix())
+    return paths_by_project
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="paths to re-index, or - to read from stdin")
+    args = parser.parse_args()
+
+    raw_paths: list[str] = args.paths
+    if raw_paths == ["-"]:
+        raw_paths = [line.strip() for line in sys.stdin if line.strip()]
+    paths = [Path(os.path.abspath(raw_path)) for raw_path in raw_paths]  # may be deleted
+
+    SqlEngine.init_engine()
+    with get_session() as session:
+        project_roots = {
+            project_id: Path(root_path)
+            for project_id, root_path in session.execute(select(Project.id, Project.root_path))
+        }
+
+    celery_app = Celery(__name__)
+    celery_app.config_from_object("codegraph.celery.configs.shared_default")
+    for project_id, project_paths in group_by_project(paths, project_roots).items():
+        celery_app.send_task(
+            CeleryTask.RUN_INDEXING,
+            kwargs={"project_id": project_id, "paths": project_paths},
+            queue=CeleryQueue.INDEXING,
+            priority=CeleryPriority.HIGH,
+        )
+        print(f"Queued {len(project_paths)} paths of project {project_id}")
+
+
+if __name__ == "__main__":
+    main()
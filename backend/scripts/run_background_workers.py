@@ -63,6 +63,11 @@ if __name__ == "__main__":
             "beat",
             "--loglevel=INFO",
         ],
+        "File Watcher": [
+            "python",
+            "-m",
+            "codegraph.graph.indexing.watcher",
+        ],
     }
 
     processes: list[subprocess.Popen[str]] = []
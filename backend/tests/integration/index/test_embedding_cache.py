@@ -0,0 +1,59 @@
+from collections.abc import Iterator
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from codegraph.index.embedding_cache import EmbeddingCache, _get_key
+from codegraph.model_service.client import embed_texts
+from codegraph.redis.client import get_redis_client
+
+TEXTS = ["def cached():\n    return 'cached'", "hello cache", "hello cache"]
+
+
+@pytest.fixture()
+def clear_cached_texts() -> Iterator[None]:
+    """Clears the cached embeddings of the test texts only, as redis is shared with the locks and
+    other tests.
+    """
+    redis_client = get_redis_client()
+    keys = [_get_key(text, normalize) for text in TEXTS for normalize in (True, False)]
+    redis_client.delete(*keys)
+    yield
+    redis_client.delete(*keys)
+
+
+@pytest.mark.usefixtures("clear_cached_texts")
+def test_embedding_cache() -> None:
+    """
+    - should return the same embeddings as the model server
+    - should embed duplicate texts once
+    - should hit the local cache, then redis, before calling the model server
+    - should fail when the model server returns fewer embeddings than texts
+    """
+    texts = TEXTS
+    cache = EmbeddingCache()
+    with patch("codegraph.index.embedding_cache.embed_texts", wraps=embed_texts) as mock_embed:
+        embeddings = cache.embed(texts, normalize=True)
+        assert mock_embed.call_count == 1
+        assert mock_embed.call_args.args[0] == texts[:2]
+
+        # local hits
+        assert np.allclose(cache.embed(texts, normalize=True), embeddings, atol=1e-6)
+        assert mock_embed.call_count == 1
+
+        # redis hits
+        new_cache = EmbeddingCache()
+        assert np.allclose(new_cache.embed(texts, normalize=True), embeddings, atol=1e-6)
+        assert mock_embed.call_count == 1
+
+        # normalization is part of the key
+        new_cache.embed(texts, normalize=False)
+        assert mock_embed.call_count == 2
+
+    assert np.allclose(embeddings, embed_texts(texts), atol=1e-5)
+    assert embeddings[0].dtype == np.float32
+
+    with patch("codegraph.index.embedding_cache.embed_texts", return_value=[]):
+        with pytest.raises(ValueError, match="0 embeddings for 1 texts"):
+            EmbeddingCache().embed(["not cached yet"], normalize=True)
@@ -1,14 +1,20 @@
 import shutil
 from pathlib import Path
 from unittest.mock import patch
+from uuid import UUID
 
 import pytest
 from sqlalchemy.orm import aliased
 
 from codegraph.db.engine import get_session
 from codegraph.db.models import Alias, File, Node, Node__Reference, Project
-from codegraph.graph.indexing.pipeline import create_project, run_indexing
-from codegraph.graph.models import Language, NodeType
+from codegraph.graph.indexing.pipeline import (
+    create_project,
+    discover_files,
+    index_files,
+    run_indexing,
+)
+from codegraph.graph.models import IndexingStep, Language, NodeType
 from codegraph.index.chroma import ChromaIndexManager
 
 
@@ -153,6 +159,8 @@ def test_basic_import(reset: None) -> None:
     - alias: for relative imports
     - alias: for `import module.submodule`
     - alias: for multiple imports (`import module1, module2`)
+    - ref: for calls resolved through aliases
+    - ref: for calls within functions, from the function node
     """
     project_name = "cool multifile project"
     project_root = Path(__file__).parent / "test_files" / "basic_import"
@@ -250,6 +258,12 @@ def test_basic_import(reset: None) -> None:
     }
     assert refs_map.keys() == {
         ("file1", "file1.func1a", 17),
+        ("file1", "file2.func2a", 7),
+        ("file1", "module2.file4.func4b", 9),
+        ("file1", "module1.file3.func3a", 11),
+        ("file1", "module1.file3.Class3a", 13),
+        ("file1", "module2.file4.func4a", 14),
+        ("file1.func1a", "file2.func2b", 20),
         ("file2", "file2.func2a", 1),
         ("file2", "file2.func2b", 5),
         ("module1.file3", "module1.file3.func3a", 4),
@@ -696,12 +710,12 @@ def test_basic_indexing_crash_consistency(reset: None, tmp_path: Path) -> None:
 
     project_id = create_project(project_name, project_root)
 
-    # crash after step 3
+    # crash before discovering files
     with patch("codegraph.graph.indexing.pipeline.re.compile", side_effect=DeliberateError):
         with pytest.raises(DeliberateError):
             run_indexing(project_id, batch_size=1)
 
-    # crash during step 4
+    # crash while discovering files
     with patch("codegraph.graph.indexing.pipeline._create_file", side_effect=DeliberateError):
         with pytest.raises(DeliberateError):
             run_indexing(project_id, batch_size=1)
@@ -709,7 +723,7 @@ def test_basic_indexing_crash_consistency(reset: None, tmp_path: Path) -> None:
     # add file2
     shutil.copyfile(crashy_root / "file2.py", project_root / "file2.py")
 
-    # crash during step 5
+    # crash while indexing files
     with patch(
         "codegraph.graph.indexing.pipeline.PythonParser.extract_references",
         side_effect=DeliberateError,
@@ -852,3 +866,202 @@ def test_basic_indexing_crash_consistency(reset: None, tmp_path: Path) -> None:
     status = run_indexing(project_id)
     assert status.codegraph_indexed_paths == []
     assert status.vector_indexed_paths == []
+
+
+def test_unchanged_content_should_not_reindex(reset: None, tmp_path: Path) -> None:
+    """
+    - file: should not be re-indexed if only its modified time changes
+    - file: should keep its id when its content changes
+    - chunk: should be updated in place when file content changes
+    """
+    project_name = "touchy project"
+    project_root = tmp_path / "project_root"
+    project_root.mkdir()
+
+    with open(project_root / "file1.py", "w", encoding="utf-8") as f:
+        f.write("def func1():\n    pass\n")
+
+    project_id = create_project(project_name, project_root)
+    run_indexing(project_id)
+
+    with get_session() as session:
+        file1 = session.query(File).filter(File.name == "file1.py").one()
+        node_ids = {node.id for node in session.query(Node).all()}
+
+    # touch file without changing its content
+    (project_root / "file1.py").touch()
+    status = run_indexing(project_id)
+    assert status.codegraph_indexed_paths == []
+    assert status.vector_indexed_paths == []
+
+    with get_session() as session:
+        assert session.query(File).filter(File.name == "file1.py").one().id == file1.id
+        assert {node.id for node in session.query(Node).all()} == node_ids
+
+    # change file content
+    with open(project_root / "file1.py", "w", encoding="utf-8") as f:
+        f.write("def func1():\n    return 1\n")
+    status = run_indexing(project_id)
+    assert status.codegraph_indexed_paths == [project_root / "file1.py"]
+    assert status.vector_indexed_paths == [project_root / "file1.py"]
+
+    with get_session() as session:
+        files = session.query(File).all()
+        nodes = session.query(Node).all()
+
+    files_map = {Path(file.path).relative_to(project_root).as_posix(): file for file in files}
+    assert files_map.keys() == {".", "file1.py"}
+    assert files_map["file1.py"].id == file1.id
+    assert files_map["file1.py"].content_hash != file1.content_hash
+
+    nodes_map = {node.global_qualifier: node for node in nodes}
+    assert nodes_map.keys() == {"file1", "file1.func1"}
+
+    index = ChromaIndexManager.get_or_create_index(project_id)
+    chunks = index.get()
+    assert len(chunks) == 1
+    assert chunks[0].file_id == file1.id
+    assert "return 1" in chunks[0].text
+    assert chunks[0].node_ids == [nodes_map["file1.func1"].id]
+
+
+def test_partial_indexing(reset: None, tmp_path: Path) -> None:
+    """
+    - file: should re-index only the given paths when modified
+    - file: should create the given path and its new parent directories
+    - file: should delete the highest deleted parent directory of a deleted path
+    - file: should leave files outside the given paths intact, even if modified
+    - refs: should re-extract references of files referencing the given paths
+    """
+    project_name = "partial project"
+    project_root = tmp_path / "project_root"
+    (project_root / "dir1").mkdir(parents=True)
+
+    with open(project_root / "file1.py", "w", encoding="utf-8") as f:
+        f.write("def func1():\n    pass\n")
+    with open(project_root / "file2.py", "w", encoding="utf-8") as f:
+        f.write("from file1 import func1\n\n\ndef func2():\n    func1()\n")
+    with open(project_root / "file3.py", "w", encoding="utf-8") as f:
+        f.write("def func3():\n    pass\n")
+    with open(project_root / "dir1" / "file4.py", "w", encoding="utf-8") as f:
+        f.write("def func4():\n    pass\n")
+
+    project_id = create_project(project_name, project_root)
+    run_indexing(project_id)
+
+    with get_session() as session:
+        file3 = session.query(File).filter(File.name == "file3.py").one()
+
+    # modify, create, and delete the given paths, and modify a path that isn't given
+    with open(project_root / "file1.py", "w", encoding="utf-8") as f:
+        f.write("def func1():\n    return 1\n")
+    (project_root / "dir2" / "sub").mkdir(parents=True)
+    with open(project_root / "dir2" / "sub" / "file5.py", "w", encoding="utf-8") as f:
+        f.write("def func5():\n    pass\n")
+    shutil.rmtree(project_root / "dir1")
+    with open(project_root / "file3.py", "w", encoding="utf-8") as f:
+        f.write("def func3():\n    return 3\n")
+
+    status = run_indexing(
+        project_id,
+        paths=[
+            project_root / "file1.py",
+            Path("dir2/sub/file5.py"),
+            project_root / "dir1" / "file4.py",
+        ],
+    )
+    assert sorted(status.codegraph_indexed_paths) == [
+        project_root / "dir2" / "sub" / "file5.py",
+        project_root / "file1.py",
+        project_root / "file2.py",
+    ]
+    assert sorted(status.vector_indexed_paths) == [
+        project_root / "dir2" / "sub" / "file5.py",
+        project_root / "file1.py",
+    ]
+
+    with get_session() as session:
+        files = session.query(File).all()
+
+        source_node = aliased(Node)
+        target_node = aliased(Node)
+        refs = (
+            session.query(source_node.global_qualifier, target_node.global_qualifier)
+            .join(Node__Reference, Node__Reference.source_node_id == source_node.id)
+            .join(target_node, Node__Reference.target_node_id == target_node.id)
+            .filter(source_node.global_qualifier == "file2.func2")
+            .all()
+        )
+
+    files_map = {Path(file.path).relative_to(project_root).as_posix(): file for file in files}
+    assert files_map.keys() == {
+        ".",
+        "file1.py",
+        "file2.py",
+        "file3.py",
+        "dir2",
+        "dir2/sub",
+        "dir2/sub/file5.py",
+    }
+    assert files_map["dir2/sub"].parent_id == files_map["dir2"].id
+    assert files_map["dir2/sub/file5.py"].parent_id == files_map["dir2/sub"].id
+    assert files_map["file3.py"].content_hash == file3.content_hash
+    assert [tuple(ref) for ref in refs] == [("file2.func2", "file1.func1")]
+
+    # files outside the given paths are picked up by the next full indexing
+    status = run_indexing(project_id)
+    assert status.codegraph_indexed_paths == [project_root / "file3.py"]
+    assert status.vector_indexed_paths == [project_root / "file3.py"]
+
+
+def test_batched_indexing(reset: None, tmp_path: Path) -> None:
+    """
+    - file: should index files in batches up to their references, as distributed indexing does
+    - refs: should be the same as indexing all files at once, once extracted in batches
+    """
+    import_root = Path(__file__).parent / "test_files" / "basic_import"
+    shutil.copytree(import_root, tmp_path / "batched", ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copytree(import_root, tmp_path / "whole", ignore=shutil.ignore_patterns("__pycache__"))
+
+    whole_project_id = create_project("whole project", tmp_path / "whole")
+    run_indexing(whole_project_id)
+
+    project_id = create_project("batched project", tmp_path / "batched")
+    assert discover_files(project_id)
+
+    def _get_file_ids(*steps: IndexingStep) -> list[UUID]:
+        with get_session() as session:
+            return [
+                file.id
+                for file in session.query(File).filter(
+                    File.project_id == project_id, File.indexing_step.in_(steps)
+                )
+            ]
+
+    file_ids = _get_file_ids(IndexingStep.DEFINITIONS, IndexingStep.VECTOR)
+    for i in range(0, len(file_ids), 2):
+        index_files(project_id, file_ids=file_ids[i : i + 2], extract_references=False)
+    assert _get_file_ids(IndexingStep.DEFINITIONS, IndexingStep.VECTOR) == []
+
+    file_ids = _get_file_ids(IndexingStep.REFERENCES)
+    assert file_ids
+    for i in range(0, len(file_ids), 2):
+        index_files(project_id, file_ids=file_ids[i : i + 2])
+    assert _get_file_ids(IndexingStep.REFERENCES) == []
+
+    with get_session() as session:
+        source_node = aliased(Node)
+        target_node = aliased(Node)
+        refs = (
+            session.query(
+                source_node.project_id, source_node.global_qualifier, target_node.global_qualifier
+            )
+            .join(Node__Reference, Node__Reference.source_node_id == source_node.id)
+            .join(target_node, Node__Reference.target_node_id == target_node.id)
+            .all()
+        )
+
+    whole_refs = {(source, target) for pid, source, target in refs if pid == whole_project_id}
+    batched_refs = {(source, target) for pid, source, target in refs if pid == project_id}
+    assert batched_refs
+    assert batched_refs == whole_refs
@@ -1,10 +1,23 @@
+import asyncio
 from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
 
 import numpy as np
 import pytest
+import requests
+from prometheus_client.parser import text_string_to_metric_families
 from requests.exceptions import HTTPError
 
-from codegraph.model_service.client import count_tokens, embed_texts
+from codegraph.configs.app_configs import MODEL_SERVER_HOST, MODEL_SERVER_PORT
+from codegraph.model_service.client import (
+    count_tokens,
+    count_tokens_async,
+    count_tokens_batch,
+    count_tokens_batch_async,
+    embed_texts,
+    embed_texts_async,
+)
+from codegraph.model_service.shared_models import EmbedResponse
 
 
 def test_count_tokens() -> None:
@@ -42,6 +55,15 @@ def test_count_tokens_concurrent() -> None:
         prev = count
 
 
+def test_count_tokens_batch() -> None:
+    texts = ["hello", "", "hello world", "def test():\n    return 'test'", "hello"]
+    counts = count_tokens_batch(texts)
+
+    assert counts == [count_tokens(text) for text in texts]
+    assert count_tokens_batch([]) == []
+    assert count_tokens_batch(["", ""]) == [0, 0]
+
+
 def test_embed() -> None:
     texts = ["hello world", "how are you", "hello world"]
     embeddings1 = np.array(embed_texts(texts))
@@ -98,6 +120,78 @@ def test_embed_concurrent() -> None:
     assert np.allclose(mixed_embeddings12[1][1, :], unnormalized_truth[2, :], atol=1e-5)
 
 
+def test_embed_mixed_lengths_preserves_order() -> None:
+    # texts of very different lengths are embedded in length buckets, out of order
+    texts = ["def test():\n    return 'test'\n" * 20, "hi", "hello world " * 10, "ok"]
+    embeddings = np.array(embed_texts(texts))
+    individual_embeddings = np.array([embed_texts([text])[0] for text in texts])
+
+    assert np.allclose(embeddings, individual_embeddings, atol=1e-4)
+
+
+def test_embed_json_fallback() -> None:
+    texts = ["hello world", "def test():\n    return 'test'"]
+    resp = requests.post(
+        f"http://{MODEL_SERVER_HOST}:{MODEL_SERVER_PORT}/embed",
+        json={"texts": texts, "normalize": True},
+    )
+    resp.raise_for_status()
+    embeddings = np.array(EmbedResponse(**resp.json()).embeddings)
+
+    assert np.allclose(embeddings, embed_texts(texts), atol=1e-5)
+
+
+def test_metrics() -> None:
+    def get_metrics() -> dict[tuple[str, tuple[tuple[str, str], ...]], float]:
+        resp = requests.get(f"http://{MODEL_SERVER_HOST}:{MODEL_SERVER_PORT}/metrics")
+        resp.raise_for_status()
+        return {
+            (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+            for family in text_string_to_metric_families(resp.text)
+            for sample in family.samples
+        }
+
+    embed_labels = (("method", "POST"), ("route", "/embed"), ("status", "200"))
+    embed_request = ("model_server_requests_total", embed_labels)
+    batch_duration = ("model_server_batch_duration_seconds_sum", ())
+    before = get_metrics()
+    start = perf_counter()
+    embed_texts(["hello world", "def test():\n    return 'test'"])
+    elapsed = perf_counter() - start
+    after = get_metrics()
+
+    assert after[embed_request] == before.get(embed_request, 0) + 1
+    assert after[("model_server_embedded_texts_total", ())] >= (
+        before.get(("model_server_embedded_texts_total", ()), 0) + 2
+    )
+    assert after[("model_server_batch_texts_count", ())] > 0
+    assert 0 < after[batch_duration] - before.get(batch_duration, 0) <= elapsed
+    assert ("model_server_queue_depth", ()) in after
+
+
+def test_async_client_matches_sync_client() -> None:
+    """
+    - returns the same token counts and embeddings as the sync client
+    - can be used from concurrent tasks, and from separate event loops
+    """
+    texts = ["hello world", "def test():\n    return 'test'"]
+
+    async def run_concurrently() -> tuple[int, list[int], np.ndarray]:
+        token_count, token_counts, embeddings = await asyncio.gather(
+            count_tokens_async(texts[0]),
+            count_tokens_batch_async(texts),
+            embed_texts_async(texts),
+        )
+        return token_count, token_counts, embeddings
+
+    for _ in range(2):
+        token_count, token_counts, embeddings = asyncio.run(run_concurrently())
+        assert token_count == count_tokens(texts[0])
+        assert token_counts == count_tokens_batch(texts)
+        assert embeddings.dtype == np.float32
+        assert np.allclose(embeddings, embed_texts(texts), atol=1e-5)
+
+
 def test_embed_rejects_empty_list() -> None:
     texts: list[str] = []
     with pytest.raises(HTTPError):
@@ -0,0 +1,55 @@
+import uuid
+from pathlib import Path
+from typing import Any
+
+from codegraph.db.models import Node
+from codegraph.graph.indexing.parsing.base_parser import BaseParser
+from codegraph.graph.indexing.parsing.symbol_table import SymbolTable
+
+
+def extract_references(
+    project_root: Path, parser_classes: dict[str, type[BaseParser]]
+) -> set[tuple[str, str, int]]:
+    """Extracts the definitions then references of every file without a database, using the parser
+    class of its suffix. Returns the references which aren't definitions.
+    """
+    filepaths = sorted(
+        filepath for filepath in project_root.rglob("*") if filepath.suffix in parser_classes
+    )
+    file_ids = {filepath: uuid.uuid4() for filepath in filepaths}
+
+    node_rows: list[dict[str, Any]] = []
+    alias_rows: list[dict[str, Any]] = []
+    definition_rows: list[dict[str, Any]] = []
+    for filepath in filepaths:
+        parser = parser_classes[filepath.suffix](
+            1, project_root, filepath, None, file_id=file_ids[filepath]
+        )
+        parser.extract_definitions()
+        nodes, aliases, references = parser.take_rows()
+        node_rows += nodes
+        alias_rows += aliases
+        definition_rows += references
+
+    symbol_table = SymbolTable(
+        {row["local_qualifier"]: row["global_qualifier"] for row in alias_rows},
+        {row["global_qualifier"]: Node(**row) for row in node_rows},
+    )
+    qualifiers = {row["id"]: row["global_qualifier"] for row in node_rows}
+
+    reference_rows: list[dict[str, Any]] = []
+    for filepath in filepaths:
+        parser = parser_classes[filepath.suffix](
+            1, project_root, filepath, None, symbol_table, file_ids[filepath]
+        )
+        parser.extract_references()
+        reference_rows += parser.take_rows()[2]
+
+    refs = {
+        (qualifiers[row["source_node_id"]], qualifiers[row["target_node_id"]], row["line_number"])
+        for row in reference_rows
+    }
+    return refs - {
+        (qualifiers[row["source_node_id"]], qualifiers[row["target_node_id"]], row["line_number"])
+        for row in definition_rows
+    }
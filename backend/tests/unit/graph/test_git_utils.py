@@ -0,0 +1,85 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from codegraph.graph.indexing.git_utils import (
+    filter_ignored_paths,
+    get_changed_paths,
+    get_ignored_paths,
+    snapshot_worktree,
+)
+
+FILETYPES = {".py", ".md"}
+
+
+@pytest.fixture()
+def repo(tmp_path: Path) -> Path:
+    if shutil.which("git") is None:
+        pytest.skip("git unavailable")
+
+    def git(*args: str) -> None:
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    git("init")
+    (tmp_path / "project" / "build").mkdir(parents=True)
+    (tmp_path / "project" / ".gitignore").write_text("build/\n")
+    (tmp_path / "project" / "file1.py").write_text("a = 1\n")
+    (tmp_path / "project" / "file2.md").write_text("# file2\n")
+    (tmp_path / "outside.py").write_text("b = 1\n")
+    git("add", "--all")
+    git("-c", "user.name=test", "-c", "user.email=test@test", "commit", "-m", "initial")
+    return tmp_path / "project"
+
+
+def test_changed_paths_between_snapshots(repo: Path) -> None:
+    """
+    - finds modified, deleted, and untracked files of the given types in the project
+    - finds uncommitted changes which were reverted
+    - skips ignored files, other filetypes, and files outside the project
+    - leaves the repository's index untouched
+    """
+    (repo / "file1.py").write_text("a = 2\n")
+    tree1 = snapshot_worktree(repo, FILETYPES)
+    assert tree1 is not None
+
+    (repo / "file1.py").write_text("a = 1\n")
+    (repo / "file2.md").unlink()
+    (repo / "file3.py").write_text("c = 1\n")
+    (repo / "file4.txt").write_text("d\n")
+    (repo / "build" / "out.py").write_text("e = 1\n")
+    (repo.parent / "outside.py").write_text("b = 2\n")
+    tree2 = snapshot_worktree(repo, FILETYPES)
+    assert tree2 is not None
+
+    assert get_changed_paths(repo, tree1, tree2) == [
+        (repo / "file1.py").as_posix(),
+        (repo / "file2.md").as_posix(),
+        (repo / "file3.py").as_posix(),
+    ]
+    assert get_changed_paths(repo, tree2, tree2) == []
+    assert get_changed_paths(repo, "0" * 40, tree2) is None
+
+    staged = subprocess.run(
+        ["git", "diff", "--cached", "--name-only"], cwd=repo, capture_output=True, text=True
+    )
+    assert staged.stdout == ""
+
+
+def test_ignored_paths(repo: Path) -> None:
+    (repo / "build" / "out.py").write_text("e = 1\n")
+
+    assert get_ignored_paths(repo) == {(repo / "build").as_posix()}
+    assert filter_ignored_paths(
+        repo,
+        [(repo / "build" / "lib" / "out.py").as_posix(), (repo / "file1.py").as_posix()],
+    ) == [(repo / "file1.py").as_posix()]
+
+
+def test_not_a_repository(tmp_path: Path) -> None:
+    assert snapshot_worktree(tmp_path, FILETYPES) is None
+    assert get_ignored_paths(tmp_path) == set()
+    assert filter_ignored_paths(tmp_path, [(tmp_path / "file.py").as_posix()]) == [
+        (tmp_path / "file.py").as_posix()
+    ]
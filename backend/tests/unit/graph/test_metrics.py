@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from uuid import uuid4
+
+from sqlalchemy import create_engine, text
+
+from codegraph.graph.indexing.metrics import IndexingMetrics, measure_stage, record
+from codegraph.graph.indexing.parsing.python_parser import PythonParser
+from codegraph.graph.models import IndexingStage
+
+
+def test_metrics_collected_per_stage(tmp_path: Path) -> None:
+    """
+    - counts the files, latencies, and counts of each stage across threads
+    - attributes counts and database queries to the innermost stage
+    - measures the parsing done by the parsers
+    - collects nothing from threads which didn't activate the metrics
+    """
+    filepath = tmp_path / "file1.py"
+    filepath.write_text("def func1():\n    pass\n")
+    engine = create_engine("sqlite://")
+    metrics = IndexingMetrics()
+
+    def _index_file(i: int) -> None:
+        with metrics.activate(), measure_stage(IndexingStage.VECTOR, is_file=True):
+            with measure_stage(IndexingStage.CHUNKING):
+                record(chunks=2, tokens=10)
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            PythonParser(1, tmp_path, filepath, None, file_id=uuid4()).extract_definitions()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(_index_file, range(8)))
+    with measure_stage(IndexingStage.VECTOR, is_file=True):
+        record(chunks=1)
+
+    stages = metrics.get_stages()
+    assert set(stages) == {IndexingStage.VECTOR, IndexingStage.CHUNKING, IndexingStage.PARSING}
+    vector = stages[IndexingStage.VECTOR]
+    assert vector.files == 8
+    assert vector.chunks == 0
+    assert vector.db_queries == 8
+    assert vector.p50_file_latency is not None and vector.p95_file_latency is not None
+    assert vector.p50_file_latency <= vector.p95_file_latency <= vector.busy_time
+    assert stages[IndexingStage.CHUNKING].chunks == 16
+    assert stages[IndexingStage.CHUNKING].tokens == 80
+    assert stages[IndexingStage.CHUNKING].files == 0
+    assert stages[IndexingStage.CHUNKING].p50_file_latency is None
+    assert stages[IndexingStage.PARSING].bytes == 8 * len(filepath.read_bytes())
@@ -0,0 +1,76 @@
+import ast
+import os
+from pathlib import Path
+from unittest.mock import Mock
+
+from codegraph.graph.indexing.parse_cache import ParseCache
+
+
+def test_parse_cache_reuses_text_and_trees(tmp_path: Path) -> None:
+    """
+    - reads and parses each file once
+    - reads and parses a file again once it's modified
+    """
+    filepath = tmp_path / "file1.py"
+    filepath.write_text("def func1():\n    pass\n")
+    parse_fn = Mock(side_effect=ast.parse)
+    cache = ParseCache(max_bytes=10_000)
+
+    tree1 = cache.parse(filepath, "python_ast", parse_fn, 30)
+    tree2 = cache.parse(filepath, "python_ast", parse_fn, 30)
+    assert tree1 is tree2
+    assert cache.read_text(filepath) == "def func1():\n    pass\n"
+    assert parse_fn.call_count == 1
+
+    filepath.write_text("def func2():\n    pass\n")
+    os.utime(filepath, ns=(0, filepath.stat().st_mtime_ns + 1))
+    tree3 = cache.parse(filepath, "python_ast", parse_fn, 30)
+    assert isinstance(tree3.body[0], ast.FunctionDef)
+    assert tree3.body[0].name == "func2"
+    assert parse_fn.call_count == 2
+
+
+def test_parse_cache_trees_match_given_text(tmp_path: Path) -> None:
+    """
+    - reuses the cached tree of the text the caller read
+    - parses the caller's text if the cached tree is of another version of the file
+    """
+    filepath = tmp_path / "file1.py"
+    filepath.write_text("def func1():\n    pass\n")
+    parse_fn = Mock(side_effect=ast.parse)
+    cache = ParseCache(max_bytes=10_000)
+
+    text = cache.read_text(filepath)
+    tree1 = cache.parse(filepath, "python_ast", parse_fn, 30, text)
+    assert cache.parse(filepath, "python_ast", parse_fn, 30, text) is tree1
+    assert parse_fn.call_count == 1
+
+    # e.g., the file changed after the caller read it, within the same modification time
+    tree2 = cache.parse(filepath, "python_ast", parse_fn, 30, "def func2():\n    pass\n")
+    assert isinstance(tree2.body[0], ast.FunctionDef)
+    assert tree2.body[0].name == "func2"
+    assert parse_fn.call_count == 2
+
+
+def test_parse_cache_bounded_by_size(tmp_path: Path) -> None:
+    filepaths = [tmp_path / f"file{i}.py" for i in range(3)]
+    for filepath in filepaths:
+        filepath.write_text("x = 1\n" * 10)  # 60 bytes each
+    parse_fn = Mock(side_effect=ast.parse)
+    cache = ParseCache(max_bytes=150)
+
+    # each text fits, but the trees are estimated to be too large to cache
+    for filepath in filepaths:
+        cache.parse(filepath, "python_ast", parse_fn, 30)
+        cache.parse(filepath, "python_ast", parse_fn, 30)
+    assert parse_fn.call_count == 6
+
+    # only the 2 most recently used texts fit
+    assert cache._cache.size == 120
+    assert len(cache._cache) == 2
+
+    # texts are sized by their encoded bytes, not their characters
+    filepaths[0].write_text("é = 1\n" * 10)  # 60 characters, 70 bytes
+    os.utime(filepaths[0], ns=(0, filepaths[0].stat().st_mtime_ns + 1))
+    cache.read_text(filepaths[0])
+    assert cache._cache.size == 130
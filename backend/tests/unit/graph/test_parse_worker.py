@@ -0,0 +1,73 @@
+import pickle
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from codegraph.db.models import Node
+from codegraph.graph.indexing.metrics import IndexingMetrics
+from codegraph.graph.indexing.parsing.parse_worker import create_parse_executor, parse_file
+from codegraph.graph.indexing.parsing.python_parser import PythonParser
+from codegraph.graph.indexing.parsing.symbol_table import SymbolTable
+from codegraph.graph.models import IndexingStage, IndexingStep, NodeType
+
+
+def test_parse_file_in_process(tmp_path: Path) -> None:
+    """
+    - parses definitions in another process without a database
+    - returns plain rows for the caller to write
+    - returns the parsing metrics collected in the process, to be merged by the caller
+    """
+    project_root = tmp_path / "project_root"
+    (project_root / "pkg").mkdir(parents=True)
+    filepath = project_root / "pkg" / "file1.py"
+    filepath.write_text(
+        "import os.path as osp\n\n\nclass Class1:\n    def method(self):\n        pass\n"
+    )
+    file_id = uuid.uuid4()
+
+    with create_parse_executor(1) as executor:
+        (node_rows, alias_rows, reference_rows), parse_metrics = executor.submit(
+            parse_file,
+            PythonParser,
+            IndexingStep.DEFINITIONS,
+            1,
+            project_root,
+            filepath,
+            file_id,
+        ).result()
+
+    assert {(row["global_qualifier"], row["type"]) for row in node_rows} == {
+        ("pkg.file1", NodeType.MODULE),
+        ("pkg.file1.Class1", NodeType.CLASS),
+        ("pkg.file1.Class1.method", NodeType.FUNCTION),
+    }
+    assert all(row["file_id"] == file_id for row in node_rows)
+    assert [(row["local_qualifier"], row["global_qualifier"]) for row in alias_rows] == [
+        ("pkg.file1.osp", "os.path")
+    ]
+    assert len(reference_rows) == 3  # module -> class, module -> method, class -> method
+
+    metrics = IndexingMetrics()
+    metrics.merge(parse_metrics)
+    metrics.merge(parse_metrics)
+    parsing = metrics.get_stages()[IndexingStage.PARSING]
+    assert parsing.bytes == 2 * len(filepath.read_bytes())
+    assert parsing.busy_time > timedelta(0)
+
+
+def test_symbol_table_pickle() -> None:
+    node = Node(
+        id=uuid.uuid4(),
+        name="func",
+        global_qualifier="module.func",
+        type=NodeType.FUNCTION,
+        file_id=uuid.uuid4(),
+        project_id=1,
+    )
+    symbol_table = SymbolTable({"other.f": "module.func"}, {"module.func": node})
+    assert symbol_table.resolve("other.f") is node
+
+    unpickled = pickle.loads(pickle.dumps(symbol_table))
+    resolved = unpickled.resolve("other.f")
+    assert resolved is not None
+    assert resolved.id == node.id
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from codegraph.graph.indexing.parsing.python_parser import PythonParser
+from tests.unit.graph.parse_utils import extract_references
+
+BASE_FILE = """\
+class Base:
+    def run(self):
+        return 1
+
+
+def deco(fn):
+    return fn
+"""
+
+IMPL_FILE = """\
+from pkg.base import Base, deco
+from pkg import base as b
+
+
+class Impl(Base):
+    @deco
+    def run(self, other: Base) -> b.Base:
+        self.helper()
+        Base.run(self)
+        return b.Base()
+
+    def helper(self):
+        Base = 3
+        return Base
+
+    def again(self):
+        return self.run(None)
+
+
+def use(items):
+    return [deco(x) for x in items] + list(map(lambda Base: Base, items))
+
+
+def recurse():
+    return recurse()
+"""
+
+
+def test_extract_references(tmp_path: Path) -> None:
+    """
+    - ref: for base classes, decorators, and annotations
+    - ref: for calls and attributes resolved through aliases
+    - ref: for methods called through `self`
+    - ref: not for names shadowed by locals or parameters
+    - ref: not for recursive calls
+    """
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "base.py").write_text(BASE_FILE)
+    (tmp_path / "pkg" / "impl.py").write_text(IMPL_FILE)
+
+    assert extract_references(tmp_path, {".py": PythonParser}) == {
+        ("pkg.impl.Impl", "pkg.base.Base", 5),
+        ("pkg.impl.Impl.run", "pkg.base.deco", 6),
+        ("pkg.impl.Impl.run", "pkg.base.Base", 7),
+        ("pkg.impl.Impl.run", "pkg.impl.Impl.helper", 8),
+        ("pkg.impl.Impl.run", "pkg.base.Base.run", 9),
+        ("pkg.impl.Impl.run", "pkg.base.Base", 10),
+        ("pkg.impl.Impl.again", "pkg.impl.Impl.run", 17),
+        ("pkg.impl.use", "pkg.base.deco", 21),
+    }
@@ -0,0 +1,57 @@
+import uuid
+
+from codegraph.db.models import Node
+from codegraph.graph.indexing.parsing.symbol_table import SymbolTable
+from codegraph.graph.models import NodeType
+
+
+def _node(global_qualifier: str, node_type: NodeType) -> Node:
+    return Node(
+        id=uuid.uuid4(),
+        name=global_qualifier.split(".")[-1],
+        global_qualifier=global_qualifier,
+        type=node_type,
+        file_id=uuid.uuid4(),
+        project_id=1,
+    )
+
+
+def test_symbol_table_resolve() -> None:
+    """
+    - resolves exact node qualifiers
+    - resolves full and partial alias matches, preferring the longest prefix
+    - resolves chained aliases
+    - does not loop on self-referencing or cyclic aliases
+    """
+    nodes = {
+        qualifier: _node(qualifier, node_type)
+        for qualifier, node_type in [
+            ("module1", NodeType.MODULE),
+            ("module1.file3", NodeType.MODULE),
+            ("module1.file3.func3a", NodeType.FUNCTION),
+            ("module1.file3.Class3a", NodeType.CLASS),
+            ("module1.file3.Class3a.method", NodeType.FUNCTION),
+        ]
+    }
+    aliases = {
+        "file1.f3": "module1.file3",
+        "file1.f3.Class3a": "module1.func3a",  # longer prefix wins over file1.f3
+        "module1.func3a": "module1.file3.func3a",
+        "module1.file3": "module1.file3",
+        "file1.cycle_a": "file2.cycle_b",
+        "file2.cycle_b": "file1.cycle_a",
+    }
+    symbol_table = SymbolTable(aliases, nodes)
+
+    assert symbol_table.resolve("module1.file3.func3a") is nodes["module1.file3.func3a"]
+    assert symbol_table.resolve("file1.f3") is nodes["module1.file3"]
+    assert symbol_table.resolve("file1.f3.func3a") is nodes["module1.file3.func3a"]
+    assert symbol_table.resolve("file1.f3.Class3a") is nodes["module1.file3.func3a"]
+    assert symbol_table.resolve("module1.file3.Class3a.method") is not None
+    assert symbol_table.resolve("file1.f3.missing") is None
+    assert symbol_table.resolve("file1.cycle_a") is None
+
+    # memoized results are consistent
+    assert symbol_table.resolve("file1.f3.func3a") is nodes["module1.file3.func3a"]
+    assert symbol_table.find_node("module1.file3") is nodes["module1.file3"]
+    assert symbol_table.find_node("file1.f3") is None
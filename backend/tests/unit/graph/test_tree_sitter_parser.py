@@ -0,0 +1,140 @@
+import uuid
+from pathlib import Path
+
+import pytest
+from tree_sitter_language_pack import DownloadError, get_language
+
+from codegraph.graph.indexing.parsing.tree_sitter_parser import (
+    GoParser,
+    RustParser,
+    TypeScriptParser,
+)
+from codegraph.graph.models import NodeType
+from tests.unit.graph.parse_utils import extract_references
+
+
+@pytest.fixture(autouse=True)
+def require_grammars() -> None:
+    # grammars are downloaded on first use
+    try:
+        for language in ("go", "rust", "typescript"):
+            get_language(language)
+    except DownloadError as e:
+        pytest.skip(f"tree-sitter grammars unavailable: {e}")
+
+
+def test_go_definitions(tmp_path: Path) -> None:
+    """
+    - node: for functions, methods, and types
+    - node: methods qualified under their receiver type, even if declared before it
+    - alias: for named and unnamed imports
+    """
+    filepath = tmp_path / "server" / "main.go"
+    filepath.parent.mkdir()
+    filepath.write_text(
+        "package main\n"
+        "\n"
+        'import (\n\t"fmt"\n\tu "example.com/x/utils"\n)\n'
+        "\n"
+        "func (s *Server) Run() { fmt.Println(u.F()) }\n"
+        "\n"
+        "type Server struct{}\n"
+        "\n"
+        "func main() {}\n"
+    )
+
+    parser = GoParser(1, tmp_path, filepath, None, file_id=uuid.uuid4())
+    parser.extract_definitions()
+    node_rows, alias_rows, _ = parser.take_rows()
+
+    assert {(row["global_qualifier"], row["type"]) for row in node_rows} == {
+        ("server.main.go", NodeType.MODULE),
+        ("server.main.go.Server", NodeType.CLASS),
+        ("server.main.go.Server.Run", NodeType.FUNCTION),
+        ("server.main.go.main", NodeType.FUNCTION),
+    }
+    assert {(row["local_qualifier"], row["global_qualifier"]) for row in alias_rows} == {
+        ("server.main.go.fmt", "fmt"),
+        ("server.main.go.u", "example.com.x.utils"),
+    }
+
+
+def test_typescript_references(tmp_path: Path) -> None:
+    """
+    - alias: for named, aliased, namespace, and default imports of relative paths
+    - ref: for calls, constructors, base classes, and type annotations
+    - ref: for names of enclosing definitions
+    - ref: not for recursive calls
+    """
+    (tmp_path / "lib").mkdir()
+    (tmp_path / "lib" / "index.ts").write_text(
+        "export class Base {}\nexport function helper() {}\n"
+    )
+    (tmp_path / "lib" / "util.ts").write_text("export function a() {}\nexport function b() {}\n")
+    (tmp_path / "app.ts").write_text(
+        'import { a, b as c } from "./lib/util";\n'
+        'import * as lib from "./lib";\n'
+        "\n"
+        "export class Widget extends lib.Base {\n"
+        "  render(options: Options): void {\n"
+        "    a(c(), lib.helper());\n"
+        "    this.update();\n"
+        "  }\n"
+        "  update() {\n"
+        "    return build();\n"
+        "  }\n"
+        "}\n"
+        "\n"
+        "interface Options {}\n"
+        "\n"
+        "function build(): Widget {\n"
+        "  return build() || new Widget();\n"
+        "}\n"
+    )
+
+    assert extract_references(tmp_path, {".ts": TypeScriptParser}) == {
+        ("app.ts.Widget", "lib.index.ts.Base", 4),
+        ("app.ts.Widget.render", "app.ts.Options", 5),
+        ("app.ts.Widget.render", "lib.util.ts.a", 6),
+        ("app.ts.Widget.render", "lib.util.ts.b", 6),
+        ("app.ts.Widget.render", "lib.index.ts.helper", 6),
+        ("app.ts.Widget.update", "app.ts.build", 10),
+        ("app.ts.build", "app.ts.Widget", 16),
+        ("app.ts.build", "app.ts.Widget", 17),
+    }
+
+
+def test_rust_references(tmp_path: Path) -> None:
+    """
+    - alias: for `crate::` and `super::` paths resolved to files
+    - ref: for methods implemented in `impl` blocks
+    """
+    (tmp_path / "src" / "util").mkdir(parents=True)
+    (tmp_path / "src" / "main.rs").write_text(
+        "mod util;\n"
+        "use crate::util::{Helper, run as go};\n"
+        "\n"
+        "fn main() {\n"
+        "    go();\n"
+        "    Helper::new();\n"
+        "}\n"
+    )
+    (tmp_path / "src" / "util" / "mod.rs").write_text(
+        "pub mod parse;\n"
+        "pub struct Helper;\n"
+        "impl Helper {\n"
+        "    pub fn new() -> Helper { Helper }\n"
+        "}\n"
+        "pub fn run() {}\n"
+    )
+    (tmp_path / "src" / "util" / "parse.rs").write_text(
+        "use super::Helper;\n\npub fn parse() -> Helper { Helper::new() }\n"
+    )
+
+    assert extract_references(tmp_path, {".rs": RustParser}) == {
+        ("src.main.rs.main", "src.util.mod.rs.run", 5),
+        ("src.main.rs.main", "src.util.mod.rs.Helper.new", 6),
+        ("src.util.mod.rs", "src.util.mod.rs.Helper", 3),
+        ("src.util.parse.rs.parse", "src.util.mod.rs.Helper", 3),
+        ("src.util.parse.rs.parse", "src.util.mod.rs.Helper.new", 3),
+    }
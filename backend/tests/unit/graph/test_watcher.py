@@ -0,0 +1,102 @@
+import re
+from pathlib import Path
+from unittest.mock import Mock
+
+from watchdog.events import (
+    DirCreatedEvent,
+    DirModifiedEvent,
+    FileClosedNoWriteEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+)
+
+from codegraph.graph.indexing.watcher import ChangeDebouncer, _ProjectEventHandler
+
+
+def test_debouncer_waits_for_quiet_period() -> None:
+    """
+    - dispatches the paths of a project once it had no changes for the debounce period
+    - dispatches each project separately, and each path once
+    - dispatches changes that keep happening after the max delay
+    """
+    now = 0.0
+    dispatch = Mock()
+    debouncer = ChangeDebouncer(dispatch, debounce=1, max_delay=3, clock=lambda: now)
+
+    debouncer.add(1, "/a/x.py")
+    debouncer.add(1, "/a/x.py")
+    debouncer.add(2, "/b/y.py")
+    now = 0.5
+    debouncer.add(1, "/a/z.py")
+    debouncer.flush()
+    dispatch.assert_not_called()
+
+    now = 1.2
+    debouncer.flush()
+    dispatch.assert_called_once_with(2, ["/b/y.py"])
+
+    now = 1.5
+    debouncer.flush()
+    dispatch.assert_called_with(1, ["/a/x.py", "/a/z.py"])
+    assert dispatch.call_count == 2
+
+    for i in range(8):
+        now = 2 + i / 2
+        debouncer.add(1, f"/a/{i}.py")
+        debouncer.flush()
+    dispatch.assert_called_with(1, [f"/a/{i}.py" for i in range(7)])  # first change at 2s
+    assert dispatch.call_count == 3
+
+    debouncer.flush(force=True)
+    dispatch.assert_called_with(1, ["/a/7.py"])
+
+
+def test_debouncer_retries_failed_dispatch() -> None:
+    now = 0.0
+    dispatch = Mock(side_effect=[ConnectionError, None])
+    debouncer = ChangeDebouncer(dispatch, debounce=1, max_delay=3, clock=lambda: now)
+
+    debouncer.add(1, "/a/x.py")
+    now = 1
+    debouncer.flush()
+    now = 2
+    debouncer.flush()
+    assert dispatch.call_count == 2
+    dispatch.assert_called_with(1, ["/a/x.py"])
+
+
+def test_event_handler_filters_paths(tmp_path: Path) -> None:
+    """
+    - adds created, modified, and deleted files with indexed filetypes
+    - adds both the source and destination of moves
+    - adds created directories
+    - skips directory modifications and reads
+    - skips files under skipped directories, and non-indexed filetypes
+    """
+    debouncer = Mock()
+    handler = _ProjectEventHandler(1, tmp_path, debouncer, re.compile(r"^\..*|^node_modules$"))
+
+    for event in [
+        FileModifiedEvent(f"{tmp_path}/src/main.py"),
+        FileDeletedEvent(f"{tmp_path}/README.md"),
+        FileMovedEvent(f"{tmp_path}/old.py", f"{tmp_path}/new.py"),
+        FileMovedEvent(f"{tmp_path}/draft.tmp", f"{tmp_path}/final.ts"),
+        DirCreatedEvent(f"{tmp_path}/pkg"),
+        DirCreatedEvent(f"{tmp_path}/node_modules"),
+        DirModifiedEvent(f"{tmp_path}/src"),
+        FileClosedNoWriteEvent(f"{tmp_path}/src/main.py"),
+        FileModifiedEvent(f"{tmp_path}/.git/index.json"),
+        FileModifiedEvent(f"{tmp_path}/node_modules/lib/index.js"),
+        FileModifiedEvent(f"{tmp_path}/image.png"),
+    ]:
+        handler.dispatch(event)
+
+    assert [call.args for call in debouncer.add.call_args_list] == [
+        (1, f"{tmp_path}/src/main.py"),
+        (1, f"{tmp_path}/README.md"),
+        (1, f"{tmp_path}/old.py"),
+        (1, f"{tmp_path}/new.py"),
+        (1, f"{tmp_path}/final.ts"),
+        (1, f"{tmp_path}/pkg"),
+    ]
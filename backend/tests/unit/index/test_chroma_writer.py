@@ -0,0 +1,85 @@
+from threading import Event
+from typing import Any, cast
+from uuid import UUID, uuid4
+
+import pytest
+
+from codegraph.graph.models import Chunk
+from codegraph.index.chroma import ChromaIndex
+from codegraph.index.chroma_writer import ChromaBatchWriter
+
+
+class _FakeIndex:
+    def __init__(self) -> None:
+        self.batches: list[list[tuple[UUID, int, list[Chunk]]]] = []
+        self.release = Event()
+        self.release.set()
+        self.error: Exception | None = None
+
+    def replace_batch(self, replacements: list[tuple[UUID, int, list[Chunk]]]) -> None:
+        self.release.wait()
+        if self.error is not None:
+            raise self.error
+        self.batches.append(replacements)
+
+
+def _make_chunks(num_chunks: int) -> list[Chunk]:
+    file_id = uuid4()
+    return [
+        Chunk(
+            text=f"chunk {i}",
+            file_id=file_id,
+            chunk_id=i,
+            token_count=2,
+            node_ids=[],
+            language=None,
+        )
+        for i in range(num_chunks)
+    ]
+
+
+def _make_writer(index: _FakeIndex, **kwargs: Any) -> ChromaBatchWriter:
+    return ChromaBatchWriter(cast(ChromaIndex, index), **kwargs)
+
+
+def test_chroma_writer_batches_files() -> None:
+    """
+    - writes the chunks of many files together, up to the batch size
+    - completes a file's future only once its chunks are written
+    - writes a partial batch once the wait elapsed, or the writer is closed
+    """
+    index = _FakeIndex()
+    index.release.clear()
+    with _make_writer(index, max_batch_chunks=4, max_batch_wait=60) as writer:
+        futs = [writer.replace(uuid4(), 0, _make_chunks(2)) for _ in range(5)]
+        assert not any(fut.done() for fut in futs)
+        index.release.set()
+        futs[3].result(timeout=5)
+        assert [len(batch) for batch in index.batches] == [2, 2]
+        assert not futs[4].done()
+    futs[4].result(timeout=0)
+    assert [len(batch) for batch in index.batches] == [2, 2, 1]
+
+    index = _FakeIndex()
+    with _make_writer(index, max_batch_chunks=100, max_batch_wait=0.01) as writer:
+        file_id = uuid4()
+        chunks = _make_chunks(3)
+        writer.replace(file_id, 5, chunks).result(timeout=5)
+        assert index.batches == [[(file_id, 5, chunks)]]
+
+
+def test_chroma_writer_propagates_errors() -> None:
+    """
+    - fails the futures of every file in a failed batch
+    - keeps writing later batches
+    """
+    index = _FakeIndex()
+    index.error = RuntimeError("chroma is down")
+    with _make_writer(index, max_batch_chunks=1, max_batch_wait=0) as writer:
+        with pytest.raises(RuntimeError, match="chroma is down"):
+            writer.replace(uuid4(), 0, _make_chunks(1)).result(timeout=5)
+        index.error = None
+        writer.replace(uuid4(), 0, _make_chunks(1)).result(timeout=5)
+    assert len(index.batches) == 1
+    with pytest.raises(RuntimeError, match="closed"):
+        writer.replace(uuid4(), 0, _make_chunks(1))
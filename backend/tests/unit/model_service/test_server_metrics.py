@@ -0,0 +1,77 @@
+import pytest
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from codegraph.model_service.metrics import metrics_response, observe_batch, track_requests
+
+
+def _get_requests(method: str, route: str, status: str) -> float:
+    labels = {"method": method, "route": route, "status": status}
+    return REGISTRY.get_sample_value("model_server_requests_total", labels) or 0.0
+
+
+def _get_sample(name: str, labels: dict[str, str] | None = None) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_batch_observed() -> None:
+    """
+    - counts the requests, texts, and tokens of a batch
+    - records the time taken to embed the batch
+    """
+    before_texts = _get_sample("model_server_embedded_texts_total")
+    before_padded = _get_sample("model_server_padded_tokens_total")
+    before_duration = _get_sample("model_server_batch_duration_seconds_sum")
+    before_fast = _get_sample("model_server_batch_duration_seconds_bucket", {"le": "0.05"})
+
+    observe_batch(3, 5, 40, 64, 0.02)
+
+    assert _get_sample("model_server_embedded_texts_total") == before_texts + 5
+    assert _get_sample("model_server_padded_tokens_total") == before_padded + 64
+    assert _get_sample("model_server_batch_duration_seconds_sum") == pytest.approx(
+        before_duration + 0.02
+    )
+    assert (
+        _get_sample("model_server_batch_duration_seconds_bucket", {"le": "0.05"}) == before_fast + 1
+    )
+
+
+def test_requests_tracked_by_route() -> None:
+    """
+    - counts requests by route template and status, including failed requests
+    - counts requests to unknown paths under a single route
+    - exposes the metrics in the prometheus text format
+    """
+    app = FastAPI()
+    app.middleware("http")(track_requests)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int) -> dict[str, int]:
+        if item_id < 0:
+            raise HTTPException(status_code=404)
+        return {"item_id": item_id}
+
+    @app.get("/metrics")
+    async def get_metrics() -> Response:
+        return metrics_response()
+
+    before_ok = _get_requests("GET", "/items/{item_id}", "200")
+    before_missing = _get_requests("GET", "/items/{item_id}", "404")
+    before_unmatched = _get_requests("GET", "unmatched", "404")
+
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/items/-1")
+    client.get("/unknown/path")
+
+    assert _get_requests("GET", "/items/{item_id}", "200") == before_ok + 2
+    assert _get_requests("GET", "/items/{item_id}", "404") == before_missing + 1
+    assert _get_requests("GET", "unmatched", "404") == before_unmatched + 1
+
+    resp = client.get("/metrics")
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert 'model_server_request_duration_seconds_count{method="GET",route="/items/{item_id}"}' in (
+        resp.text
+    )
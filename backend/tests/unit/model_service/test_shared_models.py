@@ -0,0 +1,25 @@
+import numpy as np
+
+from codegraph.model_service.shared_models import decode_embeddings, encode_embeddings
+
+
+def test_embeddings_round_trip() -> None:
+    embeddings = np.random.default_rng(0).standard_normal((5, 768)).astype(np.float32)
+    content = encode_embeddings(embeddings)
+    decoded = decode_embeddings(content)
+
+    assert decoded.shape == (5, 768)
+    assert decoded.dtype == np.float32
+    assert np.array_equal(decoded, embeddings)
+
+    # decoded embeddings are a view of the response content, not a copy
+    assert not decoded.flags.owndata
+    assert not decoded.flags.writeable
+
+
+def test_embeddings_round_trip_converts_to_float32() -> None:
+    embeddings = np.array([[0.5, -1.25], [3.0, 0.0]], dtype=np.float64)
+    decoded = decode_embeddings(encode_embeddings(embeddings))
+
+    assert decoded.dtype == np.float32
+    assert np.array_equal(decoded, embeddings)
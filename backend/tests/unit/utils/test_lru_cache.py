@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from codegraph.utils.lru_cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    cache: LRUCache[str, int] = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+
+    # access "a" so "b" becomes the least recently used
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.hits == 3
+    assert cache.misses == 1
+
+
+def test_lru_cache_zero_size_caches_nothing() -> None:
+    cache: LRUCache[str, int] = LRUCache(max_size=0)
+    cache.put("a", 1)
+
+    assert len(cache) == 0
+    assert cache.get("a") is None
+
+
+def test_lru_cache_evicts_by_size() -> None:
+    cache: LRUCache[str, str] = LRUCache(max_size=10)
+    cache.put("a", "aaaa", size=4)
+    cache.put("b", "bbbb", size=4)
+    cache.put("c", "cc", size=2)
+    assert cache.size == 10
+
+    # "a" and "b" are evicted to make room for "d", "e" is too large to cache
+    cache.put("d", "dddddd", size=6)
+    cache.put("e", "e" * 11, size=11)
+
+    assert cache.size == 8
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+    assert cache.get("c") == "cc"
+    assert cache.get("d") == "dddddd"
+    assert cache.get("e") is None
+
+    # replacing an entry updates its size
+    cache.put("c", "c", size=1)
+    assert cache.size == 7
+
+
+def test_lru_cache_concurrent() -> None:
+    cache: LRUCache[int, int] = LRUCache(max_size=100)
+
+    def _put_get(i: int) -> int | None:
+        cache.put(i % 150, i)
+        return cache.get(i % 150)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(_put_get, range(1000)))
+
+    assert len(cache) == 100
+    assert cache.hits + cache.misses == len(results)